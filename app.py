@@ -1,6 +1,16 @@
 # app.py
+import argparse
 from gui.main_window import MainWindow
 
 if __name__ == "__main__":
-    app = MainWindow()
-    app.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Work Hours Calculator")
+    parser.add_argument("--kiosk", action="store_true",
+                        help="Start as a full screen badge scan terminal (Ctrl+Q to quit)")
+    args = parser.parse_args()
+
+    if args.kiosk:
+        from gui.kiosk import run_kiosk
+        run_kiosk()
+    else:
+        app = MainWindow()
+        app.run()
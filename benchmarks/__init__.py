@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Work Hours Calculator.
+Run `python -m benchmarks.bench_core --help` for the available options.
+"""
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the hot paths in core.time_calc and core.data.
+
+Results are written as JSON so that two runs can be compared:
+
+    python -m benchmarks.bench_core --output new.json --baseline old.json
+
+The command exits with status 1 if any benchmark became slower than the
+baseline by more than the allowed regression.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.datagen import generate_records, generate_shape
+from core import data, integrity, write_buffer
+from core.intervals import round_minutes
+from core.time_calc import CalculationPolicy, PolicyCalculator, calculate_work_hours
+from gui.preferences import preferences
+
+ROUNDING_ALGORITHMS = ["standard", "nearest_5", "nearest_10", "nearest_30", "ceiling", "floor"]
+
+# (entry, exit, expected net hours) under the default breaks and rounding, checked before timing
+KNOWN_SHIFTS = [
+    ("08:00", "17:00", 8.25),
+    ("22:00", "06:00", 8.0),
+    # An entry rounded up to midnight must not make the shift last a day
+    ("23:55", "00:05", 0.0),
+    ("23:53", "00:00", 0.0)
+]
+
+def check_time_calc():
+    """Return the KNOWN_SHIFTS whose calculated net hours are wrong, as (entry, exit, expected, actual)."""
+    wrong = []
+    for entry, exit, expected in KNOWN_SHIFTS:
+        actual = calculate_work_hours(entry, exit, True, {}, settings=CalculationPolicy())
+        if actual != expected:
+            wrong.append((entry, exit, expected, actual))
+    return wrong
+
+def measure(func, ops, repeat=3, setup=None):
+    """Time func() and return the best run together with its peak memory.
+
+    Args:
+        func: Callable performing `ops` operations per call
+        ops: Number of operations performed by one call
+        repeat: Number of timed runs; the fastest one is reported
+        setup: Optional untimed callable run before every call
+
+    Returns:
+        dict: Seconds per operation, operations per second and peak memory
+    """
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Memory is measured in a separate run so tracing does not skew the timing
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops": ops,
+        "seconds_per_op": best / ops,
+        "ops_per_sec": ops / best if best else float("inf"),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+@contextmanager
+def preference(key, value, default=None):
+    """Change a preference for the duration of a block without saving it."""
+    original = preferences.get(key, default)
+    preferences.set(key, value, autosave=False)
+    try:
+        yield
+    finally:
+        preferences.set(key, original, autosave=False)
+
+def bench_time_calc(results, iterations):
+    """Benchmark rounding for every algorithm, the calculator and the full calculation."""
+    times = [datetime(1900, 1, 1, 6 + i % 12, i % 60) for i in range(iterations)]
+    minutes = [t.hour * 60 + t.minute for t in times]
+    pairs = [(t.strftime("%H:%M"), (t + timedelta(hours=9)).strftime("%H:%M")) for t in times]
+
+    for algorithm in ROUNDING_ALGORITHMS:
+        results[f"round_minutes[{algorithm}]"] = measure(
+            lambda: [round_minutes(m, algorithm) for m in minutes], iterations)
+
+    policy = CalculationPolicy("standard")
+    calculator = PolicyCalculator(policy)
+    results["net_minutes"] = measure(
+        lambda: [calculator.net_minutes(entry, exit, True) for entry, exit in pairs], iterations)
+
+    cache = {}
+    results["calculate_work_hours"] = measure(
+        lambda: [calculate_work_hours(entry, exit, True, cache, settings=policy) for entry, exit in pairs],
+        iterations)
+
+def bench_data(results, size, workdir, save_ops=5):
+    """Benchmark the record store functions on a file with `size` records."""
+    badges, days = generate_shape(size)
+    records = list(generate_records(badges, days))
+    file_path = Path(workdir) / f"records_{size}.json"
+    data.write_records(records, file_path)
+
+    with preference("file_path", str(file_path)):
+        def load_cold():
+            data.clear_record_cache()
+            data.load_records()
+
+        results[f"load_records[{size}]"] = measure(load_cold, 1)
+        results[f"load_records_cached[{size}]"] = measure(data.load_records, 1)
+
+        loaded = data.load_records()
+        results[f"filter_by_badge[{size}]"] = measure(
+            lambda: data.filter_by_badge(loaded, records[0]["sicil"]), 1)
+
+        data_cache = {
+            "entry": datetime(1900, 1, 1, 8, 0),
+            "exit": datetime(1900, 1, 1, 17, 0),
+            "net_duration": timedelta(hours=8, minutes=15)
+        }
+
+        # Every repetition saves new badges, so the conflict check passes and each save is a real write
+        repetition = [0]
+
+        def save_many():
+            repetition[0] += 1
+            for i in range(save_ops):
+                data.save_record(f"bench{repetition[0]}-{i}", data_cache, file_path)
+
+        def save_many_buffered():
+            # Includes writing the batch, not just queueing it
+            save_many()
+            write_buffer.flush_buffer(file_path)
+
+        def delete_many():
+            for record in records[:save_ops]:
+                data.delete_record(record["sicil"], record["tarih"], record["giris"], record["cikis"], file_path)
+
+        def reset_file():
+            # Every run starts from the original file of `size` records; saves still
+            # buffered from the previous run are written first so they cannot land in it
+            write_buffer.flush_buffer(file_path)
+            data.write_records(records, file_path)
+            integrity.forget(file_path)
+            data.load_records()
+
+        # Unbuffered, each save writes the file, as before the write buffer existed,
+        # so this result stays comparable with older baselines
+        with preference("write_buffer_latency_ms", 0, write_buffer.DEFAULT_LATENCY_MS):
+            results[f"save_record[{size}]"] = measure(save_many, save_ops, setup=reset_file)
+        results[f"save_record_buffered[{size}]"] = measure(save_many_buffered, save_ops, setup=reset_file)
+        results[f"delete_record[{size}]"] = measure(delete_many, save_ops, setup=reset_file)
+    data.clear_record_cache()
+
+def compare(results, baseline, max_regression):
+    """Return the benchmarks that got slower than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        ratio = result["seconds_per_op"] / before["seconds_per_op"]
+        if ratio > 1 + max_regression:
+            regressions.append((name, ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark core.time_calc and core.data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Record file sizes to benchmark")
+    parser.add_argument("--iterations", type=int, default=10000,
+                        help="Number of calls for the time calculation benchmarks")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against the results of an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    wrong = check_time_calc()
+    for entry, exit, expected, actual in wrong:
+        print(f"WRONG calculate_work_hours({entry!r}, {exit!r}): {actual} instead of {expected}")
+    if wrong:
+        return 1
+
+    results = {}
+    bench_time_calc(results, args.iterations)
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            bench_data(results, size, workdir)
+
+    for name, result in results.items():
+        print(f"{name:32} {result['seconds_per_op'] * 1000:10.4f} ms/op "
+              f"{result['ops_per_sec']:12.1f} ops/s {result['peak_kib']:10.1f} KiB peak")
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": datetime.now().isoformat(timespec="seconds")
+            },
+            "results": results
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.max_regression)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Responsiveness benchmarks for the record tables in gui.dialogs.
+
+The dialogs are built against generated record files and timed the way
+a user experiences them: time to first paint, full refresh, filtering
+per keystroke and deleting a row. A display is required; on a headless
+machine run the benchmark under a virtual X server:
+
+    xvfb-run -a python -m benchmarks.bench_gui --output gui.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_core import compare
+from benchmarks.datagen import generate_records, generate_shape
+from core import data
+from gui import dialogs
+from gui.preferences import preferences
+from utils.languages import _
+
+def timed(func):
+    """Run func() and return the elapsed seconds."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def result(seconds, ops=1):
+    return {
+        "ops": ops,
+        "seconds_per_op": seconds / ops,
+        "ops_per_sec": ops / seconds if seconds else float("inf")
+    }
+
+def bench_badge_dialog(root, results, size, records):
+    """Time the badge control table on a file of `size` records."""
+    dialog = dialogs.BadgeDataDialog(root, _("all_records"), data.load_records)
+
+    def first_paint():
+        dialog.show()
+        root.update()
+
+    results[f"badge_dialog.first_paint[{size}]"] = result(timed(first_paint))
+
+    def refresh():
+        dialog.refresh_table()
+        root.update_idletasks()
+
+    results[f"badge_dialog.refresh_table[{size}]"] = result(timed(refresh))
+
+    # Type a badge number one key at a time, then clear the search again
+    badge = records[len(records) // 2]["sicil"]
+    keystrokes = [badge[:i] for i in range(1, len(badge) + 1)] + [""]
+
+    def type_search():
+        for text in keystrokes:
+            dialog.search_entry.delete(0, tk.END)
+            dialog.search_entry.insert(0, text)
+            dialog.filter_records()
+            root.update_idletasks()
+
+    results[f"badge_dialog.filter_keystroke[{size}]"] = result(timed(type_search), len(keystrokes))
+
+    # Confirmation and result popups are answered automatically
+    originals = (dialogs.messagebox.askyesno, dialogs.messagebox.showinfo)
+    dialogs.messagebox.askyesno = lambda *args, **kwargs: True
+    dialogs.messagebox.showinfo = lambda *args, **kwargs: None
+    try:
+        def delete_first():
+            dialog.tree.selection_set(dialog.tree.get_children()[0])
+            dialog.delete_selected()
+            root.update_idletasks()
+
+        results[f"badge_dialog.delete[{size}]"] = result(timed(delete_first))
+    finally:
+        dialogs.messagebox.askyesno, dialogs.messagebox.showinfo = originals
+
+    dialog._on_window_close()
+
+def bench_json_dialog(root, results, size, file_path):
+    """Time opening a record file in the JSON data viewer."""
+    def first_paint():
+        dialogs.JsonDataDialog(root, data.open_json_file(file_path), str(file_path)).show()
+        root.update()
+
+    results[f"json_dialog.first_paint[{size}]"] = result(timed(first_paint))
+
+    for window in root.winfo_children():
+        if isinstance(window, tk.Toplevel):
+            window.destroy()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the record table dialogs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Record file sizes to benchmark")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against the results of an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}). Run under xvfb-run on headless machines.")
+        return 2
+    root.withdraw()
+
+    results = {}
+    original = preferences.get("file_path")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in args.sizes:
+                badges, days = generate_shape(size)
+                records = list(generate_records(badges, days))
+                file_path = Path(workdir) / f"records_{size}.json"
+                data.write_records(records, file_path)
+                preferences.preferences["file_path"] = str(file_path)
+                data.clear_record_cache()
+
+                bench_badge_dialog(root, results, size, records)
+                bench_json_dialog(root, results, size, file_path)
+    finally:
+        preferences.preferences["file_path"] = original
+        root.destroy()
+
+    for name, item in results.items():
+        print(f"{name:40} {item['seconds_per_op'] * 1000:10.2f} ms")
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "tk": tk.TkVersion,
+                "timestamp": datetime.now().isoformat(timespec="seconds")
+            },
+            "results": results
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.max_regression)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
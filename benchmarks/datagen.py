@@ -0,0 +1,31 @@
+# benchmarks/datagen.py
+import random
+from datetime import date, timedelta
+
+def generate_records(badges, days, start=date(2024, 1, 1), seed=0):
+    """Yield synthetic records for N badges over M days.
+
+    Args:
+        badges: Number of distinct badge numbers
+        days: Number of consecutive days starting at `start`
+        start: First date of the generated range
+        seed: Seed for the random generator, so runs are repeatable
+    """
+    rng = random.Random(seed)
+    for day in range(days):
+        tarih = (start + timedelta(days=day)).isoformat()
+        for badge in range(badges):
+            entry = rng.randrange(6 * 60, 10 * 60)
+            exit = entry + rng.randrange(6 * 60, 11 * 60)
+            yield {
+                "sicil": str(10000 + badge),
+                "tarih": tarih,
+                "giris": f"{entry // 60:02d}:{entry % 60:02d}",
+                "cikis": f"{exit // 60 % 24:02d}:{exit % 60:02d}",
+                "net_calisma": round((exit - entry - 45) / 60, 2)
+            }
+
+def generate_shape(size, badges=100):
+    """Return (badges, days) so that badges * days is close to `size`."""
+    badges = max(1, min(badges, size))
+    return badges, max(1, size // badges)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Command line tools for the Work Hours Calculator record files.
+Run `python cli.py --help` to list the available commands.
+"""
+import argparse
+import sys
+
+def export_archive_command(args):
+    from core.archive import export_archive
+    count = export_archive(args.archive, args.source, before=args.before, remove=args.remove)
+    print(f"Exported {count} records to {args.archive}")
+    return 0
+
+def import_archive_command(args):
+    from core.archive import import_archive
+    conflicts = [] if args.skip_conflicts else None
+    count = import_archive(args.archive, args.target, conflicts=conflicts, check=not args.allow_conflicts)
+    for error in conflicts or ():
+        print(f"Skipped: {error}")
+    print(f"Imported {count} records from {args.archive}" + (f", skipped {len(conflicts)}" if conflicts else ""))
+    return 0
+
+def to_binary_command(args):
+    from core.binary_store import json_to_binary
+    count = json_to_binary(args.source, args.target)
+    print(f"Converted {count} records to {args.target}")
+    return 0
+
+def from_binary_command(args):
+    from core.binary_store import binary_to_json
+    count = binary_to_json(args.source, args.target)
+    print(f"Converted {count} records to {args.target}")
+    return 0
+
+def recompute_command(args):
+    from core.recompute import recompute_records
+    from core.time_calc import CalculationPolicy
+    policy = CalculationPolicy.from_preferences()
+    if args.rounding:
+        policy.rounding_algorithm = args.rounding
+    summary = recompute_records(args.file, policy, start=args.start, end=args.end, badges=args.badge,
+                                dry_run=args.dry_run, workers=args.workers, chunk_size=args.chunk_size,
+                                use_stored_policy=args.stored_policy)
+    for record, old_net, new_net in summary["changes"]:
+        old_text = f"{old_net:.2f}" if isinstance(old_net, (int, float)) else str(old_net)
+        print(f"{record.get('sicil')}\t{record.get('tarih')}\t{record.get('giris')}-{record.get('cikis')}\t"
+              f"{old_text} -> {new_net:.2f}")
+    action = "would change" if args.dry_run else "changed"
+    print(f"Checked {summary['checked']} records, {len(summary['changes'])} {action}, "
+          f"{summary['skipped']} skipped as invalid")
+    return 0
+
+def report_command(args):
+    from core.reports import generate_report
+    count = generate_report(args.target, kind=args.kind, period=args.period, file_path=args.file,
+                            start=args.start, end=args.end, badges=args.badge)
+    print(f"Wrote {count} report rows to {args.target}")
+    return 0
+
+def audit_command(args):
+    from core.integrity import audit_file, describe
+    counts = {"duplicate": 0, "overlap": 0}
+    for conflict in audit_file(args.file):
+        counts[conflict["kind"]] += 1
+        print(f"{conflict['kind']}\t#{conflict['first_position']} {describe(conflict['first'])}\t"
+              f"#{conflict['second_position']} {describe(conflict['second'])}")
+    print(f"Found {counts['duplicate']} duplicates and {counts['overlap']} overlapping shifts")
+    return 1 if any(counts.values()) else 0
+
+def validate_command(args):
+    from core.validation import validate_file
+    summary = validate_file(args.file, clean_path=args.clean, report_path=args.report, repair=args.repair,
+                            workers=args.workers, chunk_size=args.chunk_size, tolerance=args.tolerance)
+    print(f"Checked {summary['checked']} records: {summary['valid']} valid, {summary['repaired']} repaired, "
+          f"{summary['rejected']} rejected, {summary['problems']} problems")
+    if args.clean:
+        print(f"Wrote {summary['valid'] + summary['repaired']} records to {args.clean}")
+    if args.report:
+        print(f"Wrote the problems to {args.report}")
+    return 1 if summary["problems"] else 0
+
+def sort_command(args):
+    from core.external_sort import sort_file
+    summary = sort_file(args.file, args.output, dedupe=args.dedupe, run_size=args.run_size,
+                        temp_dir=args.temp_dir)
+    print(f"Sorted {summary['read']} records in {summary['runs']} runs, wrote {summary['written']}"
+          + (f", dropped {summary['duplicates']} duplicates" if args.dedupe else ""))
+    return 0
+
+def merge_command(args):
+    from core.merge import merge_files
+    summary = merge_files(args.sources, args.target, dedupe=not args.keep_duplicates, run_size=args.run_size,
+                          temp_dir=args.temp_dir)
+    print(f"Merged {summary['read']} records from {len(args.sources)} files into {args.target}: "
+          f"wrote {summary['written']}, dropped {summary['duplicates']} duplicates")
+    return 0
+
+def retention_command(args):
+    from core.retention import apply_retention, retention_settings
+    settings = retention_settings()
+    keep_years = settings["keep_years"] if args.keep_years is None else args.keep_years
+    summary = apply_retention(args.file, keep_years=keep_years, archive=not args.delete,
+                              archive_dir=args.archive_dir or settings.get("archive_dir"), dry_run=args.dry_run)
+    for year, count in sorted(summary["years"].items()):
+        print(f"{year}\t{count}")
+    action = "would move" if args.dry_run else ("deleted" if args.delete else "archived")
+    print(f"Records before {summary['cutoff']}: {action} {summary['expired']}, kept {summary['kept']}")
+    return 0
+
+def serve_command(args):
+    from core.service import serve
+    print(f"Serving records on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    serve(args.file, args.host, args.port, commit_window_ms=args.commit_window_ms,
+          max_batch=args.max_batch, verbose=args.verbose)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Work Hours Calculator command line tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Compressed archives
+    export_parser = subparsers.add_parser("export-archive",
+                                          help="Export records to a compressed archive (.jsonl.gz or .jsonl.xz)")
+    export_parser.add_argument("archive", help="Target archive path")
+    export_parser.add_argument("--source", help="Record file to export (defaults to the active record file)")
+    export_parser.add_argument("--before", help="Only export records dated before YYYY-MM-DD")
+    export_parser.add_argument("--remove", action="store_true",
+                               help="Remove the exported records from the source file")
+    export_parser.set_defaults(func=export_archive_command)
+
+    import_parser = subparsers.add_parser("import-archive", help="Append the records of an archive to a record file")
+    import_parser.add_argument("archive", help="Archive to import")
+    import_parser.add_argument("--target", help="Record file to append to (defaults to the active record file)")
+    import_parser.add_argument("--skip-conflicts", action="store_true",
+                               help="Skip records that repeat or overlap a stored shift instead of stopping")
+    import_parser.add_argument("--allow-conflicts", action="store_true",
+                               help="Import records that repeat or overlap a stored shift")
+    import_parser.set_defaults(func=import_archive_command)
+
+    # Fixed-width binary store
+    to_binary_parser = subparsers.add_parser("to-binary", help="Convert a JSON record file to the binary (.whcb) format")
+    to_binary_parser.add_argument("source", help="JSON record file or archive")
+    to_binary_parser.add_argument("target", help="Binary record file to create")
+    to_binary_parser.set_defaults(func=to_binary_command)
+
+    from_binary_parser = subparsers.add_parser("from-binary", help="Convert a binary (.whcb) record file to JSON")
+    from_binary_parser.add_argument("source", help="Binary record file")
+    from_binary_parser.add_argument("target", help="JSON record file to create")
+    from_binary_parser.set_defaults(func=from_binary_command)
+
+    # Recomputation of stored net hours
+    recompute_parser = subparsers.add_parser("recompute",
+                                             help="Re-derive net working hours under the current (or given) policy")
+    recompute_parser.add_argument("--file", help="Record file (defaults to the active record file)")
+    recompute_parser.add_argument("--from", dest="start", help="First date to recompute (YYYY-MM-DD)")
+    recompute_parser.add_argument("--to", dest="end", help="Last date to recompute (YYYY-MM-DD)")
+    recompute_parser.add_argument("--badge", action="append", help="Badge number to recompute (repeatable)")
+    recompute_parser.add_argument("--rounding",
+                                  choices=("standard", "nearest_5", "nearest_10", "nearest_30", "ceiling", "floor"),
+                                  help="Rounding algorithm to use instead of the preference")
+    recompute_parser.add_argument("--stored-policy", action="store_true",
+                                  help="Recompute each record under the policy it was saved with")
+    recompute_parser.add_argument("--dry-run", action="store_true", help="Only report the differences")
+    recompute_parser.add_argument("--workers", type=int, help="Number of worker processes")
+    recompute_parser.add_argument("--chunk-size", type=int, default=5000, help="Records per work chunk")
+    recompute_parser.set_defaults(func=recompute_command)
+
+    # Reports
+    report_parser = subparsers.add_parser("report", help="Write a summary or detail report (.csv or .html)")
+    report_parser.add_argument("target", help="Report file to create; the format follows the suffix")
+    report_parser.add_argument("--kind", choices=("summary", "detail"), default="summary",
+                               help="Per-badge, per-period totals or a record listing (default: summary)")
+    report_parser.add_argument("--period", choices=("day", "week", "month", "year"), default="month",
+                               help="Summary period (default: month)")
+    report_parser.add_argument("--file", help="Record file (defaults to the active record file)")
+    report_parser.add_argument("--from", dest="start", help="First date to include (YYYY-MM-DD)")
+    report_parser.add_argument("--to", dest="end", help="Last date to include (YYYY-MM-DD)")
+    report_parser.add_argument("--badge", action="append", help="Badge number to include (repeatable)")
+    report_parser.set_defaults(func=report_command)
+
+    # Integrity audit
+    audit_parser = subparsers.add_parser("audit", help="List duplicate and overlapping shifts of a record file")
+    audit_parser.add_argument("--file", help="Record file (defaults to the active record file)")
+    audit_parser.set_defaults(func=audit_command)
+
+    # Validation and repair
+    validate_parser = subparsers.add_parser("validate", help="Check the records of a file and write a clean copy")
+    validate_parser.add_argument("--file", help="Record file (defaults to the active record file)")
+    validate_parser.add_argument("--clean", help="JSON file receiving the records that pass (or were repaired)")
+    validate_parser.add_argument("--report", help="CSV file listing every problem found")
+    validate_parser.add_argument("--repair", action="store_true",
+                                 help="Fix dates, times, badge numbers and net hours where possible")
+    validate_parser.add_argument("--tolerance", type=float, default=0.01,
+                                 help="Allowed net hours difference to a recomputation (default: 0.01)")
+    validate_parser.add_argument("--workers", type=int, help="Number of worker processes")
+    validate_parser.add_argument("--chunk-size", type=int, default=5000, help="Records per work chunk")
+    validate_parser.set_defaults(func=validate_command)
+
+    # External sort
+    sort_parser = subparsers.add_parser("sort", help="Rewrite a record file ordered by badge, date and entry time")
+    sort_parser.add_argument("--file", help="Record file (defaults to the active record file)")
+    sort_parser.add_argument("--output", help="File to write instead of replacing the record file; "
+                                              "the format follows the suffix")
+    sort_parser.add_argument("--dedupe", action="store_true", help="Drop repeated copies of a shift")
+    sort_parser.add_argument("--run-size", type=int, default=200000,
+                             help="Records sorted in memory at a time (default: 200000)")
+    sort_parser.add_argument("--temp-dir", help="Directory for the sorted runs (defaults to the output directory)")
+    sort_parser.set_defaults(func=sort_command)
+
+    # Merging the record files of several sites
+    merge_parser = subparsers.add_parser("merge", help="Merge several record files into one, ordered by date and badge")
+    merge_parser.add_argument("target", help="Store to create; the format follows the suffix")
+    merge_parser.add_argument("sources", nargs="+", help="Record files, archives or binary stores to merge")
+    merge_parser.add_argument("--keep-duplicates", action="store_true",
+                              help="Keep repeated copies of a shift instead of dropping them")
+    merge_parser.add_argument("--run-size", type=int, default=200000,
+                              help="Records sorted in memory at a time (default: 200000)")
+    merge_parser.add_argument("--temp-dir", help="Directory for the sorted runs (defaults to the target directory)")
+    merge_parser.set_defaults(func=merge_command)
+
+    # Retention
+    retention_parser = subparsers.add_parser("retention",
+                                             help="Move records older than the retention period out of a record file")
+    retention_parser.add_argument("--file", help="Record file (defaults to the active record file)")
+    retention_parser.add_argument("--keep-years", type=int,
+                                  help="Years kept besides the current one (defaults to the preference)")
+    retention_parser.add_argument("--archive-dir", help="Folder of the yearly archives "
+                                                        "(defaults to the preference or <record file>_archive)")
+    retention_parser.add_argument("--delete", action="store_true", help="Delete expired records instead of archiving")
+    retention_parser.add_argument("--dry-run", action="store_true", help="Only count the records that would be moved")
+    retention_parser.set_defaults(func=retention_command)
+
+    # Record service
+    serve_parser = subparsers.add_parser("serve", help="Run the record service that terminals save to over HTTP")
+    serve_parser.add_argument("--file", help="Record file owned by the service (defaults to the active record file)")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    serve_parser.add_argument("--commit-window-ms", type=int, default=20,
+                              help="How long a commit waits for more saves to batch (default: 20)")
+    serve_parser.add_argument("--max-batch", type=int, default=1000,
+                              help="Commit at once when this many records are queued (default: 1000)")
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request")
+    serve_parser.set_defaults(func=serve_command)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    from core.integrity import RecordConflictError
+    try:
+        return args.func(args)
+    except (RecordConflictError, ValueError, OSError) as e:
+        print(f"{parser.prog} {args.command}: error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
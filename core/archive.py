@@ -0,0 +1,133 @@
+# core/archive.py
+import gzip
+import json
+import lzma
+from pathlib import Path
+
+# Supported archive suffixes and the opener used for each of them
+ARCHIVE_OPENERS = {
+    ".gz": gzip.open,
+    ".xz": lzma.open
+}
+
+def is_archive(file_path):
+    """Return True if the path points to a compressed record archive."""
+    return Path(file_path).suffix.lower() in ARCHIVE_OPENERS
+
+def open_archive(file_path, mode="rt"):
+    """Open a compressed archive in text mode with the matching codec."""
+    file_path = Path(file_path)
+    opener = ARCHIVE_OPENERS.get(file_path.suffix.lower())
+    if opener is None:
+        raise ValueError(f"Unsupported archive format: {file_path.name}")
+    return opener(file_path, mode, encoding="utf-8")
+
+def write_archive(records, archive_path, append=False):
+    """Write records to a compressed JSON Lines archive.
+
+    Each record is stored on its own line without indentation, so the
+    compressor only has to deal with the repeated key names.
+
+    Args:
+        records: Iterable of record dictionaries
+        archive_path: Target archive path (.jsonl.gz or .jsonl.xz)
+        append: Add a new compressed member instead of replacing the file
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    with open_archive(archive_path, "at" if append else "wt") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+def read_archive(archive_path):
+    """Yield records from a compressed archive while decompressing it."""
+    with open_archive(archive_path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def export_archive(archive_path, source_path=None, before=None, remove=False):
+    """Export records from a record file into a compressed archive.
+
+    Args:
+        archive_path: Target archive path
+        source_path: Optional record file, defaults to the active record file
+        before: Optional YYYY-MM-DD date; only older records are exported
+        remove: Remove the exported records from the source file
+
+    Returns:
+        int: Number of records exported
+    """
+    from core import write_buffer
+    from core.data import iter_records, write_records, get_file_path
+
+    source_path = Path(source_path) if source_path else get_file_path()
+
+    def selected(record):
+        return before is None or record.get("tarih", "") < before
+
+    if not remove:
+        return write_archive((r for r in iter_records(source_path) if selected(r)), archive_path)
+
+    # Buffered saves of this process wait while the live file is read and rewritten,
+    # and are appended to the new file afterwards
+    with write_buffer.writes_paused(source_path):
+        count = write_archive((r for r in iter_records(source_path) if selected(r)), archive_path)
+
+        # Seal the exported segment by dropping it from the live file
+        if count:
+            write_records((r for r in iter_records(source_path) if not selected(r)), source_path)
+
+    return count
+
+def import_archive(archive_path, custom_path=None, conflicts=None, check=True):
+    """Append all records from a compressed archive to a record file.
+
+    Each imported record is checked against the stored shifts and the
+    records imported before it (see core/integrity.py).
+
+    Args:
+        archive_path: Archive to import
+        custom_path: Optional record file, defaults to the active record file
+        conflicts: Optional list; conflicting records are skipped and their
+            RecordConflictError appended to it instead of failing the import
+        check: Reject records that repeat or overlap stored shifts
+
+    Returns:
+        int: Number of records imported
+
+    Raises:
+        RecordConflictError: On the first conflicting record if no conflicts list is given
+    """
+    from core.data import iter_records, write_records, get_file_path
+    from core.integrity import IntegrityIndex, RecordConflictError
+
+    file_path = Path(custom_path) if custom_path else get_file_path()
+    counts = {"imported": 0}
+    index = IntegrityIndex()
+
+    def combined():
+        for record in iter_records(file_path):
+            if check:
+                index.add(record, check=False)
+            yield record
+        for record in read_archive(archive_path):
+            if check:
+                try:
+                    index.add(record)
+                except RecordConflictError as e:
+                    if conflicts is None:
+                        raise
+                    conflicts.append(e)
+                    continue
+            counts["imported"] += 1
+            yield record
+
+    write_records(combined(), file_path)
+    return counts["imported"]
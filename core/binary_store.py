@@ -0,0 +1,187 @@
+# core/binary_store.py
+import mmap
+import os
+import struct
+from datetime import date
+from pathlib import Path
+from core.intervals import MINUTES_PER_DAY, parse_clock
+
+BINARY_SUFFIX = ".whcb"
+
+# File header: magic, format version and record size
+HEADER = struct.Struct("<4sHH")
+MAGIC = b"WHCB"
+VERSION = 2
+
+# Record layout: date ordinal, entry minutes, exit minutes, net hours in hundredths, badge
+# and policy ID (empty if none). Exit minutes count from midnight of the entry day, so
+# "06:00+2" is stored as 3240.
+RECORD = struct.Struct("<IHHi16s10s")
+BADGE_SIZE = 16
+POLICY_SIZE = 10
+# Version 1 files lack the policy ID; they are still readable
+RECORD_LAYOUTS = {1: struct.Struct("<IHHi16s"), 2: RECORD}
+
+# Largest exit offset an unsigned 16-bit field holds, about 45 days after the entry day
+MAX_MINUTES = 0xFFFF
+MAX_NET = 0x7FFFFFFF
+
+def encode_record(record):
+    """Pack a JSON record into its fixed-width binary form.
+
+    Raises:
+        ValueError: If a field does not fit the binary layout, naming the record
+    """
+    badge = str(record["sicil"]).encode("utf-8")
+    if len(badge) > BADGE_SIZE:
+        raise ValueError(f"Badge number is longer than {BADGE_SIZE} bytes: {record['sicil']}")
+    policy = str(record.get("policy") or "").encode("utf-8")
+    if len(policy) > POLICY_SIZE:
+        raise ValueError(f"Policy ID is longer than {POLICY_SIZE} bytes: {record!r}")
+    try:
+        ordinal = date.fromisoformat(record["tarih"]).toordinal()
+        entry = parse_clock(record["giris"])
+        exit = parse_clock(record["cikis"])
+        net = round(float(record["net_calisma"]) * 100)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid record of badge {record.get('sicil')} ({e}): {record!r}") from e
+    if entry > MAX_MINUTES or exit > MAX_MINUTES:
+        raise ValueError(f"Shift is too long for the binary format: {record!r}")
+    if not -MAX_NET - 1 <= net <= MAX_NET:
+        raise ValueError(f"Net hours are out of range for the binary format: {record!r}")
+    return RECORD.pack(
+        ordinal,
+        entry,
+        exit,
+        net,
+        badge,
+        policy
+    )
+
+def _format_exit(entry, exit):
+    """Format exit minutes, adding a "+N" day suffix only where the clock is ambiguous."""
+    days, minutes = divmod(exit, MINUTES_PER_DAY)
+    text = f"{minutes // 60:02d}:{minutes % 60:02d}"
+    if days == 0 or (days == 1 and minutes < entry):
+        return text
+    return f"{text}+{days}"
+
+def decode_record(buffer, layout=RECORD):
+    """Unpack a binary record into the JSON record schema."""
+    ordinal, entry, exit, net, badge, *policy = layout.unpack(buffer)
+    record = {
+        "sicil": badge.rstrip(b"\0").decode("utf-8"),
+        "tarih": date.fromordinal(ordinal).isoformat(),
+        "giris": f"{entry // 60:02d}:{entry % 60:02d}",
+        "cikis": _format_exit(entry, exit),
+        "net_calisma": net / 100
+    }
+    policy = policy[0].rstrip(b"\0") if policy else b""
+    if policy:
+        record["policy"] = policy.decode("utf-8")
+    return record
+
+class BinaryRecordStore:
+    """Memory-mapped, read-only access to a fixed-width binary record file.
+
+    Rows are located by offset, so reading row N does not touch the rest
+    of the file.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self._file = open(self.file_path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a binary record file: {self.file_path}")
+        self._view = memoryview(self._mmap)
+
+        if len(self._view) < HEADER.size:
+            self.close()
+            raise ValueError(f"Not a binary record file: {self.file_path}")
+        magic, version, record_size = HEADER.unpack(self._view[:HEADER.size])
+        self._layout = RECORD_LAYOUTS.get(version) if magic == MAGIC else None
+        if self._layout is None or record_size != self._layout.size:
+            self.close()
+            raise ValueError(f"Unsupported binary record file: {self.file_path}")
+
+        self._count = (len(self._view) - HEADER.size) // self._layout.size
+
+    def __len__(self):
+        return self._count
+
+    def row_view(self, index):
+        """Return a zero-copy memoryview over the bytes of row N."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        size = self._layout.size
+        offset = HEADER.size + index * size
+        return self._view[offset:offset + size]
+
+    def __getitem__(self, index):
+        return decode_record(self.row_view(index), self._layout)
+
+    def __iter__(self):
+        size = self._layout.size
+        for offset in range(HEADER.size, HEADER.size + self._count * size, size):
+            yield decode_record(self._view[offset:offset + size], self._layout)
+
+    def close(self):
+        """Release the mapping and the underlying file."""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def write_binary(records, file_path):
+    """Write records to a binary record file.
+
+    Returns:
+        int: Number of records written
+    """
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    count = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            for record in records:
+                f.write(encode_record(record))
+                count += 1
+    except BaseException:
+        # A failing record source leaves the file as it was
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, file_path)
+    return count
+
+def json_to_binary(source_path, target_path):
+    """Convert a JSON record file (or archive) to the binary format, keeping the policy IDs."""
+    from core.data import iter_records
+    from core.policy import copy_policies
+    count = write_binary(iter_records(source_path), target_path)
+    copy_policies(source_path, target_path)
+    return count
+
+def binary_to_json(source_path, target_path):
+    """Convert a binary record file back to the JSON record schema, keeping the policy IDs."""
+    from core.data import write_records
+    from core.policy import copy_policies
+    with BinaryRecordStore(source_path) as store:
+        count = write_records(iter(store), target_path)
+    copy_policies(source_path, target_path)
+    return count
@@ -1,19 +1,154 @@
 # core/data.py
 import json
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
+from core.archive import is_archive, read_archive
+from core.binary_store import BINARY_SUFFIX, BinaryRecordStore
+from core.integrity import RecordConflictError
+from core.intervals import format_exit_time
+from core.policy import get_registry, policy_id
+from core import integrity, write_buffer
+from gui.preferences import preferences
 from utils.file_utils import get_file_path
+from utils.instrumentation import instrument
 
-def save_record(sicil_no, data_cache, custom_path=None):
-    """Save a record to the JSON file."""
-    date = datetime.now().strftime("%Y-%m-%d")
+# Parsed record files kept across calls: path -> ((mtime_ns, size), records)
+_record_cache = OrderedDict()
+
+# Upper bound on the number of cached records over all files
+RECORD_CACHE_MAX_RECORDS = 500000
+
+# The cache is shared with background writers such as the write buffer
+_cache_lock = threading.RLock()
+
+def _file_stamp(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _cache_store(file_path, records):
+    """Remember the records of a file as of its current modification stamp."""
+    key = os.path.abspath(file_path)
+    with _cache_lock:
+        _record_cache[key] = (_file_stamp(file_path), records)
+        _record_cache.move_to_end(key)
+
+        # Evict least recently used files until the cache fits its budget
+        total = sum(len(entry[1]) for entry in _record_cache.values())
+        while total > RECORD_CACHE_MAX_RECORDS and len(_record_cache) > 1:
+            _, (_, evicted) = _record_cache.popitem(last=False)
+            total -= len(evicted)
+
+def _read_cached(file_path):
+    """Return the records of a JSON record file, parsing it only if it changed.
+
+    The returned list is shared with the cache and must not be modified.
+    """
+    key = os.path.abspath(file_path)
+    with _cache_lock:
+        entry = _record_cache.get(key)
+        if entry is not None and entry[0] == _file_stamp(file_path):
+            _record_cache.move_to_end(key)
+            return entry[1]
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        _cache_store(file_path, records)
+        return records
+
+def clear_record_cache():
+    """Drop all cached record files."""
+    with _cache_lock:
+        _record_cache.clear()
+
+# Seconds to wait for the record service before giving up
+SERVICE_TIMEOUT = 10
+
+def get_service_url():
+    """Return the record service URL from the preferences, or None to use the file directly."""
+    return preferences.get("service_url") or None
+
+def local_record_file(file_path=None):
+    """Return the record file to read or rewrite directly, defaulting to the active record file.
+
+    With a record service configured, the service host owns the active
+    record file and the local one is not kept up to date, so only an
+    explicitly given file can be used directly.
+
+    Raises:
+        ValueError: If no file is given while a record service is configured
+    """
+    if file_path:
+        return Path(file_path)
+    if get_service_url():
+        raise ValueError("A record service is configured; run this on the service host "
+                         "or name the record file explicitly")
+    return get_file_path()
+
+def service_request(method, path, payload=None, url=None):
+    """Send a JSON request to the record service (see core/service.py).
+
+    Raises:
+        ConnectionError: If the service cannot be reached
+        ValueError: If the service rejects the request
+    """
+    url = (url or get_service_url()).rstrip("/") + path
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=SERVICE_TIMEOUT) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        if e.code == 409:
+            raise RecordConflictError(message)
+        raise ValueError(f"Record service rejected the request: {message}")
+    except urllib.error.URLError as e:
+        raise ConnectionError(f"Record service is not reachable at {url}: {e.reason}")
+
+@instrument("data.save_record")
+def save_record(sicil_no, data_cache, custom_path=None, allow_conflicts=False):
+    """Save a record to the JSON file.
+    
+    The record is dated with the shift date in data_cache["date"] (YYYY-MM-DD),
+    or today if none is given. Without custom_path the record goes to the
+    record service if one is configured; a custom_path is always written
+    directly, which is how the service host itself stores records.
+
+    Raises:
+        RecordConflictError: If the record repeats or overlaps a stored shift of
+            the badge, unless allow_conflicts is set or the "reject_conflicts"
+            preference is off
+    """
+    date = data_cache.get("date") or datetime.now().strftime("%Y-%m-%d")
     record = {
         "sicil": sicil_no,
         "tarih": date,
         "giris": data_cache["entry"].strftime("%H:%M"),
-        "cikis": data_cache["exit"].strftime("%H:%M"),
+        "cikis": format_exit_time(data_cache["entry"], data_cache["exit"]),
         "net_calisma": data_cache["net_duration"].total_seconds() / 3600
     }
+    policy = data_cache.get("policy")
+
+    # Without an explicit file, a configured record service owns the store
+    service_url = None if custom_path else get_service_url()
+    if service_url:
+        policies = {}
+        if policy is not None:
+            record["policy"] = policy_id(policy)
+            policies[record["policy"]] = policy.to_dict()
+        payload = {"records": [record], "policies": policies, "allow_conflicts": allow_conflicts}
+        response = service_request("POST", "/records", payload, service_url)
+        return response["file_path"]
 
     # Get the file path (custom or default)
     if custom_path:
@@ -21,28 +156,169 @@ def save_record(sicil_no, data_cache, custom_path=None):
     else:
         file_path = get_file_path()
 
+    # Reference the rounding and break policy the hours were calculated with
+    if policy is not None:
+        record["policy"] = get_registry(file_path).intern(policy)
+
+    if integrity.is_enabled() and not allow_conflicts:
+        integrity.check_and_add([record], file_path)
+
+    # Buffered saves are journaled now and written together with other saves
+    try:
+        if write_buffer.is_enabled():
+            write_buffer.get_write_buffer(file_path).add(record)
+        else:
+            append_records([record], file_path)
+    except Exception:
+        integrity.forget(file_path)
+        raise
+    return file_path
+
+@instrument("data.append_records")
+def append_records(records, file_path=None):
+    """Append a batch of records to a JSON record file with a single write.
+
+    Returns:
+        int: Number of records appended
+    """
+    file_path = Path(file_path) if file_path else get_file_path()
+
     # Read existing data or initialize an empty list
     if file_path.exists():
-        with open(file_path, "r", encoding="utf-8") as f:
-            records = json.load(f)
+        stamp_before = _file_stamp(file_path)
+        existing = list(_read_cached(file_path))
     else:
-        records = []
+        stamp_before = None
+        existing = []
 
-    # Append the new record and save it
-    records.append(record)
+    existing.extend(records)
     with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(records, f, indent=4, ensure_ascii=False)
-    
-    return file_path
+        json.dump(existing, f, indent=4, ensure_ascii=False)
+    _cache_store(file_path, existing)
+    integrity.note_written(file_path, stamp_before, records)
+    return len(records)
 
+@instrument("data.load_records")
 def load_records():
-    """Load all records from the JSON file."""
+    """Load all records from the JSON file, or from the record service if one is configured."""
+    service_url = get_service_url()
+    if service_url:
+        return service_request("GET", "/records", url=service_url)["records"]
     file_path = get_file_path()
+    write_buffer.flush_buffer(file_path)
     if file_path.exists():
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return list(_read_cached(file_path))
     return []
 
+# Characters read at a time when streaming a JSON record file
+JSON_READ_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Separator after an array item, with the whitespace around it
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+def iter_json_array(f, read_size=JSON_READ_SIZE):
+    """Yield the items of a JSON array from a text file, reading it in blocks.
+
+    Only the current block is held in memory, so record files of any size
+    can be streamed; each item is parsed with JSONDecoder.raw_decode.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a JSON array
+    """
+    raw_decode = json.JSONDecoder().raw_decode
+    # Up to the first item, keeping at least two characters in the block
+    buffer = f.read(read_size)
+    eof = not buffer
+    pos = 0
+    for expected in "[", None:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        while len(buffer) - pos < 2 and not eof:
+            more = f.read(read_size)
+            buffer = buffer[pos:] + more
+            eof = not more
+            pos = _WHITESPACE.match(buffer).end()
+        if expected:
+            if buffer[pos:pos + 1] != expected:
+                raise json.JSONDecodeError("Expecting '['", buffer, pos)
+            pos += 1
+    if buffer[pos:pos + 1] == "]":
+        return
+
+    while True:
+        try:
+            item, end = raw_decode(buffer, pos)
+            # The separator must be in the block too, or the item may continue in the next one
+            separator = _SEPARATOR.match(buffer, end)
+            complete = separator is not None and (separator.end() < len(buffer) or eof)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            if eof:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, end)
+            more = f.read(read_size)
+            buffer = buffer[pos:] + more
+            pos = 0
+            eof = not more
+            continue
+        yield item
+        if separator.group(1) == "]":
+            return
+        pos = separator.end()
+
+def iter_records(file_path=None):
+    """Yield records one by one from a record file, archive or binary store."""
+    file_path = Path(file_path) if file_path else get_file_path()
+    if is_archive(file_path):
+        yield from read_archive(file_path)
+    elif file_path.suffix.lower() == BINARY_SUFFIX:
+        with BinaryRecordStore(file_path) as store:
+            yield from store
+    else:
+        write_buffer.flush_buffer(file_path)
+        if file_path.exists():
+            with open(file_path, "r", encoding="utf-8") as f:
+                yield from iter_json_array(f)
+
+# Lays out a flat record the way json.dumps(indent=4) does inside the array,
+# using the C encoder, which json.dumps falls back from whenever indent is set
+_flat_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",\n        ", ": "))
+
+def _format_record(record):
+    if record and isinstance(record, dict) and not any(isinstance(v, (dict, list, tuple)) for v in record.values()):
+        return "    {\n        " + _flat_encoder.encode(record)[1:-1] + "\n    }"
+    text = json.dumps(record, indent=4, ensure_ascii=False)
+    return "    " + text.replace("\n", "\n    ")
+
+def write_records(records, file_path):
+    """Write an iterable of records to a JSON file without building a list.
+
+    The output is identical to json.dump(records, indent=4) and the target
+    file is replaced atomically once everything has been written.
+
+    Returns:
+        int: Number of records written
+    """
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    count = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(",\n" if count else "[\n")
+                f.write(_format_record(record))
+                count += 1
+            f.write("\n]" if count else "[]")
+    except BaseException:
+        # A failing record source leaves the file as it was
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, file_path)
+    return count
+
 def filter_by_badge(data, badge_number):
     """Filter records for the given badge number."""
     return [record for record in data if record['sicil'] == badge_number]
@@ -55,9 +331,11 @@ def create_new_file(file_path):
 
 def open_json_file(file_path):
     """Open a JSON file and return its data."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    write_buffer.flush_buffer(file_path)
+    data = _read_cached(file_path)
+    return list(data) if isinstance(data, list) else data
 
+@instrument("data.delete_record")
 def delete_record(sicil, tarih, giris, cikis, custom_path=None):
     """Delete a specific record from the JSON file.
     
@@ -66,24 +344,32 @@ def delete_record(sicil, tarih, giris, cikis, custom_path=None):
         tarih: Date of the record
         giris: Entry time
         cikis: Exit time
-        custom_path: Optional custom file path
+        custom_path: Optional custom file path, always changed directly even
+            with a record service configured; without it the service is used
     
     Returns:
         bool: True if deletion was successful, False otherwise
     """
     try:
+        service_url = None if custom_path else get_service_url()
+        if service_url:
+            response = service_request("POST", "/records/delete",
+                                       {"sicil": sicil, "tarih": tarih, "giris": giris, "cikis": cikis},
+                                       service_url)
+            return response["deleted"]
+        
         # Get the file path (custom or default)
         if custom_path:
             file_path = Path(custom_path)
         else:
             file_path = get_file_path()
-            
+        
+        write_buffer.flush_buffer(file_path)
         if not file_path.exists():
             return False
         
         # Read existing data
-        with open(file_path, "r", encoding="utf-8") as f:
-            records = json.load(f)
+        records = _read_cached(file_path)
         
         # Find and remove the matching record
         original_length = len(records)
@@ -99,6 +385,7 @@ def delete_record(sicil, tarih, giris, cikis, custom_path=None):
         # Save the updated records
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(records, f, indent=4, ensure_ascii=False)
+        _cache_store(file_path, records)
             
         return True
     except Exception:
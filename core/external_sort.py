@@ -0,0 +1,200 @@
+# core/external_sort.py
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from itertools import islice
+from pathlib import Path
+from core.archive import is_archive, write_archive
+from core.binary_store import BINARY_SUFFIX, BinaryRecordStore, write_binary
+from core.data import iter_records, write_records, get_file_path
+from core.policy import copy_policies
+from utils.instrumentation import instrument
+
+# Records sorted in memory at a time; a run of this size takes roughly 150 MB
+RUN_SIZE = 200000
+# Runs merged at once; more runs are merged in several passes to limit open files
+MERGE_WIDTH = 64
+
+def sort_key(record):
+    """Order records by badge, date, entry and exit time, all compared as text.
+
+    Raises:
+        ValueError: If the item is not a record
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"Not a record: {record!r}")
+    return (str(record.get("sicil", "")), str(record.get("tarih", "")),
+            str(record.get("giris", "")), str(record.get("cikis", "")))
+
+def drop_duplicates(records, counts=None, key=sort_key):
+    """Yield sorted records without the repeated copies of a shift, keeping the first one.
+
+    Copies share badge, date, entry and exit time and are adjacent once
+    sorted by a key made of these fields. The number dropped is added to
+    counts["duplicates"] if a dict is given.
+    """
+    previous = None
+    for record in records:
+        record_key = key(record)
+        if record_key == previous:
+            if counts is not None:
+                counts["duplicates"] += 1
+            continue
+        previous = record_key
+        yield record
+
+def write_sorted(records, file_path):
+    """Write records to a JSON file, archive or binary store, depending on the suffix."""
+    file_path = Path(file_path)
+    if is_archive(file_path):
+        return write_archive(records, file_path)
+    if file_path.suffix.lower() == BINARY_SUFFIX:
+        return write_binary(records, file_path)
+    return write_records(records, file_path)
+
+def _write_run(records, run_dir):
+    fd, path = tempfile.mkstemp(suffix=".jsonl", dir=run_dir)
+    with open(fd, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+    return path
+
+def _read_run(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+def sorted_runs(records, run_dir, key=sort_key, run_size=RUN_SIZE, dedupe=False, counts=None):
+    """Sort records run_size at a time, writing each sorted run to a file in run_dir.
+
+    Returns:
+        list: Paths of the runs, in the order the records were read
+    """
+    runs = []
+    while True:
+        run = list(islice(records, run_size))
+        if not run:
+            return runs
+        if counts is not None:
+            counts["read"] += len(run)
+        run.sort(key=key)
+        runs.append(_write_run(drop_duplicates(run, counts, key) if dedupe else run, run_dir))
+        del run
+
+def merge_runs(runs, run_dir, key=sort_key):
+    """Return an iterator over the records of sorted runs in key order.
+
+    Runs beyond MERGE_WIDTH are first merged in passes into fewer, longer
+    runs. Records with equal keys keep the order of the runs they come
+    from, so the first copy of a duplicate stays first.
+    """
+    while len(runs) > MERGE_WIDTH:
+        merged = []
+        for i in range(0, len(runs), MERGE_WIDTH):
+            group = runs[i:i + MERGE_WIDTH]
+            merged.append(_write_run(heapq.merge(*(_read_run(path) for path in group), key=key), run_dir))
+            for path in group:
+                os.remove(path)
+        runs = merged
+    return heapq.merge(*(_read_run(path) for path in runs), key=key)
+
+@instrument("external_sort.sort_file")
+def sort_file(file_path=None, target_path=None, dedupe=False, run_size=RUN_SIZE, temp_dir=None):
+    """Rewrite a record file ordered by badge, date and entry time with bounded memory.
+
+    The records are read run_size at a time, each run is sorted and written
+    to a temporary file, and the runs are then streamed through a k-way
+    merge into the target. Only one run is held in memory, so files larger
+    than the available RAM can be sorted. Input that fits in one run is
+    sorted in memory without temporary files.
+
+    Args:
+        file_path: Optional record file, archive or binary store, defaults to the active record file
+        target_path: Optional output; defaults to rewriting the source in place.
+            The format follows the suffix, see write_sorted()
+        dedupe: Drop repeated copies of a shift, keeping the first one in file order
+        run_size: Number of records per sorted run
+        temp_dir: Directory for the runs, defaults to the directory of the target
+
+    Returns:
+        dict: "read", "written", "duplicates" and "runs" counts
+
+    Raises:
+        ValueError: Naming the first record that is not a record or, for a
+            binary target, does not fit the binary format; the target is left as it was
+    """
+    file_path = Path(file_path) if file_path else get_file_path()
+    target_path = Path(target_path) if target_path else file_path
+    summary = {"read": 0, "written": 0, "duplicates": 0, "runs": 0}
+    records = iter_records(file_path)
+
+    first_run = list(islice(records, run_size))
+    summary["read"] = len(first_run)
+    first_run.sort(key=sort_key)
+    if len(first_run) < run_size:
+        summary["runs"] = 1 if first_run else 0
+        ordered = drop_duplicates(first_run, summary) if dedupe else first_run
+        summary["written"] = write_sorted(ordered, target_path)
+    else:
+        run_dir = tempfile.mkdtemp(prefix=".sort-", dir=temp_dir or target_path.parent)
+        try:
+            runs = [_write_run(drop_duplicates(first_run, summary) if dedupe else first_run, run_dir)]
+            del first_run
+            runs += sorted_runs(records, run_dir, run_size=run_size, dedupe=dedupe, counts=summary)
+            summary["runs"] = len(runs)
+            ordered = merge_runs(runs, run_dir)
+            summary["written"] = write_sorted(drop_duplicates(ordered, summary) if dedupe else ordered,
+                                              target_path)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    if target_path.resolve() != file_path.resolve():
+        copy_policies(file_path, target_path)
+    return summary
+
+def _lower_bound(store, key):
+    """Return the first row of a sorted binary store whose (badge, date) is not below key."""
+    low, high = 0, len(store)
+    while low < high:
+        middle = (low + high) // 2
+        record = store[middle]
+        if (record["sicil"], record["tarih"]) < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def scan_sorted(sicil, file_path=None, start=None, end=None):
+    """Yield the records of one badge, in date order, from a file written by sort_file().
+
+    Binary stores are bisected to the first matching row, so only the rows
+    of the badge are decoded. Other formats are streamed up to the end of
+    the badge's block.
+
+    Args:
+        sicil: Badge number
+        file_path: Optional sorted record file, archive or binary store
+        start: Optional first date (YYYY-MM-DD)
+        end: Optional last date (YYYY-MM-DD)
+    """
+    file_path = Path(file_path) if file_path else get_file_path()
+    sicil = str(sicil)
+    start = start or ""
+    if file_path.suffix.lower() == BINARY_SUFFIX:
+        with BinaryRecordStore(file_path) as store:
+            for index in range(_lower_bound(store, (sicil, start)), len(store)):
+                record = store[index]
+                if record["sicil"] != sicil or (end and record["tarih"] > end):
+                    return
+                yield record
+        return
+    for record in iter_records(file_path):
+        badge, tarih = sort_key(record)[:2]
+        if badge < sicil or (badge == sicil and tarih < start):
+            continue
+        if badge != sicil or (end and tarih > end):
+            return
+        yield record
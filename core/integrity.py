@@ -0,0 +1,318 @@
+# core/integrity.py
+import os
+import threading
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from core.intervals import MINUTES_PER_DAY, parse_clock, shift_span
+from gui.preferences import preferences
+
+DUPLICATE = "duplicate"
+OVERLAP = "overlap"
+
+class RecordConflictError(ValueError):
+    """A record repeats or overlaps a stored shift of the same badge."""
+
+    def __init__(self, message, record=None, conflict=None, kind=None):
+        super().__init__(message)
+        self.record = record
+        self.conflict = conflict
+        self.kind = kind
+
+@lru_cache(maxsize=4096)
+def _day_minutes(tarih):
+    return date.fromisoformat(tarih).toordinal() * MINUTES_PER_DAY
+
+# Dates and clock times repeat across records, so each is parsed once
+_clock_minutes = lru_cache(maxsize=4096)(parse_clock)
+
+def record_span(record):
+    """Return the (start, end) of a record in minutes on a common time line.
+
+    Raises:
+        ValueError: If the record has no valid date or clock times
+    """
+    try:
+        base = _day_minutes(record["tarih"])
+        start, end = shift_span(_clock_minutes(record["giris"]), _clock_minutes(record["cikis"]))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Incomplete record: {e}")
+    return base + start, base + end
+
+def record_key(record):
+    return (str(record.get("sicil")), record.get("tarih"), record.get("giris"), record.get("cikis"))
+
+def describe(record):
+    return f"{record.get('sicil')} {record.get('tarih')} {record.get('giris')}-{record.get('cikis')}"
+
+class _BadgeIntervals:
+    """Shifts of one badge sorted by start time."""
+
+    __slots__ = ("starts", "entries", "longest")
+
+    def __init__(self):
+        self.starts = []
+        self.entries = []  # (start, end, position, record), in the order of starts
+        self.longest = 0
+
+    def overlapping(self, start, end):
+        """Yield the entries that overlap [start, end)."""
+        i = bisect_right(self.starts, start)
+        # Earlier shifts reach at most `longest` minutes past their start
+        j = i - 1
+        while j >= 0 and self.starts[j] > start - self.longest:
+            if self.entries[j][1] > start:
+                yield self.entries[j]
+            j -= 1
+        while i < len(self.starts) and self.starts[i] < end:
+            yield self.entries[i]
+            i += 1
+
+    def extend(self, entries):
+        """Add many entries with one sort instead of an insertion each."""
+        self.entries.extend(entries)
+        self.entries.sort(key=itemgetter(0))
+        self.starts = [entry[0] for entry in self.entries]
+        self.longest = max([self.longest] + [entry[1] - entry[0] for entry in entries])
+
+    def add(self, start, end, position, record):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.entries.insert(i, (start, end, position, record))
+        self.longest = max(self.longest, end - start)
+
+class IntegrityIndex:
+    """Stored shifts per badge, sorted by time, for duplicate and overlap checks.
+
+    A record is checked against the shifts of its own badge only: a bisect
+    finds its place and just the neighbouring shifts are compared, so a
+    check costs O(log n) in the shifts of that badge. Adding a shift
+    inserts into sorted lists, which is O(n) in the shifts of the badge;
+    bulk loads use one sort instead (see extend()).
+    """
+
+    def __init__(self, records=()):
+        self.badges = {}
+        self.keys = {}  # (sicil, tarih, giris, cikis) -> (position, first record with them)
+        self.size = 0
+        self.load(records)
+
+    def load(self, records):
+        """Add stored records without checking them; positions count from 0."""
+        entries = {}
+        keys = self.keys
+        for position, record in enumerate(records):
+            key = record_key(record)
+            keys.setdefault(key, (position, record))
+            self.size += 1
+            try:
+                start, end = record_span(record)
+            except ValueError:
+                continue
+            badge_entries = entries.get(key[0])
+            if badge_entries is None:
+                badge_entries = entries[key[0]] = []
+            badge_entries.append((start, end, position, record))
+        for badge, badge_entries in entries.items():
+            intervals = self.badges.get(badge)
+            if intervals is None:
+                intervals = self.badges[badge] = _BadgeIntervals()
+            intervals.extend(badge_entries)
+
+    def __len__(self):
+        return self.size
+
+    def conflicts(self, record):
+        """Yield (kind, stored record, position) for every stored shift the record conflicts with.
+
+        Records without a valid date or clock times cannot be placed and
+        conflict with nothing.
+        """
+        key = record_key(record)
+        duplicate = self.keys.get(key)
+        try:
+            start, end = record_span(record)
+        except ValueError:
+            if duplicate is not None:
+                yield DUPLICATE, duplicate[1], duplicate[0]
+            return
+        intervals = self.badges.get(key[0])
+        if intervals is None:
+            return
+        if duplicate is not None:
+            yield DUPLICATE, duplicate[1], duplicate[0]
+        for _start, _end, position, stored in intervals.overlapping(start, end):
+            # Copies of the record are reported once, as the duplicate above
+            if record_key(stored) != key:
+                yield OVERLAP, stored, position
+
+    def check(self, record):
+        """Raise RecordConflictError if the record repeats or overlaps a stored shift."""
+        for kind, stored, _position in self.conflicts(record):
+            raise RecordConflictError(f"{describe(record)} {'repeats' if kind == DUPLICATE else 'overlaps'} "
+                                      f"{describe(stored)}", record, stored, kind)
+
+    def add(self, record, check=True, position=None):
+        """Add a record, checking it first unless check is False."""
+        if check:
+            self.check(record)
+        key = record_key(record)
+        self.keys.setdefault(key, (position, record))
+        self.size += 1
+        try:
+            start, end = record_span(record)
+        except ValueError:
+            return
+        intervals = self.badges.get(key[0])
+        if intervals is None:
+            intervals = self.badges[key[0]] = _BadgeIntervals()
+        intervals.add(start, end, position, record)
+
+def is_enabled():
+    """Return True if conflicting saves are rejected ("reject_conflicts" preference)."""
+    return preferences.get("reject_conflicts", True)
+
+# Index of each record file used in this process: path -> (file stamp, index)
+_indexes = {}
+_indexes_lock = threading.RLock()
+
+def _stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def get_index(file_path):
+    """Return the index of a record file, rebuilding it if the file was changed elsewhere.
+
+    Writes of this process keep the index current (see note_written()), so
+    it is only rebuilt on first use and after changes by other processes.
+    """
+    from core.data import iter_records
+    from core import write_buffer
+    key = os.path.abspath(file_path)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0] == _stamp(file_path):
+            return entry[1]
+
+    # Built without the lock: flushing the write buffer calls note_written()
+    write_buffer.flush_buffer(file_path)
+    stamp = _stamp(file_path)
+    index = IntegrityIndex(iter_records(file_path) if stamp is not None else ())
+    # Saves queued while the file was read
+    for record in write_buffer.get_pending(file_path):
+        if record_key(record) not in index.keys:
+            index.add(record, check=False)
+    with _indexes_lock:
+        _indexes[key] = (stamp, index)
+    return index
+
+def check_and_add(records, file_path):
+    """Check records against a record file and each other, and reserve them in its index.
+
+    Called before the records are written, so the index already holds them
+    when the write lands; see note_written().
+
+    Raises:
+        RecordConflictError: On the first conflicting record; none of the records are added
+    """
+    key = os.path.abspath(file_path)
+    while True:
+        index = get_index(file_path)
+        with _indexes_lock:
+            entry = _indexes.get(key)
+            if entry is None or entry[1] is not index:
+                # Replaced by a concurrent rebuild
+                continue
+            batch = IntegrityIndex()
+            for record in records:
+                index.check(record)
+                batch.add(record)
+            for record in records:
+                index.add(record, check=False)
+            return
+
+def forget(file_path):
+    """Drop the index of a file, e.g. after a reserved record could not be written."""
+    with _indexes_lock:
+        _indexes.pop(os.path.abspath(file_path), None)
+
+def note_written(file_path, stamp_before, records):
+    """Keep the index of a file current after this process appended records to it.
+
+    Records that were not reserved with check_and_add(), such as recovered
+    journal records, are added unchecked.
+    """
+    key = os.path.abspath(file_path)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is None or entry[0] != stamp_before:
+            # Changed elsewhere in between; rebuilt on the next check
+            _indexes.pop(key, None)
+            return
+        index = entry[1]
+        for record in records:
+            if record_key(record) not in index.keys:
+                index.add(record, check=False)
+        _indexes[key] = (_stamp(file_path), index)
+
+def _conflict(kind, first, second):
+    return {
+        "kind": kind,
+        "sicil": str(second[3].get("sicil")),
+        "first": first[3],
+        "first_position": first[2],
+        "second": second[3],
+        "second_position": second[2]
+    }
+
+def audit_records(records):
+    """Find every duplicate and overlapping shift in one pass over the records.
+
+    Duplicates are reported while the records are read, each copy against
+    the first one. The shifts of every badge are then sorted and swept
+    once, keeping only the shifts still running at each start.
+
+    Yields:
+        dict: kind ("duplicate" or "overlap"), sicil, and the two records as
+              "first" and "second" with their positions in the file
+    """
+    first_copies = {}
+    entries = {}
+    for position, record in enumerate(records):
+        key = record_key(record)
+        first = first_copies.setdefault(key, (None, None, position, record))
+        if first[2] != position:
+            # A copy overlaps whatever the first one does; it is reported once, here
+            yield _conflict(DUPLICATE, first, (None, None, position, record))
+            continue
+        try:
+            start, end = record_span(record)
+        except ValueError:
+            continue
+        badge_entries = entries.get(key[0])
+        if badge_entries is None:
+            badge_entries = entries[key[0]] = []
+        badge_entries.append((start, end, position, record))
+    first_copies.clear()
+
+    for badge_entries in entries.values():
+        badge_entries.sort(key=itemgetter(0, 2))
+        running = []
+        for entry in badge_entries:
+            running = [other for other in running if other[1] > entry[0]]
+            for other in running:
+                if other[2] < entry[2]:
+                    yield _conflict(OVERLAP, other, entry)
+                else:
+                    yield _conflict(OVERLAP, entry, other)
+            running.append(entry)
+
+def audit_file(file_path=None):
+    """Audit a record file, archive or binary store, see audit_records()."""
+    from core.data import iter_records
+    return audit_records(iter_records(Path(file_path) if file_path else None))
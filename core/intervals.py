@@ -0,0 +1,127 @@
+# core/intervals.py
+from datetime import datetime, timedelta
+
+MINUTES_PER_DAY = 24 * 60
+
+# Day 0 of the minute offsets; the same dummy date strptime uses for HH:MM
+BASE_DATE = datetime(1900, 1, 1)
+
+def parse_clock(value):
+    """Parse "HH:MM" or "HH:MM+N" (N days later) into minutes from midnight of day 0."""
+    days = 0
+    if "+" in value:
+        value, days = value.split("+", 1)
+        days = int(days)
+    hours, minutes = value.split(":")
+    hours = int(hours)
+    minutes = int(minutes)
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59) or days < 0:
+        raise ValueError(f"time data {value!r} does not match format '%H:%M'")
+    return days * MINUTES_PER_DAY + hours * 60 + minutes
+
+def shift_span(entry, exit):
+    """Return the (start, end) minute offsets of a shift.
+
+    An exit earlier than the entry on the same clock belongs to the next
+    day, so a 22:00-06:00 night shift lasts eight hours.
+    """
+    if exit < entry:
+        exit += MINUTES_PER_DAY * ((entry - exit) // MINUTES_PER_DAY + 1)
+    return entry, exit
+
+def round_minutes(minutes, algorithm="standard"):
+    """Round a minute offset the same way round_time rounds a datetime."""
+    hour = minutes - minutes % 60
+    minute = minutes % 60
+
+    if algorithm == "nearest_5":
+        remainder = minute % 5
+        return minutes - remainder if remainder < 2.5 else minutes + 5 - remainder
+    elif algorithm == "nearest_10":
+        remainder = minute % 10
+        return minutes - remainder if remainder < 5 else minutes + 10 - remainder
+    elif algorithm == "nearest_30":
+        if minute < 15:
+            return hour
+        elif minute < 45:
+            return hour + 30
+        return hour + 60
+    elif algorithm == "ceiling":
+        remainder = minute % 15
+        return minutes + 15 - remainder if remainder else minutes
+    elif algorithm == "floor":
+        return minutes - minute % 15
+    else:
+        # Standard rounding (15-minute intervals)
+        if minute < 8:
+            return hour
+        elif minute < 23:
+            return hour + 15
+        elif minute < 38:
+            return hour + 30
+        elif minute < 53:
+            return hour + 45
+        return hour + 60
+
+def merge_intervals(intervals):
+    """Merge overlapping (start, end) intervals into a sorted, disjoint list."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def break_overlap_minutes(start, end, schedule):
+    """Return how many minutes of a shift fall within the daily break schedule.
+
+    The schedule is repeated for every day the shift touches and swept in
+    start order, merging occurrences that run into each other, so each
+    minute is deducted at most once and partial overlaps count exactly.
+
+    Args:
+        start: Shift start in minutes
+        end: Shift end in minutes
+        schedule: Sorted, merged (start, end) minute windows of one day, as
+            returned by merge_intervals; an end past 24:00 runs into the next day
+    """
+    if end <= start or not schedule:
+        return 0
+
+    total = 0
+    run_start = run_end = None
+    # Start a day early to catch breaks that run past midnight into the shift
+    first_day = start - start % MINUTES_PER_DAY - MINUTES_PER_DAY
+    for day_start in range(first_day, end, MINUTES_PER_DAY):
+        for break_start, break_end in schedule:
+            break_start += day_start
+            break_end += day_start
+            if run_end is not None and break_start <= run_end:
+                if break_end > run_end:
+                    run_end = break_end
+                continue
+            if run_end is not None:
+                total += max(0, min(run_end, end) - max(run_start, start))
+            run_start, run_end = break_start, break_end
+    if run_end is not None:
+        total += max(0, min(run_end, end) - max(run_start, start))
+    return total
+
+def to_datetime(minutes):
+    """Convert a minute offset to a datetime on the dummy date used for HH:MM times."""
+    return BASE_DATE + timedelta(minutes=minutes)
+
+def format_exit_time(entry_dt, exit_dt):
+    """Format an exit time relative to the entry.
+
+    Plain "HH:MM" is used whenever the exit can be inferred from the clock
+    (same day, or an overnight exit earlier than the entry); longer spans
+    get a "+N" day suffix.
+    """
+    days = (exit_dt.date() - entry_dt.date()).days
+    text = exit_dt.strftime("%H:%M")
+    if days == 0 or (days == 1 and exit_dt.time() < entry_dt.time()):
+        return text
+    return f"{text}+{days}"
@@ -0,0 +1,63 @@
+# core/merge.py
+import shutil
+import tempfile
+from pathlib import Path
+from core.data import iter_records
+from core.external_sort import RUN_SIZE, drop_duplicates, merge_runs, sorted_runs, write_sorted
+from core.policy import copy_policies
+from utils.instrumentation import instrument
+
+def merge_key(record):
+    """Order records by date, badge, entry and exit time, all compared as text.
+
+    Raises:
+        ValueError: If the item is not a record
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"Not a record: {record!r}")
+    return (str(record.get("tarih", "")), str(record.get("sicil", "")),
+            str(record.get("giris", "")), str(record.get("cikis", "")))
+
+@instrument("merge.merge_files")
+def merge_files(sources, target_path, dedupe=True, run_size=RUN_SIZE, temp_dir=None):
+    """Merge several record files into one store ordered by date and badge.
+
+    Each source is streamed into sorted runs of run_size records, and all
+    runs are combined by one k-way merge into the target, so memory stays
+    bounded however large and however many the sources are. Record files
+    are mostly in date order already, which keeps sorting the runs cheap.
+    The sources are fully read before the target is written, so the target
+    may be one of them.
+
+    Args:
+        sources: Record files, archives or binary stores
+        target_path: Store to write; the format follows the suffix, see write_sorted()
+        dedupe: Drop repeated copies of a shift, keeping the one from the earliest source
+        run_size: Number of records per sorted run
+        temp_dir: Directory for the runs, defaults to the directory of the target
+
+    Returns:
+        dict: "read", "written" and "duplicates" counts
+    """
+    sources = [Path(source) for source in sources]
+    target_path = Path(target_path)
+    if not sources:
+        raise ValueError("No record files to merge")
+    summary = {"read": 0, "written": 0, "duplicates": 0}
+
+    run_dir = tempfile.mkdtemp(prefix=".merge-", dir=temp_dir or target_path.parent)
+    try:
+        runs = []
+        for source in sources:
+            runs += sorted_runs(iter_records(source), run_dir, merge_key, run_size, dedupe, summary)
+        ordered = merge_runs(runs, run_dir, merge_key)
+        summary["written"] = write_sorted(drop_duplicates(ordered, summary, merge_key) if dedupe else ordered,
+                                          target_path)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    # Policy IDs are content hashes, so the tables of all sites combine without clashes
+    for source in sources:
+        if source.resolve() != target_path.resolve():
+            copy_policies(source, target_path)
+    return summary
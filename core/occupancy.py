@@ -0,0 +1,155 @@
+# core/occupancy.py
+from datetime import date, timedelta
+from itertools import accumulate
+from core.data import iter_records, local_record_file
+from core.intervals import MINUTES_PER_DAY, parse_clock, shift_span
+from utils.instrumentation import instrument
+
+SLOT_MINUTES = 15
+
+class Occupancy:
+    """Number of people at work in each slot of consecutive days.
+
+    counts holds days * slots_per_day values, day by day; a person counts
+    towards every slot they are at work for at least part of.
+    """
+
+    def __init__(self, start, days, slot_minutes, counts):
+        self.start = start
+        self.days = days
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = MINUTES_PER_DAY // slot_minutes
+        self.counts = counts
+
+    def date(self, day):
+        return self.start + timedelta(days=day)
+
+    def row(self, day):
+        """Return the counts of one day, slot by slot."""
+        first = day * self.slots_per_day
+        return self.counts[first:first + self.slots_per_day]
+
+    def slot_label(self, slot):
+        minutes = slot * self.slot_minutes
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def peak(self):
+        """Return (count, date, slot) of the busiest slot, or None for an empty range."""
+        if not self.counts:
+            return None
+        index = max(range(len(self.counts)), key=self.counts.__getitem__)
+        day, slot = divmod(index, self.slots_per_day)
+        return self.counts[index], self.date(day), slot
+
+    def by_slot(self, func=max):
+        """Combine the days slot by slot, e.g. the highest count at each time of day."""
+        return [func(column) for column in zip(*(self.row(day) for day in range(self.days)))]
+
+# Parsed form of a missing or invalid clock time
+_INVALID = (-1, 0, 0)
+# Marks a date not looked up yet
+_UNSEEN = object()
+
+def _day_offset(tarih, start, end, slots_per_day):
+    """Return the first slot of a YYYY-MM-DD date relative to start, or None if its shifts miss the range.
+
+    Dates before the range are kept, since shifts of any length ("HH:MM+N") may reach into it.
+    """
+    try:
+        day = date.fromisoformat(tarih)
+    except (TypeError, ValueError):
+        return None
+    if day > end:
+        return None
+    return (day - start).days * slots_per_day
+
+def _parse_slots(value, slot_minutes):
+    """Return (minutes, slot it falls in, first slot boundary at or after it) for a clock time."""
+    try:
+        minutes = parse_clock(value)
+    except (AttributeError, TypeError, ValueError):
+        return _INVALID
+    return minutes, minutes // slot_minutes, -(-minutes // slot_minutes)
+
+@instrument("occupancy.compute")
+def compute_occupancy(records, start, end, slot_minutes=SLOT_MINUTES, badges=None):
+    """Count the people at work in each slot from start to end with a difference array.
+
+    Each shift adds one at its first slot and removes one after its last,
+    so a pass over the records plus a running sum gives every count; the
+    cost does not grow with the length of the shifts.
+
+    Args:
+        records: Iterable of records
+        start: First date (date or YYYY-MM-DD)
+        end: Last date (date or YYYY-MM-DD)
+        slot_minutes: Slot length; must divide a day
+        badges: Optional collection of badge numbers
+
+    Returns:
+        Occupancy: Counts per slot
+    """
+    if MINUTES_PER_DAY % slot_minutes:
+        raise ValueError(f"Slot length must divide a day: {slot_minutes}")
+    start = date.fromisoformat(start) if isinstance(start, str) else start
+    end = date.fromisoformat(end) if isinstance(end, str) else end
+    days = (end - start).days + 1
+    if days < 1:
+        raise ValueError(f"End date {end} is before start date {start}")
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    total = days * slots_per_day
+    if badges:
+        badges = {str(b) for b in badges}
+        records = (r for r in records if str(r.get("sicil")) in badges)
+
+    # There are at most a few thousand distinct dates and clock times, so each is parsed once
+    day_offsets = {}
+    clocks = {}
+    get_offset = day_offsets.get
+    get_clock = clocks.get
+    diff = [0] * (total + 1)
+
+    for record in records:
+        tarih = record.get("tarih")
+        offset = get_offset(tarih, _UNSEEN)
+        if offset is _UNSEEN:
+            offset = day_offsets[tarih] = _day_offset(tarih, start, end, slots_per_day)
+        if offset is None:
+            continue
+        giris = record.get("giris")
+        cikis = record.get("cikis")
+        entry = get_clock(giris)
+        if entry is None:
+            entry = clocks[giris] = _parse_slots(giris, slot_minutes)
+        exit = get_clock(cikis)
+        if exit is None:
+            exit = clocks[cikis] = _parse_slots(cikis, slot_minutes)
+
+        if exit[0] >= entry[0] >= 0:
+            first = offset + entry[1]
+            last = offset + exit[2]
+        elif entry[0] < 0 or exit[0] < 0:
+            continue
+        else:
+            # Night shift ending on a later day
+            entry_minutes, exit_minutes = shift_span(entry[0], exit[0])
+            first = offset + entry_minutes // slot_minutes
+            last = offset - (-exit_minutes // slot_minutes)
+
+        if first >= 0 and last <= total:
+            diff[first] += 1
+            diff[last] -= 1
+        elif first < total and last > 0:
+            # Shift reaching past either end of the range
+            diff[max(first, 0)] += 1
+            diff[min(last, total)] -= 1
+
+    return Occupancy(start, days, slot_minutes, list(accumulate(diff[:total])))
+
+def occupancy_for_range(start, end, file_path=None, slot_minutes=SLOT_MINUTES, badges=None):
+    """Compute the occupancy of a record file, archive or binary store between two dates.
+
+    Without file_path the active record file is used, which needs the file
+    itself rather than a record service, see local_record_file().
+    """
+    return compute_occupancy(iter_records(local_record_file(file_path)), start, end, slot_minutes, badges)
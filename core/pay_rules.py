@@ -0,0 +1,172 @@
+# core/pay_rules.py
+from collections import defaultdict
+from datetime import date
+from core.data import iter_records
+from core.work_calendar import WEEKDAY, WEEKEND, HOLIDAY, get_calendar
+from gui.preferences import preferences
+
+RULE_TYPES = ("daily_over", "weekly_over", "day_type")
+DAY_TYPES = {"weekday": WEEKDAY, "weekend": WEEKEND, "holiday": HOLIDAY}
+
+# Bucket of the hours no rule applies to
+REGULAR = "regular"
+
+# Differences below this many hours are ignored when splitting hours into tiers
+EPSILON = 1e-9
+
+def _tiers(rules):
+    """Return (threshold, name, multiplier) tiers sorted by threshold."""
+    return sorted((float(rule["hours"]), rule["name"], float(rule.get("multiplier", 1.0))) for rule in rules)
+
+def _split(start, end, tiers):
+    """Split the hours between two running totals over the tiers they cross.
+
+    Returns:
+        tuple: (hours below the first tier, [(name, hours), ...])
+    """
+    below = max(0.0, min(end, tiers[0][0]) - start) if tiers else end - start
+    portions = []
+    for index, (threshold, name, _multiplier) in enumerate(tiers):
+        upper = tiers[index + 1][0] if index + 1 < len(tiers) else float("inf")
+        hours = min(end, upper) - max(start, threshold)
+        if hours > EPSILON:
+            portions.append((name, hours))
+    return below, portions
+
+class PayRuleEvaluator:
+    """Pay rules compiled for repeated evaluation.
+
+    Rules are declared as dictionaries:
+
+        {"name": "overtime", "type": "daily_over", "hours": 8, "multiplier": 1.5}
+        {"name": "weekly_overtime", "type": "weekly_over", "hours": 45, "multiplier": 1.5}
+        {"name": "holiday", "type": "day_type", "day_types": ["holiday"], "multiplier": 2.0}
+
+    A day type rule takes all hours of a matching day. On other days, hours
+    above a daily threshold are overtime, and the remaining hours count
+    towards the weekly threshold (ISO weeks). Several daily or weekly rules
+    form tiers; hours past each threshold go to the highest tier reached.
+    """
+
+    def __init__(self, rules):
+        for rule in rules:
+            if rule.get("type") not in RULE_TYPES:
+                raise ValueError(f"Unknown pay rule type: {rule.get('type')!r}")
+            if not rule.get("name") or rule["name"] == REGULAR:
+                raise ValueError(f"Pay rules need a name other than {REGULAR!r}: {rule}")
+            if rule["type"] != "day_type" and "hours" not in rule:
+                raise ValueError(f"Pay rule {rule['name']!r} needs an \"hours\" threshold")
+
+        self.rules = [dict(rule) for rule in rules]
+        self.daily_tiers = _tiers(r for r in rules if r["type"] == "daily_over")
+        self.weekly_tiers = _tiers(r for r in rules if r["type"] == "weekly_over")
+
+        # Indexed by day type code; the first matching rule wins
+        self.day_type_rules = [None] * len(DAY_TYPES)
+        for rule in rules:
+            if rule["type"] != "day_type":
+                continue
+            for day_type in rule.get("day_types", ()):
+                if day_type not in DAY_TYPES:
+                    raise ValueError(f"Unknown day type in pay rule {rule['name']!r}: {day_type!r}")
+                if self.day_type_rules[DAY_TYPES[day_type]] is None:
+                    self.day_type_rules[DAY_TYPES[day_type]] = rule["name"]
+
+        self.multipliers = {REGULAR: 1.0}
+        for rule in rules:
+            self.multipliers[rule["name"]] = float(rule.get("multiplier", 1.0))
+        self.buckets = list(self.multipliers)
+
+    def evaluate_days(self, days):
+        """Split the working days of one badge into pay buckets.
+
+        Args:
+            days: (date, hours, day type) tuples sorted by date
+
+        Yields:
+            tuple: (date, day type, hours, {bucket: hours})
+        """
+        week = None
+        week_hours = 0.0
+        for day, hours, day_type in days:
+            if day.isocalendar()[:2] != week:
+                week = day.isocalendar()[:2]
+                week_hours = 0.0
+
+            rule_name = self.day_type_rules[day_type]
+            if rule_name is not None:
+                yield day, day_type, hours, {rule_name: hours}
+                continue
+
+            buckets = {}
+            regular, portions = _split(0.0, hours, self.daily_tiers)
+            buckets.update(portions)
+            if self.weekly_tiers:
+                # Only regular hours count towards the weekly threshold
+                regular, portions = _split(week_hours, week_hours + regular, self.weekly_tiers)
+                week_hours += regular
+                for name, portion in portions:
+                    buckets[name] = buckets.get(name, 0.0) + portion
+            buckets[REGULAR] = regular
+            yield day, day_type, hours, buckets
+
+    def weighted_hours(self, buckets):
+        """Return the hours of a bucket split multiplied by the rule multipliers."""
+        return sum(hours * self.multipliers[name] for name, hours in buckets.items())
+
+def compile_rules(rules=None):
+    """Compile declarative pay rules, defaulting to the "pay_rules" preference."""
+    if rules is None:
+        rules = preferences.get("pay_rules", preferences.DEFAULT_PREFERENCES["pay_rules"])
+    return PayRuleEvaluator(rules)
+
+def aggregate_daily(records):
+    """Sum the net hours of records per badge and date in a single pass.
+
+    Only one number per badge and day is kept, however many records there are.
+
+    Returns:
+        dict: badge -> {YYYY-MM-DD: hours}
+    """
+    totals = defaultdict(lambda: defaultdict(float))
+    for record in records:
+        try:
+            totals[str(record["sicil"])][record["tarih"]] += float(record["net_calisma"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return totals
+
+def evaluate_records(records=None, evaluator=None, calendar=None):
+    """Evaluate pay rules over records.
+
+    Args:
+        records: Iterable of records, defaults to streaming the active record file
+        evaluator: Compiled PayRuleEvaluator, defaults to the preferences
+        calendar: WorkCalendar deciding the day types
+
+    Yields:
+        dict: One row per badge and day, in badge and date order, with
+              "sicil", "tarih", "day_type", "hours", "buckets" and "weighted_hours"
+    """
+    if records is None:
+        records = iter_records()
+    evaluator = evaluator or compile_rules()
+    calendar = calendar or get_calendar()
+
+    for badge, daily in sorted(aggregate_daily(records).items()):
+        days = []
+        for tarih in sorted(daily):
+            try:
+                day = date.fromisoformat(tarih)
+            except ValueError:
+                continue
+            days.append((day, daily[tarih], calendar.day_type(day)))
+        for day, day_type, hours, buckets in evaluator.evaluate_days(days):
+            yield {
+                "sicil": badge,
+                "tarih": day.isoformat(),
+                "day_type": day_type,
+                "hours": hours,
+                "buckets": buckets,
+                "weighted_hours": evaluator.weighted_hours(buckets)
+            }
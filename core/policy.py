@@ -0,0 +1,87 @@
+# core/policy.py
+import hashlib
+import json
+import os
+from pathlib import Path
+from core.time_calc import CalculationPolicy, PolicyCalculator
+
+# Number of hex digits kept from the policy hash
+POLICY_ID_LENGTH = 10
+
+def policy_id(policy):
+    """Return a short, stable ID for a calculation policy.
+
+    Equal settings always give the same ID, regardless of key order.
+    """
+    canonical = json.dumps(policy.to_dict(), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:POLICY_ID_LENGTH]
+
+def policy_table_path(record_path):
+    """Return the side table path storing the policies of a record file."""
+    record_path = Path(record_path)
+    return record_path.with_name(record_path.stem + ".policies.json")
+
+class PolicyRegistry:
+    """Side table of the calculation policies referenced by a record file."""
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self.policies = {}
+        self._calculators = {}
+        self.load()
+
+    def load(self):
+        """Read the table again, picking up policies added by other terminals."""
+        if self.file_path.exists():
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                self.policies.update(json.load(f))
+
+    def save(self):
+        tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.policies, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.file_path)
+
+    def intern(self, policy):
+        """Register a policy and return its ID; the table is only written for new policies."""
+        pid = policy_id(policy)
+        if pid not in self.policies:
+            self.load()
+            self.policies[pid] = policy.to_dict()
+            self.save()
+        return pid
+
+    def get(self, pid):
+        """Return the policy with the given ID, or None if it is unknown."""
+        if pid not in self.policies:
+            self.load()
+        data = self.policies.get(pid)
+        return CalculationPolicy.from_dict(data) if data is not None else None
+
+    def calculator(self, pid):
+        """Return a shared calculator for a policy ID, or None if it is unknown."""
+        calculator = self._calculators.get(pid)
+        if calculator is None:
+            policy = self.get(pid)
+            if policy is None:
+                return None
+            calculator = self._calculators[pid] = PolicyCalculator(policy)
+        return calculator
+
+# Registries of the record files used in this process
+_registries = {}
+
+def get_registry(record_path):
+    """Return the (cached) policy registry belonging to a record file."""
+    table_path = policy_table_path(record_path)
+    key = os.path.abspath(table_path)
+    registry = _registries.get(key)
+    if registry is None:
+        registry = _registries[key] = PolicyRegistry(table_path)
+    return registry
+
+def copy_policies(source_path, target_path):
+    """Register the policies of one record file with another, e.g. after writing a derived copy."""
+    target = get_registry(target_path)
+    for data in list(get_registry(source_path).policies.values()):
+        target.intern(CalculationPolicy.from_dict(data))
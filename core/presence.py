@@ -0,0 +1,91 @@
+# core/presence.py
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from core.shifts import default_journal_path
+from gui.preferences import preferences
+
+# Department of badges that are not listed in the "departments" preference
+UNASSIGNED = ""
+
+def department_map(departments=None):
+    """Invert the "departments" preference ({department: [badges]}) to {badge: department}."""
+    if departments is None:
+        departments = preferences.get("departments") or {}
+    return {str(badge): name for name, badges in departments.items() for badge in badges}
+
+class PresenceIndex:
+    """Who is on site, maintained from the open shift journal.
+
+    Only the lines appended since the last poll are read, so keeping the
+    index current costs time proportional to the punches in between, not to
+    the number of records or people on site. The index is rebuilt when the
+    journal is compacted.
+    """
+
+    def __init__(self, journal_path=None, departments=None):
+        self.journal_path = Path(journal_path) if journal_path else default_journal_path()
+        self.departments = department_map(departments)
+        self.on_site = {}  # badge -> clock-in time
+        self.last_punch = {}  # badge -> (event, time)
+        self.counts = Counter()  # department -> people on site
+        self._offset = 0
+        self._inode = None
+
+    def department(self, badge):
+        return self.departments.get(badge, UNASSIGNED)
+
+    def _apply(self, event, badge, at, changed):
+        self.last_punch[badge] = (event, at)
+        if event == "in":
+            if badge not in self.on_site:
+                self.counts[self.department(badge)] += 1
+            self.on_site[badge] = at
+        elif self.on_site.pop(badge, None) is not None:
+            self.counts[self.department(badge)] -= 1
+        changed.add(badge)
+
+    def poll(self):
+        """Read the punches appended to the journal since the last poll.
+
+        Returns:
+            set: Badges whose presence changed, or None if the index was rebuilt
+                 and every row has to be redrawn
+        """
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return set()
+
+        rebuilt = stat.st_ino != self._inode or stat.st_size < self._offset
+        if rebuilt:
+            self.on_site.clear()
+            self.counts.clear()
+            self._offset = 0
+            self._inode = stat.st_ino
+        elif stat.st_size == self._offset:
+            return set()
+
+        changed = set()
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being written is picked up by the next poll
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        for line in data[:end].splitlines():
+            try:
+                event = json.loads(line)
+                # Saved and held shift markers do not change who is on site
+                if event["event"] not in ("in", "out"):
+                    continue
+                self._apply(event["event"], event["sicil"], datetime.fromisoformat(event["at"]), changed)
+            except (ValueError, KeyError):
+                continue
+        return None if rebuilt else changed
+
+    def department_counts(self):
+        """Return {department: people on site} for the departments with anyone on site."""
+        return {name: count for name, count in self.counts.items() if count > 0}
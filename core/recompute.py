@@ -0,0 +1,191 @@
+# core/recompute.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from core import write_buffer
+from core.archive import is_archive
+from core.binary_store import BINARY_SUFFIX
+from core.data import iter_records, write_records, local_record_file
+from core.policy import get_registry
+from core.time_calc import CalculationPolicy, PolicyCalculator
+from core.work_calendar import WorkCalendar, get_calendar
+
+# Differences below this many hours are treated as unchanged
+TOLERANCE = 1e-6
+
+def is_weekday_date(tarih, calendar=None):
+    """Return True if weekday rules apply to a YYYY-MM-DD date in the work calendar."""
+    return (calendar or get_calendar()).is_weekday(tarih)
+
+def recompute_net(record, calculator, calendar=None):
+    """Re-derive the net working hours of a record with a PolicyCalculator.
+
+    Returns:
+        float: Net hours, stored the same way save_record stores them
+    """
+    return calculator.net_hours(record["giris"], record["cikis"], is_weekday_date(record["tarih"], calendar))
+
+def matches(record, start=None, end=None, badges=None):
+    """Check whether a record falls in the selected date range and badge set."""
+    tarih = record.get("tarih", "")
+    if start and tarih < start:
+        return False
+    if end and tarih > end:
+        return False
+    if badges and str(record.get("sicil")) not in badges:
+        return False
+    return True
+
+def recompute_chunk(records, policy_data, start=None, end=None, badges=None, stored_policies=None,
+                    calendar_data=None):
+    """Recompute a chunk of records.
+
+    Runs in worker processes, so policies are passed as plain dictionaries.
+    Records are grouped by policy and each group shares one calculator.
+
+    Args:
+        records: Records to recompute
+        policy_data: Policy applied to every record, as a dictionary
+        start, end, badges: Record selection, see matches()
+        stored_policies: Optional {policy ID: policy dictionary}; when given,
+            each record is recomputed under the policy it references instead
+        calendar_data: Work calendar deciding the day type, as a dictionary;
+            defaults to the calendar of the current preferences
+
+    Returns:
+        list: New net hours for each record, or None if it is not selected or invalid
+    """
+    default = PolicyCalculator(CalculationPolicy.from_dict(policy_data))
+    calendar = WorkCalendar.from_dict(calendar_data) if calendar_data is not None else get_calendar()
+    calculators = {}
+    results = []
+    for record in records:
+        if not matches(record, start, end, badges):
+            results.append(None)
+            continue
+        calculator = default
+        if stored_policies is not None:
+            pid = record.get("policy")
+            if pid not in stored_policies:
+                results.append(None)
+                continue
+            calculator = calculators.get(pid)
+            if calculator is None:
+                calculator = calculators[pid] = PolicyCalculator(CalculationPolicy.from_dict(stored_policies[pid]))
+        try:
+            results.append(recompute_net(record, calculator, calendar))
+        except (KeyError, TypeError, ValueError):
+            results.append(None)
+    return results
+
+def chunked(records, chunk_size):
+    """Group a record stream into lists of chunk_size records."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def map_chunks(func, chunks, workers, *args):
+    """Yield (chunk, func(chunk, *args)) pairs in file order, computing ahead in parallel.
+
+    func runs in worker processes, so it must be a module-level function
+    taking and returning plain data.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, func(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only a few chunks are in flight at once to keep memory bounded
+        pending = []
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(func, chunk, *args)))
+            if len(pending) >= workers * 2:
+                chunk, future = pending.pop(0)
+                yield chunk, future.result()
+        for chunk, future in pending:
+            yield chunk, future.result()
+
+def recompute_records(file_path=None, policy=None, start=None, end=None, badges=None,
+                      dry_run=False, workers=None, chunk_size=5000, use_stored_policy=False,
+                      calendar=None):
+    """Re-derive net_calisma for stored records under a policy.
+
+    Records are streamed from the store in chunks, recomputed in parallel and
+    written back in a single pass unless dry_run is set.
+
+    Args:
+        file_path: Optional record file, defaults to the active record file;
+            required with a record service configured, see local_record_file()
+        policy: CalculationPolicy to apply, defaults to the current preferences
+        start: Optional first date (YYYY-MM-DD) to recompute
+        end: Optional last date (YYYY-MM-DD) to recompute
+        badges: Optional collection of badge numbers to recompute
+        dry_run: Only report the differences, leave the file untouched
+        workers: Number of worker processes, defaults to the CPU count
+        chunk_size: Number of records per chunk
+        use_stored_policy: Recompute every record under the policy it was saved
+            with (records without a known policy are skipped), e.g. for audits
+        calendar: WorkCalendar deciding weekday or weekend rules, defaults to
+            the calendar of the current preferences
+
+    Returns:
+        dict: "checked" and "skipped" counts and the list of "changes"
+              as (record, old_net, new_net) tuples
+    """
+    file_path = local_record_file(file_path)
+    policy = policy or CalculationPolicy.from_preferences()
+    badges = {str(b) for b in badges} if badges else None
+    workers = workers or os.cpu_count() or 1
+    calendar = calendar or get_calendar()
+    summary = {"checked": 0, "skipped": 0, "changes": []}
+    modified = {"count": 0}
+
+    registry = get_registry(file_path)
+    stored_policies = dict(registry.policies) if use_stored_policy else None
+    new_pid = None
+    if not use_stored_policy and not dry_run:
+        new_pid = registry.intern(policy)
+
+    def updated_records():
+        chunks = chunked(iter_records(file_path), chunk_size)
+        args = (policy.to_dict(), start, end, badges, stored_policies, calendar.to_dict())
+        for chunk, results in map_chunks(recompute_chunk, chunks, workers, *args):
+            for record, new_net in zip(chunk, results):
+                if new_net is None:
+                    if matches(record, start, end, badges):
+                        summary["skipped"] += 1
+                    yield record
+                    continue
+                summary["checked"] += 1
+                old_net = record.get("net_calisma")
+                if not isinstance(old_net, (int, float)) or abs(old_net - new_net) > TOLERANCE:
+                    summary["changes"].append((record, old_net, new_net))
+                    record = dict(record, net_calisma=new_net)
+                # Recomputed records now reference the policy that was applied
+                if new_pid and record.get("policy") != new_pid:
+                    record = dict(record, policy=new_pid)
+                    modified["count"] += 1
+                yield record
+
+    if dry_run:
+        for _ in updated_records():
+            pass
+    else:
+        if is_archive(file_path) or file_path.suffix.lower() == BINARY_SUFFIX:
+            raise ValueError(f"Only JSON record files can be updated in place: {file_path.name}")
+        # Written next to the store first so the file is only replaced if something changed;
+        # buffered saves of this process wait meanwhile and are appended to the new file
+        tmp_path = file_path.with_name(file_path.name + ".recompute")
+        with write_buffer.writes_paused(file_path):
+            write_records(updated_records(), tmp_path)
+            if modified["count"] or summary["changes"]:
+                os.replace(tmp_path, file_path)
+            else:
+                os.remove(tmp_path)
+
+    return summary
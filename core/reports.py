@@ -0,0 +1,189 @@
+# core/reports.py
+import csv
+import html
+import os
+from collections import Counter
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from core.data import iter_records, local_record_file
+from core.pay_rules import compile_rules, evaluate_records
+from core.recompute import matches
+from core.work_calendar import WEEKDAY, WEEKEND, HOLIDAY, get_calendar
+from utils.instrumentation import instrument
+
+REPORT_KINDS = ("summary", "detail")
+PERIODS = ("day", "week", "month", "year")
+REPORT_FORMATS = {".csv": "csv", ".html": "html", ".htm": "html"}
+
+DAY_TYPE_NAMES = {WEEKDAY: "weekday", WEEKEND: "weekend", HOLIDAY: "holiday"}
+
+DETAIL_COLUMNS = ["sicil", "tarih", "giris", "cikis", "net_calisma", "day_type"]
+
+# A report touches few distinct dates, so keys are computed once per date and period
+@lru_cache(maxsize=8192)
+def period_key(tarih, period="month"):
+    """Return the period a YYYY-MM-DD date belongs to, e.g. "2025-03" for a month."""
+    if period == "day":
+        return date.fromisoformat(tarih).isoformat()
+    if period == "week":
+        year, week, _weekday = date.fromisoformat(tarih).isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return date.fromisoformat(tarih).isoformat()[:7]
+    if period == "year":
+        return date.fromisoformat(tarih).isoformat()[:4]
+    raise ValueError(f"Unknown report period: {period}")
+
+def detail_rows(records, calendar=None):
+    """Yield the records as report rows, with the day type of their date."""
+    calendar = calendar or get_calendar()
+    for record in records:
+        try:
+            day_type = DAY_TYPE_NAMES[calendar.day_type(record["tarih"])]
+        except (KeyError, TypeError, ValueError):
+            day_type = ""
+        row = {column: record.get(column, "") for column in DETAIL_COLUMNS}
+        row["day_type"] = day_type
+        yield row
+
+def summary_columns(evaluator):
+    """Return the summary columns, with one hours column per pay bucket."""
+    return ["sicil", "period", "records", "days", "hours"] + evaluator.buckets + ["weighted_hours"]
+
+def summary_rows(records, period="month", evaluator=None, calendar=None):
+    """Yield per-badge, per-period totals with the pay rule breakdown.
+
+    Records are streamed once; only the totals per badge and day are kept
+    in memory, and the periods of one badge are emitted as soon as they end.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown report period: {period}")
+    evaluator = evaluator or compile_rules()
+    record_counts = Counter()
+
+    def counted(records):
+        for record in records:
+            try:
+                record_counts[(str(record["sicil"]), period_key(record["tarih"], period))] += 1
+            except (KeyError, TypeError, ValueError):
+                continue
+            yield record
+
+    row = None
+    for day in evaluate_records(counted(records), evaluator, calendar):
+        key = (day["sicil"], period_key(day["tarih"], period))
+        if row is None or (row["sicil"], row["period"]) != key:
+            if row is not None:
+                yield _finish_summary(row, record_counts)
+            row = {"sicil": key[0], "period": key[1], "records": 0, "days": 0, "hours": 0.0,
+                   "weighted_hours": 0.0}
+            row.update((bucket, 0.0) for bucket in evaluator.buckets)
+        row["days"] += 1
+        row["hours"] += day["hours"]
+        row["weighted_hours"] += day["weighted_hours"]
+        for bucket, hours in day["buckets"].items():
+            row[bucket] += hours
+    if row is not None:
+        yield _finish_summary(row, record_counts)
+
+def _finish_summary(row, record_counts):
+    row["records"] = record_counts.pop((row["sicil"], row["period"]), 0)
+    for column, value in row.items():
+        if isinstance(value, float):
+            row[column] = round(value, 2)
+    return row
+
+def write_csv(rows, columns, file_path):
+    """Write report rows to a CSV file as they are produced.
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_html(rows, columns, file_path, title="Report"):
+    """Write report rows to a standalone HTML table as they are produced.
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n")
+        f.write(f"<title>{html.escape(title)}</title>\n")
+        f.write("<style>table{border-collapse:collapse;font-family:sans-serif;font-size:13px}"
+                "th,td{border:1px solid #ccc;padding:3px 8px}td.num{text-align:right}"
+                "th{background:#eee}</style>\n</head>\n<body>\n")
+        f.write(f"<h1>{html.escape(title)}</h1>\n<table>\n<tr>")
+        f.write("".join(f"<th>{html.escape(column)}</th>" for column in columns))
+        f.write("</tr>\n")
+        for row in rows:
+            cells = []
+            for column in columns:
+                value = row.get(column, "")
+                css = " class=\"num\"" if isinstance(value, (int, float)) else ""
+                cells.append(f"<td{css}>{html.escape(str(value))}</td>")
+            f.write("<tr>" + "".join(cells) + "</tr>\n")
+            count += 1
+        f.write("</table>\n</body>\n</html>\n")
+    return count
+
+@instrument("reports.generate")
+def generate_report(target_path, kind="summary", period="month", file_path=None,
+                    start=None, end=None, badges=None, report_format=None):
+    """Stream the records of a store into a CSV or HTML report.
+
+    Args:
+        target_path: Report file to write; the format follows the suffix
+        kind: "summary" for per-badge, per-period totals or "detail" for a record listing
+        period: Summary period, one of "day", "week", "month" and "year"
+        file_path: Optional record file, archive or binary store, defaults to the active record file;
+            required with a record service configured, see local_record_file()
+        start: Optional first date (YYYY-MM-DD)
+        end: Optional last date (YYYY-MM-DD)
+        badges: Optional collection of badge numbers
+        report_format: "csv" or "html", overrides the suffix
+
+    Returns:
+        int: Number of report rows written
+    """
+    target_path = Path(target_path)
+    report_format = report_format or REPORT_FORMATS.get(target_path.suffix.lower())
+    if report_format not in ("csv", "html"):
+        raise ValueError(f"Unsupported report format: {target_path.name}")
+    if kind not in REPORT_KINDS:
+        raise ValueError(f"Unknown report kind: {kind}")
+
+    badges = {str(b) for b in badges} if badges else None
+    records = (r for r in iter_records(local_record_file(file_path)) if matches(r, start, end, badges))
+
+    if kind == "summary":
+        evaluator = compile_rules()
+        rows = summary_rows(records, period, evaluator)
+        columns = summary_columns(evaluator)
+    else:
+        rows = detail_rows(records)
+        columns = DETAIL_COLUMNS
+
+    # Written next to the target first so a failed report never leaves a partial file
+    tmp_path = target_path.with_name(target_path.name + ".tmp")
+    try:
+        if report_format == "csv":
+            count = write_csv(rows, columns, tmp_path)
+        else:
+            title = f"{kind.capitalize()} report" + (f" ({period})" if kind == "summary" else "")
+            count = write_html(rows, columns, tmp_path, title)
+    except BaseException:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, target_path)
+    return count
@@ -0,0 +1,200 @@
+# core/retention.py
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+from core import write_buffer
+from core.archive import open_archive
+from core.data import iter_records, write_records, get_file_path, local_record_file
+from gui.preferences import preferences
+from utils.instrumentation import instrument
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+# How often the live file is read again when it changes during a purge
+ATTEMPTS = 3
+
+def retention_settings():
+    """Return the "retention" preferences completed with the defaults."""
+    settings = dict(preferences.DEFAULT_PREFERENCES["retention"])
+    settings.update(preferences.get("retention") or {})
+    return settings
+
+def cutoff_date(keep_years, today=None):
+    """Return the first date that stays live: January 1st, keep_years before the current year."""
+    today = today or date.today()
+    return date(today.year - keep_years, 1, 1).isoformat()
+
+def archive_dir_for(file_path, archive_dir=None):
+    """Return the directory holding the archived years of a record file."""
+    file_path = Path(file_path)
+    return Path(archive_dir) if archive_dir else file_path.with_name(file_path.stem + "_archive")
+
+def segment_path(file_path, year, archive_dir=None):
+    """Return the archive segment holding one year of a record file."""
+    return archive_dir_for(file_path, archive_dir) / f"{Path(file_path).stem}-{year}{SEGMENT_SUFFIX}"
+
+def archived_years(file_path=None, archive_dir=None):
+    """Return {year: segment path} for every archived year of a record file."""
+    file_path = Path(file_path) if file_path else get_file_path()
+    directory = archive_dir_for(file_path, archive_dir)
+    prefix = file_path.stem + "-"
+    years = {}
+    if directory.is_dir():
+        for path in directory.glob(f"{prefix}*{SEGMENT_SUFFIX}"):
+            year = path.name[len(prefix):-len(SEGMENT_SUFFIX)]
+            if year.isdigit():
+                years[int(year)] = path
+    return dict(sorted(years.items()))
+
+def _expired_year(record, cutoff):
+    """Return the year of a record dated before the cutoff, or None if it stays live.
+
+    Records without a YYYY-MM-DD date always stay live.
+    """
+    tarih = record.get("tarih") if isinstance(record, dict) else None
+    if isinstance(tarih, str) and tarih < cutoff and tarih[:4].isdigit() and tarih[4:5] == "-":
+        return int(tarih[:4])
+    return None
+
+def _stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+@instrument("retention.apply_retention")
+def apply_retention(file_path=None, keep_years=2, archive=True, archive_dir=None, today=None, dry_run=False):
+    """Move the records dated before the retention cutoff out of the live record file.
+
+    The file is read once, sending live records to a new copy of the file
+    and expired ones to one compressed segment per year (see segment_path()),
+    which existing segments receive as an extra gzip member. Buffered saves
+    of this process wait in the write buffer during the pass; the live file
+    is only replaced if nothing else wrote to it meanwhile, otherwise the
+    pass is repeated. A file without expired records is read but never
+    rewritten.
+
+    Args:
+        file_path: Optional record file, defaults to the active record file;
+            required with a record service configured, see local_record_file()
+        keep_years: Records from the current year and this many years before stay live
+        archive: Archive the expired records; when False they are deleted
+        archive_dir: Directory of the segments, see archive_dir_for()
+        today: Date the cutoff is computed from, defaults to today
+        dry_run: Only count the records that would be moved
+
+    Returns:
+        dict: "cutoff", "kept" and "expired" counts and {year: count} as "years"
+
+    Raises:
+        RuntimeError: If the record file changed during every attempt
+    """
+    file_path = local_record_file(file_path)
+    cutoff = cutoff_date(keep_years, today)
+    summary = {"cutoff": cutoff, "kept": 0, "expired": 0, "years": {}}
+    if not file_path.exists():
+        return summary
+
+    if dry_run:
+        for record in iter_records(file_path):
+            year = _expired_year(record, cutoff)
+            if year is None:
+                summary["kept"] += 1
+            else:
+                summary["expired"] += 1
+                summary["years"][year] = summary["years"].get(year, 0) + 1
+        return summary
+
+    # Expired records usually come first, so this stops early when there is work
+    for record in iter_records(file_path):
+        if _expired_year(record, cutoff) is not None:
+            break
+        summary["kept"] += 1
+    else:
+        return summary
+
+    for _attempt in range(ATTEMPTS):
+        summary.update(kept=0, expired=0, years={})
+        work_dir = tempfile.mkdtemp(prefix=".retention-", dir=file_path.parent)
+        segments = {}  # year -> (temporary segment path, open file)
+
+        def live_records():
+            for record in iter_records(file_path):
+                year = _expired_year(record, cutoff)
+                if year is None:
+                    summary["kept"] += 1
+                    yield record
+                    continue
+                summary["expired"] += 1
+                summary["years"][year] = summary["years"].get(year, 0) + 1
+                if archive:
+                    segment = segments.get(year)
+                    if segment is None:
+                        path = os.path.join(work_dir, f"{year}{SEGMENT_SUFFIX}")
+                        segment = segments[year] = (path, open_archive(path, "wt"))
+                    segment[1].write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                    segment[1].write("\n")
+
+        try:
+            # Saves of this process are queued meanwhile and written to the new file afterwards
+            with write_buffer.writes_paused(file_path):
+                stamp = _stamp(file_path)
+                live_path = os.path.join(work_dir, file_path.name)
+                try:
+                    write_records(live_records(), live_path)
+                finally:
+                    for _path, f in segments.values():
+                        f.close()
+
+                # Written by another process or an unbuffered save
+                if _stamp(file_path) != stamp:
+                    continue
+                # Gzip members can be concatenated, so segments grow by a plain byte copy;
+                # they are written before the live file is replaced, so a crash duplicates
+                # records in the archive rather than losing them
+                if segments:
+                    archive_dir_for(file_path, archive_dir).mkdir(parents=True, exist_ok=True)
+                for year, (path, _f) in segments.items():
+                    with open(path, "rb") as source, open(segment_path(file_path, year, archive_dir), "ab") as target:
+                        shutil.copyfileobj(source, target)
+                os.replace(live_path, file_path)
+            return summary
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    raise RuntimeError(f"{file_path} kept changing; retention was not applied")
+
+def iter_history(file_path=None, start=None, end=None, archive_dir=None):
+    """Yield the records of a record file and its archived years, optionally between two dates.
+
+    Only the segments of the years in the range are read.
+
+    Args:
+        file_path: Optional record file, defaults to the active record file
+        start: Optional first date (YYYY-MM-DD)
+        end: Optional last date (YYYY-MM-DD)
+        archive_dir: Directory of the segments, see archive_dir_for()
+    """
+    file_path = Path(file_path) if file_path else get_file_path()
+    first_year = int(start[:4]) if start else None
+    last_year = int(end[:4]) if end else None
+    sources = [path for year, path in archived_years(file_path, archive_dir).items()
+               if (first_year is None or year >= first_year) and (last_year is None or year <= last_year)]
+    sources.append(file_path)
+    for source in sources:
+        for record in iter_records(source):
+            tarih = record.get("tarih", "") if isinstance(record, dict) else ""
+            if (start and tarih < start) or (end and tarih > end):
+                continue
+            yield record
+
+def is_enabled():
+    """Return True if retention runs in the background ("retention" preference).
+
+    With a record service configured, the service host owns the record file
+    and applies retention with `python cli.py retention` instead.
+    """
+    return bool(retention_settings().get("enabled")) and not preferences.get("service_url")
@@ -0,0 +1,260 @@
+# core/service.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+from core import integrity
+from core.data import append_records, delete_record, open_json_file
+from core.integrity import RecordConflictError
+from core.policy import get_registry
+from core.recompute import matches
+from core.time_calc import CalculationPolicy
+from core.validation import REQUIRED_FIELDS, SHIFT_KEY_FIELDS
+from utils.file_utils import get_file_path
+from utils.instrumentation import increment, timer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+class _Submission:
+    __slots__ = ("records", "policies", "allow_conflicts", "done", "error")
+
+    def __init__(self, records, policies, allow_conflicts):
+        self.records = records
+        self.policies = policies
+        self.allow_conflicts = allow_conflicts
+        self.done = threading.Event()
+        self.error = None
+
+class RecordService:
+    """Owns a record file and commits submitted records in groups.
+
+    Submissions arriving within the commit window of each other are written
+    with a single read/write cycle of the store (group commit). Every caller
+    still waits until its own records are on disk.
+    """
+
+    def __init__(self, file_path=None, commit_window_ms=20, max_batch=1000):
+        self.file_path = Path(file_path) if file_path else get_file_path()
+        self.commit_window = commit_window_ms / 1000
+        self.max_batch = max_batch
+        self._pending = []
+        self._pending_count = 0
+        self._condition = threading.Condition()
+        # Serialises commits, deletions and queries on the store
+        self._store_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._commit_loop, name="record-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, records, policies=None, allow_conflicts=False):
+        """Queue records for the next commit and wait until they are written.
+
+        Args:
+            records: Records to append
+            policies: Optional {policy ID: policy dictionary} referenced by the records
+            allow_conflicts: Store records that repeat or overlap stored shifts
+
+        Returns:
+            int: Number of records written
+
+        Raises:
+            RecordConflictError: If a record conflicts with a stored shift; none are written
+        """
+        submission = _Submission(list(records), policies or {}, allow_conflicts)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Record service is closed")
+            self._pending.append(submission)
+            self._pending_count += len(submission.records)
+            self._condition.notify_all()
+        submission.done.wait()
+        if submission.error is not None:
+            raise submission.error
+        return len(submission.records)
+
+    def _commit_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Give concurrent submissions a short window to join this commit
+                deadline = time.monotonic() + self.commit_window
+                while self._pending_count < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending
+                self._pending = []
+                self._pending_count = 0
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            with self._store_lock, timer("service.commit"):
+                registry = get_registry(self.file_path)
+                for submission in batch:
+                    for pid, data in submission.policies.items():
+                        if pid not in registry.policies:
+                            registry.intern(CalculationPolicy.from_dict(data))
+                # A conflicting submission is rejected without holding up the rest of the group
+                records = []
+                check = integrity.is_enabled()
+                for submission in batch:
+                    if check and not submission.allow_conflicts:
+                        try:
+                            integrity.check_and_add(submission.records, self.file_path)
+                        except RecordConflictError as e:
+                            submission.error = e
+                            continue
+                    records.extend(submission.records)
+                append_records(records, self.file_path)
+            increment("service.records", len(records))
+        except Exception as e:
+            integrity.forget(self.file_path)
+            for submission in batch:
+                submission.error = submission.error or e
+        finally:
+            for submission in batch:
+                submission.done.set()
+
+    def query(self, badge=None, start=None, end=None):
+        """Return the stored records of a badge and date range."""
+        badges = {str(badge)} if badge else None
+        with self._store_lock:
+            if not self.file_path.exists():
+                return []
+            return [r for r in open_json_file(self.file_path) if matches(r, start, end, badges)]
+
+    def delete(self, sicil, tarih, giris, cikis):
+        """Delete a stored record, see core.data.delete_record."""
+        with self._store_lock:
+            return delete_record(sicil, tarih, giris, cikis, custom_path=self.file_path)
+
+    def close(self):
+        """Commit the queued records and stop the commit thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+class RecordRequestHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP front end of a RecordService.
+
+    GET  /health                              -> {"status": "ok"}
+    GET  /records?sicil=&from=&to=            -> {"records": [...]}
+    POST /records {"records", "policies"}     -> {"saved": n, "file_path": ...}
+    POST /records/delete {"sicil", "tarih", "giris", "cikis"} -> {"deleted": bool}
+    """
+
+    server_version = "WorkHoursRecordService/1.0"
+    # Keep connections open so busy terminals do not reconnect for every save
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif url.path == "/records":
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            records = self.server.service.query(params.get("sicil"), params.get("from"), params.get("to"))
+            self._send_json(200, {"records": records})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        if path == "/records":
+            records = payload.get("records") if isinstance(payload, dict) else None
+            if not isinstance(records, list):
+                self._send_json(400, {"error": "Expected {\"records\": [...]}"})
+                return
+            for record in records:
+                if not isinstance(record, dict) or any(field not in record for field in REQUIRED_FIELDS):
+                    self._send_json(400, {"error": f"Records need the fields {', '.join(REQUIRED_FIELDS)}"})
+                    return
+            try:
+                saved = self.server.service.submit(records, payload.get("policies"),
+                                                   bool(payload.get("allow_conflicts")))
+            except RecordConflictError as e:
+                self._send_json(409, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"saved": saved, "file_path": str(self.server.service.file_path)})
+        elif path == "/records/delete":
+            if not isinstance(payload, dict) or any(field not in payload for field in SHIFT_KEY_FIELDS):
+                self._send_json(400, {"error": f"Expected the fields {', '.join(SHIFT_KEY_FIELDS)}"})
+                return
+            deleted = self.server.service.delete(payload["sicil"], payload["tarih"],
+                                                 payload["giris"], payload["cikis"])
+            self._send_json(200, {"deleted": deleted})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {path}"})
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b"{}"
+        return json.loads(body.decode("utf-8"))
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class RecordServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Shift changes bring many terminals at once; the default backlog of 5 drops connections
+    request_queue_size = 128
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, RecordRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
+
+def start_server(file_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, commit_window_ms=20,
+                 max_batch=1000, verbose=False):
+    """Start a record service in a background thread, e.g. for tests.
+
+    Pass port 0 to pick a free port; the address is in server.server_address.
+    Stop it with server.shutdown() followed by server.server_close().
+    """
+    service = RecordService(file_path, commit_window_ms, max_batch)
+    server = RecordServer((host, port), service, verbose)
+    threading.Thread(target=server.serve_forever, name="record-service", daemon=True).start()
+    return server
+
+def serve(file_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, commit_window_ms=20,
+          max_batch=1000, verbose=False):
+    """Run a record service until interrupted."""
+    service = RecordService(file_path, commit_window_ms, max_batch)
+    server = RecordServer((host, port), service, verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
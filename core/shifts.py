@@ -0,0 +1,245 @@
+# core/shifts.py
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from core.data import save_record
+from core.time_calc import calculate_work_hours
+from core.work_calendar import get_calendar
+from gui.preferences import preferences
+
+def exit_clock(entry_at, exit_at):
+    """Format an exit datetime as "HH:MM", or "HH:MM+N" when it is N days after the entry."""
+    days = (exit_at.date() - entry_at.date()).days
+    text = exit_at.strftime("%H:%M")
+    return f"{text}+{days}" if days else text
+
+def record_completed_shift(badge, entry_at, exit_at, custom_path=None, allow_conflicts=False):
+    """Calculate and save the record of a finished shift.
+
+    Args:
+        badge: Badge number
+        entry_at: Clock-in datetime
+        exit_at: Clock-out datetime
+        custom_path: Optional record file, defaults to the active record file
+        allow_conflicts: Save the shift even if it repeats or overlaps a stored one
+
+    Returns:
+        float: Net working hours
+    """
+    data_cache = {}
+    is_weekday = get_calendar().is_weekday(entry_at.date())
+    net_hours = calculate_work_hours(entry_at.strftime("%H:%M"), exit_clock(entry_at, exit_at),
+                                     is_weekday, data_cache)
+    data_cache["date"] = entry_at.date().isoformat()
+    save_record(badge, data_cache, custom_path, allow_conflicts=allow_conflicts)
+    return net_hours
+
+class OpenShiftTable:
+    """Badges that are clocked in, with their clock-in times.
+
+    Every punch is appended to a journal, so the table survives restarts;
+    the journal is compacted to the open shifts when it is loaded.
+    Listeners are called with (event, badge, at, entry_at) after each punch,
+    where event is "in" or "out" and entry_at is the clock-in time of a
+    completed shift.
+
+    A completed shift stays in the journal until mark_saved() records that
+    it reached the record store, so shifts not saved before a crash are
+    found in pending on the next start. Shifts that cannot be saved without
+    a decision, e.g. because they overlap a stored shift, are moved to held.
+    """
+
+    # Scans of the same badge closer than this are treated as one
+    DEBOUNCE_SECONDS = 10
+
+    def __init__(self, journal_path=None):
+        self.journal_path = Path(journal_path) if journal_path else default_journal_path()
+        self.open = {}
+        self.pending = {}  # (badge, clock-out time) -> clock-in time of completed shifts not saved yet
+        self.held = {}  # (badge, clock-out time) -> (clock-in time, reason) of shifts waiting for a decision
+        self._last_punch = {}
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._journal = None
+        self.load()
+
+    def __len__(self):
+        return len(self.open)
+
+    def __contains__(self, badge):
+        return str(badge) in self.open
+
+    def load(self):
+        """Replay the journal and rewrite it with only the open, pending and held shifts."""
+        with self._lock:
+            self.open.clear()
+            self.pending.clear()
+            self.held.clear()
+            lines = 0
+            if self.journal_path.exists():
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                            badge = event["sicil"]
+                            at = datetime.fromisoformat(event["at"])
+                            entry_at = datetime.fromisoformat(event["entry"]) if "entry" in event else None
+                        except (ValueError, KeyError):
+                            # A line cut short by a crash
+                            continue
+                        lines += 1
+                        kind = event.get("event")
+                        if kind == "in":
+                            self.open[badge] = at
+                        elif kind == "out":
+                            self.open.pop(badge, None)
+                            # Journals written before shifts were tracked have no clock-in time
+                            if entry_at is not None:
+                                self.pending[(badge, at)] = entry_at
+                        elif kind == "held":
+                            self.pending.pop((badge, at), None)
+                            self.held[(badge, at)] = (entry_at, event.get("reason", ""))
+                        elif kind == "retry":
+                            self.held.pop((badge, at), None)
+                            self.pending[(badge, at)] = entry_at
+                        elif kind == "saved":
+                            self.pending.pop((badge, at), None)
+                            self.held.pop((badge, at), None)
+            if lines > len(self.open) + len(self.pending) + len(self.held):
+                self.compact()
+
+    def compact(self):
+        """Rewrite the journal so it only holds the open, pending and held shifts."""
+        with self._lock:
+            self._close_journal()
+            tmp_path = self.journal_path.with_name(self.journal_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # Completed shifts first: a badge may have clocked in again since
+                for (badge, at), entry_at in self.pending.items():
+                    f.write(self._line("out", badge, at, entry_at))
+                for (badge, at), (entry_at, reason) in self.held.items():
+                    f.write(self._line("held", badge, at, entry_at, reason))
+                for badge, at in self.open.items():
+                    f.write(self._line("in", badge, at))
+            os.replace(tmp_path, self.journal_path)
+
+    @staticmethod
+    def _line(event, badge, at, entry_at=None, reason=None):
+        line = {"event": event, "sicil": badge, "at": at.isoformat()}
+        if entry_at is not None:
+            line["entry"] = entry_at.isoformat()
+        if reason is not None:
+            line["reason"] = reason
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+    def _append(self, event, badge, at, entry_at=None, reason=None):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(self._line(event, badge, at, entry_at, reason))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def punch(self, badge, at=None):
+        """Clock a badge in, or out if it has an open shift.
+
+        Returns:
+            tuple: (event, entry_at, at), where event is "in", "out" or None
+                   for a repeated scan within DEBOUNCE_SECONDS, entry_at is the
+                   clock-in time of the shift and at the time of this punch
+        """
+        badge = str(badge).strip()
+        if not badge:
+            raise ValueError("Empty badge number")
+        at = (at or datetime.now()).replace(microsecond=0)
+
+        with self._lock:
+            last = self._last_punch.get(badge)
+            if last is not None and abs((at - last).total_seconds()) < self.DEBOUNCE_SECONDS:
+                return None, self.open.get(badge), at
+            self._last_punch[badge] = at
+
+            entry_at = self.open.pop(badge, None)
+            if entry_at is None:
+                event, entry_at = "in", at
+                self.open[badge] = at
+                self._append(event, badge, at)
+            else:
+                event = "out"
+                self.pending[(badge, at)] = entry_at
+                self._append(event, badge, at, entry_at)
+
+        for listener in list(self._listeners):
+            listener(event, badge, at, entry_at)
+        return event, entry_at, at
+
+    def pending_shifts(self):
+        """Return [(badge, clock-in time, clock-out time)] of the completed shifts not saved yet, oldest first."""
+        with self._lock:
+            return sorted(((badge, entry_at, exit_at) for (badge, exit_at), entry_at in self.pending.items()),
+                          key=lambda shift: shift[2])
+
+    def held_shifts(self):
+        """Return {(badge, clock-out time): (clock-in time, reason)} of the held shifts."""
+        with self._lock:
+            return dict(self.held)
+
+    def mark_saved(self, badge, exit_at):
+        """Record that a completed shift reached the record store, or was discarded."""
+        with self._lock:
+            if self.pending.pop((badge, exit_at), None) is None and self.held.pop((badge, exit_at), None) is None:
+                return
+            self._append("saved", badge, exit_at)
+
+    def hold(self, badge, exit_at, reason):
+        """Keep a completed shift that cannot be saved as it is until it is saved anyway or discarded."""
+        with self._lock:
+            entry_at = self.pending.pop((badge, exit_at), None)
+            if entry_at is None:
+                return
+            self.held[(badge, exit_at)] = (entry_at, reason)
+            self._append("held", badge, exit_at, entry_at, reason)
+
+    def release(self, badge, exit_at):
+        """Move a held shift back to pending, e.g. to save it anyway.
+
+        Returns:
+            datetime: Clock-in time of the shift, or None if it is not held
+        """
+        with self._lock:
+            held = self.held.pop((badge, exit_at), None)
+            if held is None:
+                return None
+            self.pending[(badge, exit_at)] = held[0]
+            self._append("retry", badge, exit_at, held[0])
+            return held[0]
+
+    def close(self):
+        with self._lock:
+            self._close_journal()
+
+def default_journal_path():
+    """Return the local journal of the open shifts."""
+    return preferences.get_preferences_path().parent / "open_shifts.jsonl"
+
+# Open shift table shared by the kiosk and the status board
+_table = None
+
+def get_open_shift_table():
+    global _table
+    if _table is None:
+        _table = OpenShiftTable()
+    return _table
@@ -1,10 +1,50 @@
 # core/time_calc.py
-from datetime import datetime, timedelta
+import copy
+from datetime import timedelta
+from core.intervals import (MINUTES_PER_DAY, parse_clock, shift_span, round_minutes,
+                            merge_intervals, break_overlap_minutes, to_datetime)
 from gui.preferences import preferences
+from utils.instrumentation import instrument
 
-def round_time(dt):
-    """Round time based on the selected algorithm in preferences."""
-    algorithm = preferences.get("rounding_algorithm", "standard")
+class CalculationPolicy:
+    """Snapshot of the rounding and break settings used for a calculation.
+    
+    Offers the same get()/get_break_info() interface as PreferencesManager,
+    so it can be used wherever the live preferences are expected.
+    """
+    
+    def __init__(self, rounding_algorithm="standard", breaks=None):
+        self.rounding_algorithm = rounding_algorithm
+        self.breaks = copy.deepcopy(breaks) if breaks else {}
+    
+    @classmethod
+    def from_preferences(cls, prefs=None):
+        """Create a policy from the current preferences."""
+        prefs = prefs or preferences
+        return cls(prefs.get("rounding_algorithm", "standard"), prefs.get("breaks", {}))
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("rounding_algorithm", "standard"), data.get("breaks", {}))
+    
+    def to_dict(self):
+        return {"rounding_algorithm": self.rounding_algorithm, "breaks": self.breaks}
+    
+    def get(self, key, default=None):
+        return self.to_dict().get(key, default)
+    
+    def get_break_info(self, break_type, is_weekday=True):
+        day_type = "weekday" if is_weekday else "weekend"
+        return self.breaks.get(day_type, {}).get(break_type, {})
+    
+    def get_breaks(self, is_weekday=True):
+        day_type = "weekday" if is_weekday else "weekend"
+        return dict(self.breaks.get(day_type, {}))
+
+def round_time(dt, algorithm=None):
+    """Round time based on the given algorithm or the one selected in preferences."""
+    if algorithm is None:
+        algorithm = preferences.get("rounding_algorithm", "standard")
     
     if algorithm == "nearest_5":
         # Round to nearest 5 minutes
@@ -85,60 +125,108 @@ def round_time(dt):
             minute = 0
         return dt.replace(minute=minute, second=0, microsecond=0)
 
-def calculate_work_hours(entry_time, exit_time, is_weekday, data_cache):
-    """Calculate net working hours with meal breaks."""
-    entry_dt = round_time(datetime.strptime(entry_time, "%H:%M"))
-    exit_dt = round_time(datetime.strptime(exit_time, "%H:%M"))
-    work_duration = exit_dt - entry_dt
+# Default (start, end, minutes) of the standard breaks when a setting is missing
+BREAK_DEFAULTS = {
+    "lunch": {True: ("13:00", "13:45", 45), False: ("13:00", "13:30", 30)},
+    "dinner": {True: ("19:00", "19:30", 30), False: ("19:00", "19:30", 30)}
+}
 
-    lunch_duration = timedelta()
+def _resolve_breaks(settings, is_weekday):
+    """Return the merged (start, end) minute windows of the enabled breaks of a day type.
     
-    # Get break settings from preferences for the appropriate day type
-    lunch_info = preferences.get_break_info("lunch", is_weekday=is_weekday)
-    dinner_info = preferences.get_break_info("dinner", is_weekday=is_weekday)
+    Any number of named breaks is supported. Without a break table for the
+    day type, lunch and dinner apply at their default times; a configured
+    table is used as is, so a removed lunch or dinner stays removed. Lunch
+    and dinner entries missing a time fall back to the default time.
+    """
+    day_type = "weekday" if is_weekday else "weekend"
+    configured = settings.get("breaks", {}).get(day_type)
+    if configured is None:
+        configured = {break_type: {} for break_type in BREAK_DEFAULTS}
     
-    # Parse lunch break time
-    if lunch_info.get("enabled", True):
-        lunch_time_str = lunch_info.get("start_time", "13:00")
-        lunch_hour, lunch_minute = map(int, lunch_time_str.split(":"))
-        lunch_break = datetime(entry_dt.year, entry_dt.month, entry_dt.day, lunch_hour, lunch_minute)
-        
-        # Check if lunch break falls within the work period
-        if entry_dt <= lunch_break < exit_dt:
-            try:
-                end_time_str = lunch_info.get("end_time", "13:45" if is_weekday else "13:30")
-                end_h, end_m = map(int, end_time_str.split(":"))
-                end_time = datetime(lunch_break.year, lunch_break.month, lunch_break.day, end_h, end_m)
-                duration = (end_time - lunch_break).total_seconds() / 60
-                lunch_duration += timedelta(minutes=duration)
-            except:
-                # Fallback to default if there's an error
-                default_duration = 45 if is_weekday else 30
-                lunch_duration += timedelta(minutes=default_duration)
+    windows = []
+    for break_type, info in configured.items():
+        if not info.get("enabled", True):
+            continue
+        if break_type in BREAK_DEFAULTS:
+            default_start, default_end, default_minutes = BREAK_DEFAULTS[break_type][is_weekday]
+        elif "start_time" in info and "end_time" in info:
+            default_start = default_end = default_minutes = None
+        else:
+            continue
+        start_h, start_m = map(int, info.get("start_time", default_start).split(":"))
+        start = start_h * 60 + start_m
+        try:
+            end_h, end_m = map(int, info.get("end_time", default_end).split(":"))
+            # A break ending after midnight wraps into the next day
+            minutes = (end_h * 60 + end_m - start) % MINUTES_PER_DAY
+        except Exception:
+            # Fallback to default if there's an error
+            if default_minutes is None:
+                raise
+            minutes = default_minutes
+        if minutes:
+            windows.append((start, start + minutes))
+    return merge_intervals(windows)
 
-    # Parse dinner break time
-    if dinner_info.get("enabled", True):
-        dinner_time_str = dinner_info.get("start_time", "19:00")
-        dinner_hour, dinner_minute = map(int, dinner_time_str.split(":"))
-        dinner_break = datetime(entry_dt.year, entry_dt.month, entry_dt.day, dinner_hour, dinner_minute)
+class PolicyCalculator:
+    """Work hours calculator bound to one policy.
+    
+    The rounding algorithm and break windows are resolved once, so many
+    records calculated under the same policy share a single instance.
+    """
+    
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = preferences
+        self.policy = settings if isinstance(settings, CalculationPolicy) else CalculationPolicy.from_preferences(settings)
+        self.algorithm = self.policy.get("rounding_algorithm", "standard")
+        self.breaks = {
+            True: _resolve_breaks(self.policy, True),
+            False: _resolve_breaks(self.policy, False)
+        }
+    
+    def net_minutes(self, entry_time, exit_time, is_weekday):
+        """Return the rounded shift span and net working minutes.
         
-        # Check if dinner break falls within the work period
-        if entry_dt <= dinner_break < exit_dt:
-            try:
-                end_time_str = dinner_info.get("end_time", "19:30")
-                end_h, end_m = map(int, end_time_str.split(":"))
-                end_time = datetime(dinner_break.year, dinner_break.month, dinner_break.day, end_h, end_m)
-                duration = (end_time - dinner_break).total_seconds() / 60
-                lunch_duration += timedelta(minutes=duration)
-            except:
-                # Fallback to default
-                lunch_duration += timedelta(minutes=30)
+        Exit times earlier than the entry are on the next day, and "HH:MM+N"
+        exits are N days later, so night and multi-day shifts are supported.
+        The day of the exit is decided from the clocks as entered, so an
+        entry rounded up to midnight does not turn the shift into a day.
+        """
+        start, end = shift_span(parse_clock(entry_time), parse_clock(exit_time))
+        start = round_minutes(start, self.algorithm)
+        end = round_minutes(end, self.algorithm)
+        net = end - start - break_overlap_minutes(start, end, self.breaks[is_weekday])
+        return start, end, net
+    
+    def calculate(self, entry_time, exit_time, is_weekday):
+        """Return the rounded entry and exit times and the net duration."""
+        start, end, net = self.net_minutes(entry_time, exit_time, is_weekday)
+        return to_datetime(start), to_datetime(end), timedelta(minutes=net)
+    
+    def net_hours(self, entry_time, exit_time, is_weekday):
+        """Return the unrounded net working hours."""
+        return self.net_minutes(entry_time, exit_time, is_weekday)[2] / 60
 
-    net_duration = work_duration - lunch_duration
+@instrument("time_calc.calculate_work_hours")
+def calculate_work_hours(entry_time, exit_time, is_weekday, data_cache, settings=None):
+    """Calculate net working hours with meal breaks.
+    
+    Args:
+        entry_time: Entry time (HH:MM)
+        exit_time: Exit time (HH:MM)
+        is_weekday: True for weekday, False for weekend
+        data_cache: Dictionary receiving the rounded times, net duration and policy
+        settings: Optional CalculationPolicy, defaults to the current preferences
+    """
+    calculator = PolicyCalculator(settings)
+    entry_dt, exit_dt, net_duration = calculator.calculate(entry_time, exit_time, is_weekday)
 
     # Update the data cache
     data_cache["entry"] = entry_dt
     data_cache["exit"] = exit_dt
     data_cache["net_duration"] = net_duration
+    data_cache["policy"] = calculator.policy
     
-    return round(net_duration.total_seconds() / 3600, 2)
\ No newline at end of file
+    return round(net_duration.total_seconds() / 3600, 2)
@@ -0,0 +1,323 @@
+# core/validation.py
+import csv
+import json
+import os
+import re
+from datetime import date
+from pathlib import Path
+from core.data import iter_records, write_records, get_file_path
+from core.policy import copy_policies, get_registry
+from core.recompute import chunked, map_chunks
+from core.time_calc import CalculationPolicy, PolicyCalculator
+from core.work_calendar import WorkCalendar, get_calendar
+from utils.instrumentation import instrument
+
+REQUIRED_FIELDS = ("sicil", "tarih", "giris", "cikis", "net_calisma")
+# Fields identifying one shift of a badge
+SHIFT_KEY_FIELDS = ("sicil", "tarih", "giris", "cikis")
+
+# Stored net hours may differ from a recomputation by this many hours
+TOLERANCE = 0.01
+
+# What happened to a record with a problem
+REPAIRED = "repaired"
+REJECTED = "rejected"
+REPORTED = "reported"
+
+REPORT_COLUMNS = ["position", "sicil", "tarih", "field", "problem", "action"]
+
+_CLOCK = re.compile(r"(\d{1,2}):(\d{1,2})(?:\+(\d+))?")
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Dates written by hand or by spreadsheets: DD.MM.YYYY, DD/MM/YYYY and YYYY/MM/DD
+_DAY_FIRST_DATE = re.compile(r"(\d{1,2})[./](\d{1,2})[./](\d{4})")
+_YEAR_FIRST_DATE = re.compile(r"(\d{4})[./](\d{1,2})[./](\d{1,2})")
+
+class _Invalid(Exception):
+    """A field that cannot be repaired."""
+
+class RecordValidator:
+    """Checks and optionally repairs records.
+
+    Everything that does not depend on the record (patterns, calculators
+    per policy, the work calendar) is prepared once, and the results for
+    dates, clock times and net hours are memoised, so validating a record
+    mostly costs dictionary lookups.
+    """
+
+    def __init__(self, policy_data=None, stored_policies=None, calendar_data=None, repair=False,
+                 tolerance=TOLERANCE):
+        self.default = PolicyCalculator(CalculationPolicy.from_dict(policy_data) if policy_data
+                                        else CalculationPolicy.from_preferences())
+        self.stored_policies = stored_policies or {}
+        self.calendar = WorkCalendar.from_dict(calendar_data) if calendar_data is not None else get_calendar()
+        self.repair = repair
+        self.tolerance = tolerance
+        self._calculators = {}
+        self._dates = {}
+        self._clocks = {}
+        self._weekdays = {}
+        self._nets = {}
+
+    def _calculator(self, pid):
+        if pid is None or pid not in self.stored_policies:
+            return self.default
+        calculator = self._calculators.get(pid)
+        if calculator is None:
+            calculator = self._calculators[pid] = PolicyCalculator(
+                CalculationPolicy.from_dict(self.stored_policies[pid]))
+        return calculator
+
+    def _date(self, value):
+        """Return (ISO date, problem) for a date value, or raise _Invalid."""
+        if not isinstance(value, str):
+            raise _Invalid(f"not a date: {value!r}")
+        result = self._dates.get(value)
+        if result is None:
+            result = self._dates[value] = self._parse_date(value)
+        if result[0] is None:
+            raise _Invalid(result[1])
+        return result
+
+    @staticmethod
+    def _parse_date(value):
+        text = value.strip()
+        match = _DAY_FIRST_DATE.fullmatch(text)
+        if match:
+            day, month, year = match.groups()
+        else:
+            match = _YEAR_FIRST_DATE.fullmatch(text)
+            if match:
+                year, month, day = match.groups()
+            elif _ISO_DATE.fullmatch(text):
+                year, month, day = text.split("-")
+            else:
+                return None, f"not a YYYY-MM-DD date: {value!r}"
+        try:
+            iso = date(int(year), int(month), int(day)).isoformat()
+        except ValueError:
+            return None, f"no such date: {value!r}"
+        return iso, None if iso == value else f"date written as {value!r}"
+
+    def _clock(self, value, allow_days):
+        """Return (HH:MM[+N], problem) for a clock value, or raise _Invalid."""
+        if not isinstance(value, str):
+            raise _Invalid(f"not a time: {value!r}")
+        key = (value, allow_days)
+        result = self._clocks.get(key)
+        if result is None:
+            result = self._clocks[key] = self._parse_clock(value, allow_days)
+        if result[0] is None:
+            raise _Invalid(result[1])
+        return result
+
+    @staticmethod
+    def _parse_clock(value, allow_days):
+        match = _CLOCK.fullmatch(value.strip())
+        if not match:
+            return None, f"not an HH:MM time: {value!r}"
+        hours, minutes, days = match.groups()
+        if not (0 <= int(hours) <= 23 and 0 <= int(minutes) <= 59):
+            return None, f"time out of range: {value!r}"
+        if days and not allow_days:
+            return None, f"entry time with a day offset: {value!r}"
+        text = f"{int(hours):02d}:{int(minutes):02d}" + (f"+{int(days)}" if days and int(days) else "")
+        return text, None if text == value else f"time written as {value!r}"
+
+    def _net(self, giris, cikis, tarih, pid):
+        is_weekday = self._weekdays.get(tarih)
+        if is_weekday is None:
+            is_weekday = self._weekdays[tarih] = self.calendar.is_weekday(tarih)
+        key = (giris, cikis, is_weekday, pid)
+        net = self._nets.get(key)
+        if net is None:
+            net = self._nets[key] = self._calculator(pid).net_hours(giris, cikis, is_weekday)
+        return net
+
+    def validate(self, record):
+        """Check a record.
+
+        Returns:
+            tuple: (record, problems), where record is the record to keep (the
+                   repaired copy in repair mode) or None if it does not pass,
+                   and problems a list of (field, problem, action)
+        """
+        if not isinstance(record, dict):
+            return None, [("", f"not a record: {type(record).__name__}", REJECTED)]
+        missing = [field for field in REQUIRED_FIELDS if field not in record]
+        if missing:
+            return None, [(field, "missing", REJECTED) for field in missing]
+
+        problems = []
+        fixed = {}
+        action = REPAIRED if self.repair else REPORTED
+
+        sicil = record["sicil"]
+        if isinstance(sicil, int) and not isinstance(sicil, bool):
+            fixed["sicil"] = str(sicil)
+            problems.append(("sicil", f"badge stored as a number: {sicil}", action))
+        elif not isinstance(sicil, str) or not sicil.strip():
+            return None, [("sicil", f"not a badge number: {sicil!r}", REJECTED)]
+        elif sicil != sicil.strip():
+            fixed["sicil"] = sicil.strip()
+            problems.append(("sicil", f"badge with surrounding spaces: {sicil!r}", action))
+
+        field = "tarih"
+        try:
+            tarih, problem = self._date(record["tarih"])
+            if problem:
+                fixed["tarih"] = tarih
+                problems.append(("tarih", problem, action))
+            field = "giris"
+            giris, problem = self._clock(record["giris"], False)
+            if problem:
+                fixed["giris"] = giris
+                problems.append(("giris", problem, action))
+            field = "cikis"
+            cikis, problem = self._clock(record["cikis"], True)
+            if problem:
+                fixed["cikis"] = cikis
+                problems.append(("cikis", problem, action))
+        except _Invalid as e:
+            return None, problems + [(field, str(e), REJECTED)]
+
+        pid = record.get("policy")
+        known_policy = pid in self.stored_policies
+        if pid is not None and not known_policy:
+            problems.append(("policy", f"unknown policy {pid}; checked with the current policy", REPORTED))
+        expected = self._net(giris, cikis, tarih, pid)
+        net = record["net_calisma"]
+        if isinstance(net, str):
+            try:
+                net = float(net.strip().replace(",", "."))
+            except ValueError:
+                net = None
+        if not isinstance(net, (int, float)) or isinstance(net, bool):
+            fixed["net_calisma"] = expected
+            problems.append(("net_calisma", f"not a number: {record['net_calisma']!r}", action))
+        elif abs(net - expected) > self.tolerance and known_policy:
+            fixed["net_calisma"] = expected
+            problems.append(("net_calisma", f"stored {net:.2f} h, recomputed {expected:.2f} h", action))
+        elif abs(net - expected) > self.tolerance:
+            # Without the policy it was saved with, the record may just predate a
+            # change of the preferences; recompute changes such records on request
+            if net is not record["net_calisma"]:
+                fixed["net_calisma"] = net
+            problems.append(("net_calisma", f"stored {net:.2f} h, the current policy gives {expected:.2f} h",
+                             REPORTED))
+        elif net is not record["net_calisma"]:
+            fixed["net_calisma"] = net
+            problems.append(("net_calisma", f"number stored as text: {record['net_calisma']!r}", action))
+
+        if not fixed:
+            return record, problems
+        if not self.repair:
+            return None, problems
+        return dict(record, **fixed), problems
+
+# Validator of the current run in this (worker) process, kept across chunks for its memos
+_validator = (None, None)
+
+def _get_validator(*args):
+    global _validator
+    key = json.dumps(args, sort_keys=True)
+    if _validator[0] != key:
+        _validator = (key, RecordValidator(*args))
+    return _validator[1]
+
+def validate_chunk(records, first_position, policy_data, stored_policies, calendar_data, repair, tolerance):
+    """Validate a chunk of records in a worker process.
+
+    Returns:
+        tuple: (outcomes, problems), with an outcome per record (True to keep
+               it, False to drop it, or the repaired record) and the problems
+               as (position, sicil, tarih, field, problem, action) rows
+    """
+    validator = _get_validator(policy_data, stored_policies, calendar_data, repair, tolerance)
+    # Unchanged records are not sent back to the parent process
+    outcomes = []
+    rows = []
+    for position, record in enumerate(records, first_position):
+        result, problems = validator.validate(record)
+        outcomes.append(result is record or (result or False))
+        if problems:
+            sicil = record.get("sicil", "") if isinstance(record, dict) else ""
+            tarih = record.get("tarih", "") if isinstance(record, dict) else ""
+            rows.extend((position, sicil, tarih, field, problem, action) for field, problem, action in problems)
+    return outcomes, rows
+
+def _numbered_chunks(records, chunk_size):
+    position = 0
+    for chunk in chunked(records, chunk_size):
+        yield position, chunk
+        position += len(chunk)
+
+def _validate_numbered(numbered_chunk, *args):
+    first_position, records = numbered_chunk
+    return validate_chunk(records, first_position, *args)
+
+@instrument("validation.validate_file")
+def validate_file(file_path=None, clean_path=None, report_path=None, repair=False, policy=None,
+                  calendar=None, workers=None, chunk_size=5000, tolerance=TOLERANCE):
+    """Validate a record file in one streaming pass, in parallel chunks.
+
+    Args:
+        file_path: Optional record file, archive or binary store, defaults to the active record file
+        clean_path: Optional JSON file receiving the records that passed; in repair
+            mode repaired records are included and only unrepairable ones left out
+        report_path: Optional CSV file listing every problem found
+        repair: Fix badge numbers stored as numbers, non-ISO dates, unpadded
+            times and wrong or missing net hours instead of only reporting them
+        policy: CalculationPolicy for records without a known stored policy,
+            defaults to the current preferences
+        calendar: WorkCalendar for the day type, defaults to the current preferences
+        workers: Number of worker processes, defaults to the CPU count
+        chunk_size: Number of records per chunk
+        tolerance: Allowed difference in hours between stored and recomputed net hours
+
+    Returns:
+        dict: "checked", "valid", "repaired", "rejected" and "problems" counts
+    """
+    file_path = Path(file_path) if file_path else get_file_path()
+    policy = policy or CalculationPolicy.from_preferences()
+    calendar = calendar or get_calendar()
+    workers = workers or os.cpu_count() or 1
+    summary = {"checked": 0, "valid": 0, "repaired": 0, "rejected": 0, "problems": 0}
+    stored_policies = dict(get_registry(file_path).policies)
+    args = (policy.to_dict(), stored_policies, calendar.to_dict(), repair, tolerance)
+
+    report = None
+    writer = None
+    if report_path:
+        report = open(report_path, "w", encoding="utf-8", newline="")
+        writer = csv.writer(report)
+        writer.writerow(REPORT_COLUMNS)
+
+    def kept_records():
+        chunks = _numbered_chunks(iter_records(file_path), chunk_size)
+        for (_first, chunk), (outcomes, rows) in map_chunks(_validate_numbered, chunks, workers, *args):
+            summary["checked"] += len(chunk)
+            summary["problems"] += len(rows)
+            if writer is not None:
+                writer.writerows(rows)
+            for record, outcome in zip(chunk, outcomes):
+                if outcome is True:
+                    summary["valid"] += 1
+                    yield record
+                elif outcome is False:
+                    summary["rejected"] += 1
+                else:
+                    summary["repaired"] += 1
+                    yield outcome
+
+    try:
+        if clean_path:
+            write_records(kept_records(), clean_path)
+            # The clean file references the same policies
+            copy_policies(file_path, clean_path)
+        else:
+            for _ in kept_records():
+                pass
+    finally:
+        if report is not None:
+            report.close()
+    return summary
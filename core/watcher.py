@@ -0,0 +1,83 @@
+# core/watcher.py
+import os
+from collections import Counter
+from pathlib import Path
+
+def record_key(record):
+    """Return a hashable key identifying the contents of a record."""
+    return (
+        str(record.get("sicil", "")),
+        record.get("tarih", ""),
+        record.get("giris", ""),
+        record.get("cikis", ""),
+        record.get("net_calisma", "")
+    )
+
+def _pick(records, counts):
+    """Return the records whose keys still have a positive count."""
+    picked = []
+    for record in records:
+        key = record_key(record)
+        if counts[key] > 0:
+            counts[key] -= 1
+            picked.append(record)
+    return picked
+
+def diff_records(old_records, new_records):
+    """Compare two snapshots of a record file.
+
+    Duplicate rows are counted, so removing one of two identical records
+    is reported as a single removal.
+
+    Returns:
+        tuple: (added, removed) lists of records
+    """
+    old_counts = Counter(record_key(r) for r in old_records)
+    new_counts = Counter(record_key(r) for r in new_records)
+    added = _pick(new_records, new_counts - old_counts)
+    removed = _pick(old_records, old_counts - new_counts)
+    return added, removed
+
+class RecordFileWatcher:
+    """Detect changes to a record file by polling its modification time and size."""
+
+    def __init__(self, file_path, records=None):
+        self.file_path = Path(file_path)
+        self._stamp = self._stat()
+        self.records = list(records) if records is not None else []
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.file_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def set_snapshot(self, records):
+        """Set the records the next poll is compared against."""
+        self.records = list(records)
+
+    def changed(self):
+        """Return True if the file was modified since the last poll."""
+        return self._stat() != self._stamp
+
+    def poll(self, loader):
+        """Check the file and return the changes since the last poll.
+
+        Args:
+            loader: Callable returning the current list of records
+
+        Returns:
+            tuple or None: (added, removed) records, or None if the file is unchanged
+
+        If loader() raises, the stamp is kept, so the next poll reads the file again.
+        """
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return None
+
+        records = loader() if stamp is not None else []
+        self._stamp = stamp
+        added, removed = diff_records(self.records, records)
+        self.records = list(records)
+        return added, removed
@@ -0,0 +1,114 @@
+# core/work_calendar.py
+import os
+from datetime import date
+from gui.preferences import preferences
+
+# Day types stored in the yearly lookup tables
+WEEKDAY = 0
+WEEKEND = 1
+HOLIDAY = 2
+
+# Monday is 0, as in date.weekday()
+DEFAULT_WEEKEND_DAYS = (5, 6)
+
+def load_holidays(file_path):
+    """Read a holiday file.
+
+    Each line holds a YYYY-MM-DD date, optionally followed by a name.
+    Blank lines and lines starting with "#" are ignored.
+
+    Returns:
+        set: Holiday dates
+    """
+    holidays = set()
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                holidays.add(date.fromisoformat(line.split()[0]))
+            except ValueError:
+                raise ValueError(f"Invalid holiday date on line {line_number} of {file_path}: {line}")
+    return holidays
+
+class WorkCalendar:
+    """Resolves the day type (weekday, weekend or holiday) of a date.
+
+    Day types are precomputed into a byte per day for each year on first
+    use, so classifying a date is a single table lookup.
+    """
+
+    def __init__(self, weekend_days=DEFAULT_WEEKEND_DAYS, holidays=()):
+        self.weekend_days = frozenset(weekend_days)
+        self.holidays = frozenset(holidays)
+        self._tables = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("weekend_days", DEFAULT_WEEKEND_DAYS),
+                   (date.fromisoformat(d) for d in data.get("holidays", ())))
+
+    def to_dict(self):
+        return {
+            "weekend_days": sorted(self.weekend_days),
+            "holidays": sorted(d.isoformat() for d in self.holidays)
+        }
+
+    def year_table(self, year):
+        """Return the day types of a year, indexed by day of the year (0 = January 1st)."""
+        table = self._tables.get(year)
+        if table is None:
+            first = date(year, 1, 1).toordinal()
+            size = date(year + 1, 1, 1).toordinal() - first
+            # January 1st falls on weekday (first - 1) % 7, see date.weekday()
+            table = bytearray(
+                WEEKEND if (first + i - 1) % 7 in self.weekend_days else WEEKDAY
+                for i in range(size)
+            )
+            for holiday in self.holidays:
+                if holiday.year == year:
+                    table[holiday.toordinal() - first] = HOLIDAY
+            self._tables[year] = table
+        return table
+
+    def day_type(self, day):
+        """Return the day type of a date or YYYY-MM-DD string."""
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return self.year_table(day.year)[day.timetuple().tm_yday - 1]
+
+    def is_weekday(self, day):
+        """Return True if weekday break rules apply; holidays use the weekend rules."""
+        return self.day_type(day) == WEEKDAY
+
+def calendar_from_preferences(prefs=None):
+    """Create a calendar from the "calendar" preferences."""
+    prefs = prefs or preferences
+    settings = prefs.get("calendar") or {}
+    holiday_file = settings.get("holiday_file")
+    holidays = load_holidays(holiday_file) if holiday_file and os.path.exists(holiday_file) else ()
+    return WorkCalendar(settings.get("weekend_days", DEFAULT_WEEKEND_DAYS), holidays)
+
+# Calendar built from the preferences, and the settings it was built from
+_calendar = None
+_calendar_key = None
+
+def get_calendar():
+    """Return the calendar of the current preferences.
+
+    The calendar is rebuilt when the weekend days, the holiday file or the
+    file's modification time change.
+    """
+    global _calendar, _calendar_key
+    settings = preferences.get("calendar") or {}
+    holiday_file = settings.get("holiday_file")
+    try:
+        stamp = os.stat(holiday_file).st_mtime_ns if holiday_file else None
+    except OSError:
+        stamp = None
+    key = (tuple(settings.get("weekend_days", DEFAULT_WEEKEND_DAYS)), holiday_file, stamp)
+    if _calendar is None or key != _calendar_key:
+        _calendar = calendar_from_preferences()
+        _calendar_key = key
+    return _calendar
@@ -0,0 +1,379 @@
+# core/write_buffer.py
+import atexit
+import glob
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from gui.preferences import preferences
+from utils.instrumentation import increment, timer
+
+if platform.system() == "Windows":
+    import msvcrt
+else:
+    import fcntl
+
+DEFAULT_LATENCY_MS = 200
+DEFAULT_MAX_RECORDS = 100
+
+def journal_dir():
+    """Return the local directory holding the write-ahead journals."""
+    directory = preferences.get_preferences_path().parent / "journals"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+def _journal_prefix(file_path):
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:12]
+    return f"{Path(file_path).name}.{key}."
+
+def journal_path_for(file_path):
+    """Return the journal of a record file for this process.
+
+    Journals are kept on the local disk, one per record file and process,
+    so terminals sharing a record file over the network, or two sessions
+    on one machine, never share a journal.
+    """
+    return journal_dir() / f"{_journal_prefix(file_path)}{os.getpid()}.journal"
+
+def journals_for(file_path):
+    """Return the journals of a record file left by any process, oldest first."""
+    paths = journal_dir().glob(glob.escape(_journal_prefix(file_path)) + "*journal")
+    return sorted(paths, key=lambda path: path.stat().st_mtime)
+
+def _try_lock(journal):
+    """Lock an open journal exclusively without waiting; return False if another process holds it.
+
+    The lock lasts until the journal is closed, also when its process crashes.
+    """
+    try:
+        if platform.system() == "Windows":
+            journal.seek(0)
+            msvcrt.locking(journal.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+def _is_current(journal, journal_path):
+    """Return True if an open journal is still the file at its path, i.e. not removed meanwhile."""
+    try:
+        return os.path.samestat(os.fstat(journal.fileno()), os.stat(journal_path))
+    except FileNotFoundError:
+        return False
+
+def _discard_journal(journal, journal_path):
+    """Remove a locked journal and close it.
+
+    It is removed while still locked, so no other process can recover it in
+    between; Windows cannot remove an open file, so there it is closed first.
+    """
+    if platform.system() == "Windows":
+        journal.close()
+        os.remove(journal_path)
+    else:
+        os.remove(journal_path)
+        journal.close()
+
+class WriteBuffer:
+    """Queues records for a record file and writes them in batches.
+
+    A batch is written once the oldest queued record has waited latency_ms,
+    or as soon as max_records are queued. Every record is appended to a local
+    journal before add() returns, so records queued at the time of a crash
+    are written by recover_journal() on the next start. The journal is
+    locked while it exists, so other sessions never recover it meanwhile.
+
+    A flush takes the queued records and the journal holding them, and
+    writes them without the buffer lock, so add() never waits for the disk;
+    records added meanwhile go to a new journal (see journal_path).
+    """
+
+    def __init__(self, file_path, latency_ms=DEFAULT_LATENCY_MS, max_records=DEFAULT_MAX_RECORDS,
+                 journal_path=None):
+        self.file_path = Path(file_path)
+        self.latency = latency_ms / 1000
+        self.max_records = max_records
+        self._journal_base = Path(journal_path) if journal_path else journal_path_for(self.file_path)
+        self.journal_path = self._journal_base
+        self.last_error = None
+        self._records = []
+        # Records taken by a flush that is writing them
+        self._writing = []
+        self._oldest = None
+        self._journal = None
+        # Journals of records taken by a flush, removed once the records are written
+        self._detached = []
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        # Held while a batch is written; flushes run one at a time
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._paused = False
+        if journal_path:
+            base = self._journal_base
+            paths = [base] + sorted(base.parent.glob(glob.escape(base.stem) + ".*" + base.suffix),
+                                    key=lambda path: path.stat().st_mtime)
+        else:
+            paths = journals_for(self.file_path)
+        for path in paths:
+            recover_journal(path, self.file_path)
+        self._thread = threading.Thread(target=self._flush_loop, name="write-buffer", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, record):
+        """Queue a record; it is in the journal, but not yet in the record file, on return."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write buffer is closed")
+            if self._journal is None:
+                self._journal = self._open_journal()
+                if self._journal.tell() == 0:
+                    self._journal.write(json.dumps({"file_path": os.path.abspath(self.file_path)}) + "\n")
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+            self._records.append(record)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify_all()
+
+    def flush(self):
+        """Write the queued records to the record file and remove their journal.
+
+        If the write fails, the records are queued again in front of newer ones.
+
+        Returns:
+            int: Number of records written
+        """
+        from core.data import append_records
+        with self._flush_lock:
+            with self._lock:
+                if not self._records or self._paused:
+                    return 0
+                records, self._records = self._records, []
+                self._writing = records
+                self._oldest = None
+                self._detach_journal()
+            try:
+                with timer("write_buffer.flush"):
+                    count = append_records(records, self.file_path)
+            except BaseException:
+                with self._lock:
+                    self._records[:0] = records
+                    self._writing = []
+                    self._oldest = time.monotonic()
+                raise
+            increment("write_buffer.records", count)
+            with self._lock:
+                self._writing = []
+                detached, self._detached = self._detached, []
+            for journal, path in detached:
+                _discard_journal(journal, path)
+            return count
+
+    def _detach_journal(self):
+        # The journal stays locked until its records are written; later records
+        # start the next journal of the generation sequence
+        if self._journal is not None:
+            self._detached.append((self._journal, self.journal_path))
+            self._journal = None
+            self._generation += 1
+            base = self._journal_base
+            self.journal_path = base.with_name(f"{base.stem}.{self._generation}{base.suffix}")
+
+    def _open_journal(self):
+        while True:
+            journal = open(self.journal_path, "a", encoding="utf-8")
+            # Another process may be recovering a journal left under this name by a crash
+            if _try_lock(journal) and _is_current(journal, self.journal_path):
+                journal.seek(0, os.SEEK_END)
+                return journal
+            journal.close()
+            time.sleep(0.05)
+
+    def _wait_for_batch(self):
+        """Wait until a batch is due; return False once the buffer is closed."""
+        with self._lock:
+            while not self._closed:
+                if not self._records or self._paused:
+                    self._condition.wait()
+                    continue
+                remaining = self._oldest + self.latency - time.monotonic()
+                if remaining > 0 and len(self._records) < self.max_records:
+                    self._condition.wait(remaining)
+                    continue
+                return True
+            return False
+
+    def _flush_loop(self):
+        while self._wait_for_batch():
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                # The records stay queued and journaled; retry after another window
+                self.last_error = e
+
+    def close(self):
+        """Flush the queued records and stop the flush thread."""
+        with self._lock:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.flush()
+
+def read_journal(journal_path):
+    """Return the (record file path, records) stored in a journal.
+
+    A line cut short by a crash is ignored; its save never returned.
+    """
+    journal_path = Path(journal_path)
+    if not journal_path.exists():
+        return None, []
+    with open(journal_path, "r", encoding="utf-8") as f:
+        return _parse_journal(f)
+
+def _parse_journal(lines):
+    file_path = None
+    records = []
+    for line_number, line in enumerate(lines):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+        if line_number == 0:
+            file_path = entry.get("file_path")
+        else:
+            records.append(entry)
+    return file_path, records
+
+def recover_journal(journal_path, file_path=None):
+    """Write the records left in a journal by a crashed session and remove it.
+
+    A crash between writing a batch and clearing the journal leaves the
+    batch in both; such records are recognised at the end of the record
+    file and not written twice. A journal locked by a running session is
+    left alone.
+
+    Returns:
+        int: Number of records recovered
+    """
+    journal_path = Path(journal_path)
+    try:
+        journal = open(journal_path, "r+", encoding="utf-8")
+    except FileNotFoundError:
+        return 0
+    try:
+        if not _try_lock(journal) or not _is_current(journal, journal_path):
+            return 0
+        journal.seek(0)
+        stored_path, records = _parse_journal(journal)
+        count = _recover_records(records, file_path or stored_path)
+        _discard_journal(journal, journal_path)
+        return count
+    finally:
+        journal.close()
+
+def _recover_records(records, file_path):
+    from core.data import append_records, open_json_file
+    file_path = Path(file_path) if file_path else None
+    if records and file_path is not None:
+        if file_path.exists():
+            stored = open_json_file(file_path)
+            if stored[len(stored) - len(records):] == records:
+                records = []
+        if records:
+            append_records(records, file_path)
+            increment("write_buffer.recovered", len(records))
+    return len(records)
+
+# Write buffers of the record files used in this process
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+def is_enabled():
+    """Return True if saves are buffered ("write_buffer_latency_ms" above 0)."""
+    return preferences.get("write_buffer_latency_ms", DEFAULT_LATENCY_MS) > 0
+
+def get_write_buffer(file_path):
+    """Return the (cached) write buffer of a record file, recovering its journal first."""
+    key = os.path.abspath(file_path)
+    with _buffers_lock:
+        buffer = _buffers.get(key)
+        if buffer is None:
+            buffer = _buffers[key] = WriteBuffer(
+                file_path,
+                preferences.get("write_buffer_latency_ms", DEFAULT_LATENCY_MS),
+                preferences.get("write_buffer_max_records", DEFAULT_MAX_RECORDS)
+            )
+        return buffer
+
+def flush_buffer(file_path):
+    """Flush the write buffer of a record file, if it has one, so readers see every save."""
+    buffer = _buffers.get(os.path.abspath(file_path))
+    if buffer is not None:
+        buffer.flush()
+
+def get_pending(file_path):
+    """Return the records queued for a record file and not written yet, including a batch being written."""
+    buffer = _buffers.get(os.path.abspath(file_path))
+    if buffer is None:
+        return []
+    with buffer._lock:
+        return buffer._writing + buffer._records
+
+@contextmanager
+def writes_paused(file_path):
+    """Queue the saves to a record file without writing them while the block runs.
+
+    Saves are journaled as usual and written once the block ends, so the
+    record file can be rewritten meanwhile without losing them.
+    """
+    buffer = _buffers.get(os.path.abspath(file_path))
+    if buffer is None:
+        yield
+        return
+    buffer.flush()
+    with buffer._lock:
+        buffer._paused = True
+    # A batch the flush thread started meanwhile is written before the block runs
+    with buffer._flush_lock:
+        pass
+    try:
+        yield
+    finally:
+        with buffer._lock:
+            buffer._paused = False
+            buffer._condition.notify_all()
+
+def flush_all():
+    """Flush every write buffer; registered to run at exit."""
+    for buffer in list(_buffers.values()):
+        buffer.flush()
+
+def recover_journals():
+    """Write the records of every journal left behind by a crashed session.
+
+    Journals of running sessions are locked and skipped.
+
+    Returns:
+        int: Number of records recovered
+    """
+    count = 0
+    active = {buffer.journal_path for buffer in _buffers.values()}
+    for journal_path in journal_dir().glob("*.journal"):
+        if journal_path not in active:
+            count += recover_journal(journal_path)
+    return count
+
+atexit.register(flush_all)
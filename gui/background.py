@@ -0,0 +1,54 @@
+# gui/background.py
+import threading
+
+# How often a running task is checked for completion
+POLL_INTERVAL_MS = 100
+
+class BackgroundTask:
+    """Runs a function in a worker thread and hands its outcome back to the Tk thread.
+
+    Only the Tk thread touches widgets, so the worker just stores the
+    outcome and the widget polls for it with after(); on_done(result, error)
+    then runs on the Tk thread, with error set to the exception if func
+    raised. Polling stops without calling on_done once the widget is gone.
+    """
+
+    def __init__(self, widget, func, on_done, poll_interval_ms=POLL_INTERVAL_MS):
+        self.widget = widget
+        self.func = func
+        self.on_done = on_done
+        self.poll_interval_ms = poll_interval_ms
+        self.running = False
+        self._outcome = None
+
+    def start(self):
+        self.running = True
+        self._outcome = None
+        threading.Thread(target=self._run, daemon=True).start()
+        self.widget.after(self.poll_interval_ms, self._poll)
+        return self
+
+    def _run(self):
+        try:
+            self._outcome = (self.func(), None)
+        except Exception as e:
+            self._outcome = (None, e)
+
+    def _poll(self):
+        if not self.widget.winfo_exists():
+            self.running = False
+            return
+        if self._outcome is None:
+            self.widget.after(self.poll_interval_ms, self._poll)
+            return
+        result, error = self._outcome
+        self.running = False
+        self.on_done(result, error)
+
+def run_in_background(widget, func, on_done, poll_interval_ms=POLL_INTERVAL_MS):
+    """Start func() in a worker thread and call on_done(result, error) on the Tk thread.
+
+    Returns:
+        BackgroundTask: The started task; its running attribute is True until on_done ran
+    """
+    return BackgroundTask(widget, func, on_done, poll_interval_ms).start()
@@ -0,0 +1,141 @@
+# gui/diagnostics.py
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, scrolledtext
+from utils import instrumentation
+from utils.languages import _
+
+class DiagnosticsDialog:
+    """Window showing the metrics collected by utils.instrumentation."""
+
+    def __init__(self, parent, preferences_manager):
+        self.parent = parent
+        self.prefs = preferences_manager
+        self.window = None
+
+    def show(self):
+        # If window already exists, bring it to front
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(_("diagnostics_title"))
+        self.window.geometry("800x500")
+
+        # Enable/disable switch
+        self.enabled_var = tk.BooleanVar(value=instrumentation.is_enabled())
+        tk.Checkbutton(self.window, text=_("diagnostics_enable"), variable=self.enabled_var,
+                       command=self.toggle_enabled).pack(anchor="w", padx=10, pady=5)
+
+        # Metrics table
+        tree_frame = tk.Frame(self.window)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        columns = ("metric", "count", "mean", "max", "total", "histogram")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+        headings = {
+            "metric": (_("diagnostics_metric"), 220),
+            "count": (_("diagnostics_count"), 70),
+            "mean": (_("diagnostics_mean_ms"), 90),
+            "max": (_("diagnostics_max_ms"), 90),
+            "total": (_("diagnostics_total_ms"), 90),
+            "histogram": (_("diagnostics_histogram"), 220)
+        }
+        for column, (text, width) in headings.items():
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width)
+
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+        tree_frame.grid_columnconfigure(0, weight=1)
+        tree_frame.grid_rowconfigure(0, weight=1)
+
+        # Action buttons
+        buttons_frame = tk.Frame(self.window)
+        buttons_frame.pack(fill="x", padx=10, pady=5)
+
+        tk.Button(buttons_frame, text=_("refresh"), command=self.refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text=_("diagnostics_reset"), command=self.reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text=_("diagnostics_save"), command=self.save_metrics).pack(side=tk.LEFT, padx=5)
+
+        self.profile_button = tk.Button(buttons_frame, command=self.toggle_profiling)
+        self.profile_button.pack(side=tk.RIGHT, padx=5)
+        self._update_profile_button()
+
+        self.refresh()
+
+    def toggle_enabled(self):
+        """Switch metric collection on or off and remember the choice."""
+        enabled = self.enabled_var.get()
+        instrumentation.set_enabled(enabled)
+        self.prefs.set("instrumentation", enabled)
+
+    def refresh(self):
+        """Reload the metrics table."""
+        for row in self.tree.get_children():
+            self.tree.delete(row)
+        for name, metric in instrumentation.snapshot().items():
+            histogram = ", ".join(f"{label}: {n}" for label, n in metric["histogram"].items())
+            self.tree.insert("", "end", values=(
+                name,
+                metric["count"],
+                metric["mean_ms"],
+                metric["max_ms"],
+                metric["total_ms"],
+                histogram
+            ))
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def save_metrics(self):
+        """Write the collected metrics to a JSON file."""
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[(_("json_files"), "*.json"), (_("all_files"), "*.*")],
+            title=_("diagnostics_save")
+        )
+        if not file_path:
+            return
+        try:
+            instrumentation.dump(file_path)
+            messagebox.showinfo(_("success"), f"{_('diagnostics_saved')}\n{file_path}", parent=self.window)
+        except Exception as e:
+            messagebox.showerror(_("error"), f"{_('error_save')}\n{e}", parent=self.window)
+
+    def toggle_profiling(self):
+        """Start a cProfile capture, or stop it and save the results."""
+        if not instrumentation.is_profiling():
+            instrumentation.start_profiling()
+            self._update_profile_button()
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".prof",
+            filetypes=[(_("profile_files"), "*.prof"), (_("all_files"), "*.*")],
+            title=_("diagnostics_stop_profiling")
+        )
+        summary = instrumentation.stop_profiling(file_path or None)
+        self._update_profile_button()
+        self.show_profile_summary(summary)
+
+    def show_profile_summary(self, summary):
+        """Display the most expensive functions of the captured session."""
+        window = tk.Toplevel(self.window)
+        window.title(_("diagnostics_profile_summary"))
+        window.geometry("900x500")
+        text = scrolledtext.ScrolledText(window, wrap=tk.NONE, font=("Courier", 9))
+        text.pack(fill="both", expand=True)
+        text.insert("1.0", summary)
+        text.config(state=tk.DISABLED)
+
+    def _update_profile_button(self):
+        if instrumentation.is_profiling():
+            self.profile_button.config(text=_("diagnostics_stop_profiling"))
+        else:
+            self.profile_button.config(text=_("diagnostics_start_profiling"))
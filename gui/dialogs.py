@@ -2,10 +2,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
-from core.data import filter_by_badge
+from core.data import filter_by_badge, get_service_url
+from core.validation import REQUIRED_FIELDS
+from core.watcher import RecordFileWatcher, record_key
+from utils.file_utils import get_file_path
+from utils.instrumentation import timer
 from utils.languages import _
 
 class BadgeDataDialog:
+    # How often the record file is checked for changes made elsewhere
+    WATCH_INTERVAL_MS = 2000
+    
     def __init__(self, parent, badge_number, data_provider, on_close=None):
         self.parent = parent
         self.badge_number = badge_number
@@ -13,6 +20,8 @@ class BadgeDataDialog:
         self.window = None
         self.on_close = on_close
         self.show_all = badge_number == _("all_records")  # Check if we should show all records
+        self.watcher = None
+        self.row_items = {}  # Record key -> Treeview item ids
         
     def show(self):
         # If window already exists, bring it to front
@@ -112,6 +121,9 @@ class BadgeDataDialog:
         
         # Initial population of the Treeview
         self.refresh_table()
+        
+        # Keep the table in sync with changes saved from other terminals
+        self.window.after(self.WATCH_INTERVAL_MS, self.check_for_changes)
     
     def create_context_menu(self):
         """Create a context menu for right-click actions on rows."""
@@ -178,6 +190,9 @@ class BadgeDataDialog:
             if success:
                 # Remove from treeview
                 self.tree.delete(selected)
+                for items in self.row_items.values():
+                    if selected[0] in items:
+                        items.remove(selected[0])
                 messagebox.showinfo(_("success"), _("record_deleted"))
                 
                 # If we're showing all records and have filtered, refresh all_records
@@ -202,65 +217,81 @@ class BadgeDataDialog:
             self.window.destroy()
             self.window = None
     
+    def _row_values(self, record):
+        """Return the Treeview values for a record."""
+        if self.show_all:
+            # When showing all, include badge number column
+            return (
+                record.get("sicil", ""),
+                record.get("tarih", ""), 
+                record.get("giris", ""), 
+                record.get("cikis", ""), 
+                record.get("net_calisma", "")
+            )
+        # For specific badge, don't include badge number column
+        return (
+            record.get("tarih", ""), 
+            record.get("giris", ""), 
+            record.get("cikis", ""), 
+            record.get("net_calisma", "")
+        )
+    
+    def _matches(self, record):
+        """Check whether a record belongs in the table with the current filter."""
+        if not self.show_all:
+            return record.get("sicil") == self.badge_number
+        search_text = self.search_entry.get().strip().lower()
+        return not search_text or search_text in str(record.get("sicil", "")).lower()
+    
+    def _insert_row(self, record):
+        item = self.tree.insert("", "end", values=self._row_values(record))
+        self.row_items.setdefault(record_key(record), []).append(item)
+    
+    def _clear_rows(self):
+        rows = self.tree.get_children()
+        if rows:
+            self.tree.delete(*rows)
+        self.row_items = {}
+    
     def filter_records(self, event=None):
         # Filter records based on search text
         if not hasattr(self, 'search_entry') or not hasattr(self, 'all_records'):
             return
             
-        search_text = self.search_entry.get().strip().lower()
-        
         # Clear the existing rows in the Treeview
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        self._clear_rows()
         
         # Filter and re-insert records
-        for record in self.all_records:
-            sicil = str(record.get("sicil", "")).lower()
-            
-            if not search_text or search_text in sicil:
-                # Insert with standard columns
-                self.tree.insert("", "end", values=(
-                    record.get("sicil", ""),
-                    record.get("tarih", ""), 
-                    record.get("giris", ""), 
-                    record.get("cikis", ""), 
-                    record.get("net_calisma", "")
-                ))
+        with timer("badge_dialog.filter"):
+            for record in self.all_records:
+                if self._matches(record):
+                    self._insert_row(record)
         
     def refresh_table(self):
         try:
+            # Start watching before reading so no change slips in between;
+            # with a record service the local file is not the one being saved to
+            self.watcher = None if get_service_url() else RecordFileWatcher(get_file_path())
+            
             # Fetch the latest data from the JSON file
             data = self.data_provider()
+            if self.watcher is not None:
+                self.watcher.set_snapshot(data)
             
             if self.show_all:
                 filtered_data = data  # Show all records
-                self.all_records = data  # Store for filtering
+                self.all_records = list(data)  # Store for filtering
             else:
                 filtered_data = filter_by_badge(data, self.badge_number)
 
             # Clear the existing rows in the Treeview
-            for row in self.tree.get_children():
-                self.tree.delete(row)
+            self._clear_rows()
 
             # Re-insert the filtered data
-            for record in filtered_data:
-                if self.show_all:
-                    # When showing all, include badge number column
-                    self.tree.insert("", "end", values=(
-                        record.get("sicil", ""),
-                        record.get("tarih", ""), 
-                        record.get("giris", ""), 
-                        record.get("cikis", ""), 
-                        record.get("net_calisma", "")
-                    ))
-                else:
-                    # For specific badge, don't include badge number column
-                    self.tree.insert("", "end", values=(
-                        record.get("tarih", ""), 
-                        record.get("giris", ""), 
-                        record.get("cikis", ""), 
-                        record.get("net_calisma", "")
-                    ))
+            with timer("badge_dialog.populate"):
+                for record in filtered_data:
+                    if not self.show_all or self._matches(record):
+                        self._insert_row(record)
 
             # Show a message if no data is found
             if not filtered_data and not self.show_all:
@@ -268,6 +299,47 @@ class BadgeDataDialog:
                 
         except Exception as e:
             messagebox.showerror(_("error"), f"{_('error_table_refresh')}\n{e}")
+    
+    def check_for_changes(self):
+        """Apply changes made to the record file since the last check."""
+        if self.window is None or not self.window.winfo_exists():
+            return
+        
+        try:
+            if get_service_url():
+                # Saves go to the service host, so only refresh_table() updates the table
+                self.watcher = None
+            elif self.watcher is None or self.watcher.file_path != get_file_path():
+                # Another record file was opened, start over with it
+                self.refresh_table()
+            else:
+                changes = self.watcher.poll(self.data_provider)
+                if changes:
+                    self.apply_changes(*changes)
+        except Exception:
+            # A half-written file is picked up again on the next check
+            pass
+        
+        self.window.after(self.WATCH_INTERVAL_MS, self.check_for_changes)
+    
+    def apply_changes(self, added, removed):
+        """Update only the rows that changed instead of rebuilding the table."""
+        with timer("badge_dialog.apply_changes"):
+            self._apply_changes(added, removed)
+    
+    def _apply_changes(self, added, removed):
+        for record in removed:
+            items = self.row_items.get(record_key(record))
+            if items:
+                self.tree.delete(items.pop())
+            if self.show_all and record in self.all_records:
+                self.all_records.remove(record)
+        
+        for record in added:
+            if self.show_all:
+                self.all_records.append(record)
+            if self._matches(record):
+                self._insert_row(record)
 
 class JsonDataDialog:
     def __init__(self, parent, data, file_path):
@@ -306,15 +378,22 @@ class JsonDataDialog:
         window.grid_rowconfigure(0, weight=1)
         
         # Insert data into the Treeview
-        for record in self.data:
-            # Skip records without required fields
-            if not all(k in record for k in ["sicil", "tarih", "giris", "cikis", "net_calisma"]):
-                continue
-                
-            tree.insert("", "end", values=(
-                record["sicil"],
-                record["tarih"],
-                record["giris"],
-                record["cikis"],
-                record["net_calisma"]
-            ))
\ No newline at end of file
+        skipped = 0
+        with timer("json_dialog.populate"):
+            for record in self.data:
+                # Skip records without required fields
+                if not isinstance(record, dict) or not all(k in record for k in REQUIRED_FIELDS):
+                    skipped += 1
+                    continue
+                    
+                tree.insert("", "end", values=(
+                    record["sicil"],
+                    record["tarih"],
+                    record["giris"],
+                    record["cikis"],
+                    record["net_calisma"]
+                ))
+        
+        # Point at the validator instead of hiding incomplete records
+        if skipped:
+            tk.Label(window, text=_("records_skipped").format(skipped), fg="red").grid(column=0, row=2, sticky="w")
\ No newline at end of file
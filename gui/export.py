@@ -0,0 +1,102 @@
+# gui/export.py
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from core.reports import PERIODS, generate_report
+from gui.background import run_in_background
+from utils.languages import _
+
+class ExportDialog:
+    """Dialog exporting summary or detail reports of a record file to CSV or HTML."""
+
+    def __init__(self, parent, file_path=None):
+        self.parent = parent
+        self.file_path = file_path
+        self.window = None
+
+    def show(self):
+        # If window already exists, bring it to front
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(_("export_title"))
+        self.window.geometry("400x360")
+        self.window.resizable(False, False)
+
+        # Report kind
+        kind_frame = tk.LabelFrame(self.window, text=_("export_kind"), padx=10, pady=5)
+        kind_frame.pack(fill="x", padx=10, pady=5)
+        self.kind_var = tk.StringVar(value="summary")
+        tk.Radiobutton(kind_frame, text=_("export_summary"), value="summary", variable=self.kind_var).pack(anchor="w")
+        tk.Radiobutton(kind_frame, text=_("export_detail"), value="detail", variable=self.kind_var).pack(anchor="w")
+
+        # Summary period
+        period_frame = tk.Frame(kind_frame)
+        period_frame.pack(anchor="w", pady=5)
+        tk.Label(period_frame, text=_("export_period")).pack(side=tk.LEFT)
+        self.period_var = tk.StringVar(value="month")
+        ttk.Combobox(period_frame, textvariable=self.period_var, values=PERIODS,
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=5)
+
+        # Record selection
+        filter_frame = tk.LabelFrame(self.window, text=_("export_filter"), padx=10, pady=5)
+        filter_frame.pack(fill="x", padx=10, pady=5)
+
+        tk.Label(filter_frame, text=_("export_from")).grid(row=0, column=0, sticky="w", pady=2)
+        self.start_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.start_var, width=12).grid(row=0, column=1, sticky="w", padx=5)
+
+        tk.Label(filter_frame, text=_("export_to")).grid(row=1, column=0, sticky="w", pady=2)
+        self.end_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.end_var, width=12).grid(row=1, column=1, sticky="w", padx=5)
+
+        tk.Label(filter_frame, text=_("export_badges")).grid(row=2, column=0, sticky="w", pady=2)
+        self.badges_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.badges_var, width=25).grid(row=2, column=1, sticky="w", padx=5)
+
+        self.status_label = tk.Label(self.window, text="", fg="gray")
+        self.status_label.pack(pady=5)
+
+        # Buttons
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.export_button = tk.Button(button_frame, text=_("export_button"), command=self.export)
+        self.export_button.pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text=_("cancel"), command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def export(self):
+        """Ask for the target file and generate the report in the background."""
+        target_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".csv",
+            filetypes=[(_("csv_files"), "*.csv"), (_("html_files"), "*.html"), (_("all_files"), "*.*")],
+            title=_("export_title")
+        )
+        if not target_path:
+            return
+
+        badges = [b.strip() for b in self.badges_var.get().split(",") if b.strip()]
+        kwargs = {
+            "kind": self.kind_var.get(),
+            "period": self.period_var.get(),
+            "file_path": self.file_path,
+            "start": self.start_var.get().strip() or None,
+            "end": self.end_var.get().strip() or None,
+            "badges": badges or None
+        }
+
+        # The report is written in a thread so the window stays responsive
+        self.export_button.config(state="disabled")
+        self.status_label.config(text=_("export_running"))
+        run_in_background(self.window, lambda: generate_report(target_path, **kwargs),
+                          lambda count, error: self._finished(target_path, count, error))
+
+    def _finished(self, target_path, count, error):
+        self.export_button.config(state="normal")
+        self.status_label.config(text="")
+        if error is None:
+            messagebox.showinfo(_("success"), f"{_('export_done')} {count}\n{_('file_path')} {target_path}",
+                                parent=self.window)
+        else:
+            messagebox.showerror(_("error"), f"{_('export_error')}\n{error}", parent=self.window)
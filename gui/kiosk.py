@@ -0,0 +1,292 @@
+# gui/kiosk.py
+import queue
+import threading
+import time
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, messagebox
+from core.integrity import RecordConflictError
+from core.shifts import get_open_shift_table, record_completed_shift
+from core.write_buffer import flush_all, recover_journals
+from utils.instrumentation import timer
+from utils.languages import _
+
+class KioskWindow:
+    """Clock-in/clock-out terminal driven by badge scans.
+
+    Keyboard-wedge RFID and barcode readers type the badge number followed
+    by Enter. A scan opens or closes a shift in the open shift table right
+    away; completed shifts are calculated and saved by a worker thread, so
+    bursts of scans never wait for the record store. Shifts that conflict
+    with a stored shift are listed as held until they are saved anyway or
+    discarded.
+    """
+
+    # Number of punches listed on screen
+    RECENT_LIMIT = 20
+    # How often saved shifts are picked up from the worker
+    POLL_INTERVAL_MS = 200
+    # How long the last scan stays highlighted
+    MESSAGE_TIMEOUT_MS = 4000
+    # Wait before retrying a shift that could not be saved, e.g. while the record service is down
+    RETRY_SECONDS = 5
+
+    def __init__(self, parent, shift_table=None, file_path=None, on_close=None):
+        self.parent = parent
+        self.table = shift_table if shift_table is not None else get_open_shift_table()
+        self.file_path = file_path
+        self.on_close = on_close
+        self.window = None
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = None
+        self._message_job = None
+
+    def show(self, fullscreen=False):
+        # If window already exists, bring it to front
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(_("kiosk_title"))
+        self.window.geometry("700x550")
+        if fullscreen:
+            self.window.attributes("-fullscreen", True)
+
+        self.clock_label = tk.Label(self.window, text="", font=("Helvetica", 28, "bold"))
+        self.clock_label.pack(pady=(20, 5))
+
+        tk.Label(self.window, text=_("kiosk_scan_prompt"), font=("Helvetica", 14)).pack(pady=5)
+        self.scan_entry = tk.Entry(self.window, font=("Helvetica", 18), justify="center", width=20)
+        self.scan_entry.pack(pady=5)
+        self.scan_entry.bind("<Return>", self.on_scan)
+        self.scan_entry.bind("<KP_Enter>", self.on_scan)
+
+        self.message_label = tk.Label(self.window, text="", font=("Helvetica", 18, "bold"), height=2)
+        self.message_label.pack(pady=10)
+
+        # Recent punches, newest first
+        columns = ("time", "badge", "event", "hours")
+        self.tree = ttk.Treeview(self.window, columns=columns, show="headings", height=self.RECENT_LIMIT)
+        headings = {
+            "time": (_("kiosk_time"), 120),
+            "badge": (_("badge"), 120),
+            "event": (_("kiosk_event"), 120),
+            "hours": (_("net_work_hours"), 150)
+        }
+        for column, (text, width) in headings.items():
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width)
+        self.tree.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # Completed shifts that could not be saved as they are
+        self.held_frame = tk.LabelFrame(self.window, text=_("kiosk_held"), padx=10, pady=5)
+        self.held_tree = ttk.Treeview(self.held_frame, columns=("badge", "entry", "exit", "reason"),
+                                      show="headings", height=4)
+        held_headings = {
+            "badge": (_("badge"), 100),
+            "entry": (_("kiosk_in"), 130),
+            "exit": (_("kiosk_out"), 130),
+            "reason": (_("kiosk_held_reason"), 260)
+        }
+        for column, (text, width) in held_headings.items():
+            self.held_tree.heading(column, text=text)
+            self.held_tree.column(column, width=width)
+        self.held_tree.pack(fill="x")
+        held_buttons = tk.Frame(self.held_frame)
+        held_buttons.pack(fill="x", pady=(5, 0))
+        tk.Button(held_buttons, text=_("kiosk_discard"), command=self.discard_held).pack(side=tk.RIGHT, padx=5)
+        tk.Button(held_buttons, text=_("kiosk_save_anyway"), command=self.save_held_anyway).pack(side=tk.RIGHT, padx=5)
+        self.held_items = {}  # (badge, clock-out time) -> Treeview item id
+        self._refresh_held()
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        # Full screen kiosks have no title bar to close them from
+        self.window.bind("<Control-q>", lambda event: self.close())
+
+        self._worker = threading.Thread(target=self._save_loop, name="kiosk-save", daemon=True)
+        self._worker.start()
+        # Shifts completed before a crash or an unclean close
+        for badge, entry_at, exit_at in self.table.pending_shifts():
+            self._jobs.put((None, badge, entry_at, exit_at, False))
+
+        self._tick()
+        self.window.after(self.POLL_INTERVAL_MS, self._check_results)
+        self.scan_entry.focus_set()
+
+    def _tick(self):
+        if self.window is None or not self.window.winfo_exists():
+            return
+        self.clock_label.config(text=datetime.now().strftime("%H:%M:%S"))
+        self.window.after(1000, self._tick)
+
+    def on_scan(self, event=None):
+        """Clock the scanned badge in or out."""
+        badge = self.scan_entry.get().strip()
+        self.scan_entry.delete(0, tk.END)
+        if not badge:
+            return
+
+        with timer("kiosk.scan"):
+            try:
+                punch, entry_at, at = self.table.punch(badge)
+            except Exception as e:
+                self._show_message(f"{_('error')}: {e}", "red")
+                return
+
+            if punch is None:
+                self._show_message(f"{badge}: {_('kiosk_repeated_scan')}", "gray")
+                return
+
+            if punch == "in":
+                item = self._add_recent(at, badge, _("kiosk_in"), "")
+                self._show_message(f"{_('kiosk_in')}: {badge}  {at.strftime('%H:%M')}", "green")
+            else:
+                item = self._add_recent(at, badge, _("kiosk_out"), "...")
+                on_site = at - entry_at
+                hours, minutes = divmod(int(on_site.total_seconds()) // 60, 60)
+                self._show_message(f"{_('kiosk_out')}: {badge}  {at.strftime('%H:%M')}  ({hours}:{minutes:02d})", "blue")
+                self._jobs.put((item, badge, entry_at, at, False))
+
+    def _add_recent(self, at, badge, text, hours):
+        item = self.tree.insert("", 0, values=(at.strftime("%H:%M:%S"), badge, text, hours))
+        children = self.tree.get_children()
+        if len(children) > self.RECENT_LIMIT:
+            self.tree.delete(*children[self.RECENT_LIMIT:])
+        return item
+
+    def _show_message(self, text, color):
+        self.message_label.config(text=text, fg=color)
+        if self._message_job is not None:
+            self.window.after_cancel(self._message_job)
+        self._message_job = self.window.after(self.MESSAGE_TIMEOUT_MS, self._clear_message)
+
+    def _clear_message(self):
+        self._message_job = None
+        self.message_label.config(text="")
+
+    def _save(self, job):
+        """Save a completed shift; return False if it should be tried again."""
+        item, badge, entry_at, exit_at, allow_conflicts = job
+        try:
+            result = record_completed_shift(badge, entry_at, exit_at, self.file_path, allow_conflicts)
+        except RecordConflictError as e:
+            # Retrying cannot help; the shift waits in the held list for a decision
+            self.table.hold(badge, exit_at, str(e))
+            self._results.put((item, badge, e))
+            return True
+        except Exception as e:
+            self._results.put((item, badge, e))
+            return False
+        # The record is in the record file or the write buffer journal now
+        self.table.mark_saved(badge, exit_at)
+        self._results.put((item, badge, result))
+        return True
+
+    def _save_loop(self):
+        # Runs in the worker thread; results are handed back to the Tk thread
+        retries = []
+        retry_at = None
+        while True:
+            timeout = max(0.0, retry_at - time.monotonic()) if retries else None
+            try:
+                job = self._jobs.get(timeout=timeout)
+            except queue.Empty:
+                # Try the failed shifts again behind the scans queued meanwhile
+                jobs, retries = retries, []
+                retries = [job for job in jobs if not self._save(job)]
+                retry_at = time.monotonic() + self.RETRY_SECONDS
+                continue
+            if job is None:
+                # A last attempt; shifts still failing stay pending in the journal for the next start
+                for job in retries:
+                    self._save(job)
+                return
+            if not self._save(job):
+                if not retries:
+                    retry_at = time.monotonic() + self.RETRY_SECONDS
+                retries.append(job)
+
+    def _check_results(self):
+        if self.window is None or not self.window.winfo_exists():
+            return
+        while True:
+            try:
+                item, badge, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, RecordConflictError):
+                text = _("kiosk_held_status")
+                self._show_message(f"{_('record_conflict')} {badge}", "red")
+            elif isinstance(result, Exception):
+                text = _("error")
+                self._show_message(f"{_('error_save')} {badge}: {result}", "red")
+            else:
+                text = f"{result:.2f}"
+            if item is not None and self.tree.exists(item):
+                self.tree.set(item, "hours", text)
+        self._refresh_held()
+        self.window.after(self.POLL_INTERVAL_MS, self._check_results)
+
+    def _refresh_held(self):
+        """List the held shifts; the list is only shown while there are any."""
+        held = self.table.held_shifts()
+        for key in list(self.held_items):
+            if key not in held:
+                self.held_tree.delete(self.held_items.pop(key))
+        for (badge, exit_at), (entry_at, reason) in held.items():
+            if (badge, exit_at) not in self.held_items:
+                self.held_items[(badge, exit_at)] = self.held_tree.insert("", "end", values=(
+                    badge, entry_at.strftime("%Y-%m-%d %H:%M"), exit_at.strftime("%Y-%m-%d %H:%M"), reason))
+        if held and not self.held_frame.winfo_ismapped():
+            self.held_frame.pack(fill="x", padx=20, pady=(0, 10), before=self.tree)
+        elif not held and self.held_frame.winfo_ismapped():
+            self.held_frame.pack_forget()
+
+    def _selected_held(self):
+        items = set(self.held_tree.selection())
+        return [key for key, item in self.held_items.items() if item in items]
+
+    def save_held_anyway(self):
+        """Save the selected held shifts despite their conflicts."""
+        for badge, exit_at in self._selected_held():
+            # Back to pending, so the shift is kept until the save succeeds
+            entry_at = self.table.release(badge, exit_at)
+            if entry_at is not None:
+                self._jobs.put((None, badge, entry_at, exit_at, True))
+        self._refresh_held()
+
+    def discard_held(self):
+        """Drop the selected held shifts without saving them."""
+        selected = self._selected_held()
+        if not selected or not messagebox.askyesno(_("confirmation"), _("kiosk_discard_confirm"), parent=self.window):
+            return
+        for badge, exit_at in selected:
+            self.table.mark_saved(badge, exit_at)
+        self._refresh_held()
+
+    def close(self):
+        """Save the pending shifts and close the kiosk."""
+        self._jobs.put(None)
+        if self._worker is not None:
+            self._worker.join()
+        flush_all()
+        self.window.destroy()
+        self.window = None
+        if self.on_close:
+            self.on_close()
+
+def run_kiosk(fullscreen=True):
+    """Run the kiosk as the only window of the application."""
+    root = tk.Tk()
+    root.title(_("kiosk_title"))
+    root.withdraw()
+    # Write saves left in the journal by a session that did not exit cleanly
+    recover_journals()
+    kiosk = KioskWindow(root, on_close=root.destroy)
+    kiosk.show(fullscreen=fullscreen)
+    try:
+        root.mainloop()
+    finally:
+        flush_all()
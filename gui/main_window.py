@@ -1,46 +1,77 @@
 # gui/main_window.py
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
-from datetime import datetime
+from datetime import datetime, date
 import json
 import os
+from gui.background import run_in_background
 from gui.widgets import UndoRedoEntry
 from gui.menu import MenuBuilder
 from gui.dialogs import BadgeDataDialog, JsonDataDialog
-from core.time_calc import round_time, calculate_work_hours
+from core.time_calc import calculate_work_hours
+from core.intervals import format_exit_time
+from core.work_calendar import get_calendar, WEEKDAY, HOLIDAY
 from core.data import save_record, load_records, create_new_file, open_json_file
+from core.integrity import RecordConflictError
+from core.write_buffer import flush_all, recover_journals
 from utils.file_utils import set_custom_file_path
 from utils.languages import _
 
 class MainWindow:
+    # Retention first runs this long after start, so it does not slow down opening the window
+    RETENTION_START_DELAY_MS = 60000
+    # How often a running retention pass is checked for completion
+    RETENTION_POLL_MS = 1000
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title(_("app_title"))
-        self.root.geometry("600x400")
+        self.root.geometry("600x520")
         
         # Data cache for entry, exit times
         self.data_cache = {
             "entry": None,
             "exit": None,
-            "net_duration": None
+            "net_duration": None,
+            "date": None
         }
         
         # Current active file path
         self.current_file_path = None
         
-        # Track active badge dialog window
+        # Track active badge dialog and kiosk windows
         self.badge_dialog = None
+        self.kiosk = None
+        
+        # Background retention pass, see run_retention()
+        self._retention_task = None
         
         # Setup UI components
         self.setup_menu()
         self.setup_interface()
         self.setup_keyboard_shortcuts()
+        
+        # Make sure buffered saves reach the record file before the window goes away
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Write saves left in the journal by a session that did not exit cleanly
+        try:
+            recovered = recover_journals()
+            if recovered:
+                messagebox.showinfo(_("info"), f"{_('records_recovered')} {recovered}")
+        except Exception as e:
+            messagebox.showerror(_("error"), f"{_('error_recover')}\n{e}")
+        
+        # Move records past the retention period out of the record file in the background
+        self.root.after(self.RETENTION_START_DELAY_MS, self.run_retention)
     
     def setup_menu(self):
         """Setup the menu bar and its items."""
         callbacks = {
             "new_file": self.new_file,
             "open_file": self.open_file,
+            "merge_files": self.show_merge,
+            "export": self.show_export,
             "save": self.save_json,
             "undo": self.undo,
             "redo": self.redo,
@@ -50,7 +81,11 @@ class MainWindow:
             "select_all": self.select_all,
             "calculate": self.calculate,
             "badge_control": self.display_badge_data,
+            "kiosk": self.show_kiosk,
+            "status_board": self.show_status_board,
+            "occupancy": self.show_occupancy,
             "preferences": self.show_preferences,
+            "diagnostics": self.show_diagnostics,
             "help_content": self.show_help
         }
         self.menu_builder = MenuBuilder(self.root, callbacks)
@@ -66,8 +101,14 @@ class MainWindow:
         self.exit_input = UndoRedoEntry(self.root)
         self.exit_input.pack(pady=5)
 
-        # Radio buttons for weekday/weekend
-        self.weekday_var = tk.StringVar(value=_("weekday"))
+        tk.Label(self.root, text=_("shift_date_label"), font=("Helvetica", 11, "bold")).pack(pady=5)
+        self.date_input = UndoRedoEntry(self.root)
+        self.date_input.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        self.date_input.pack(pady=5)
+
+        # Radio buttons for weekday/weekend; "auto" takes the day type from the work calendar
+        self.weekday_var = tk.StringVar(value=_("day_type_auto"))
+        tk.Radiobutton(self.root, text=_("day_type_auto"), variable=self.weekday_var, value=_("day_type_auto")).pack()
         tk.Radiobutton(self.root, text=_("weekday"), variable=self.weekday_var, value=_("weekday")).pack()
         tk.Radiobutton(self.root, text=_("weekend"), variable=self.weekday_var, value=_("weekend")).pack()
 
@@ -103,7 +144,20 @@ class MainWindow:
     
     def run(self):
         """Start the main event loop."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # File > Quit only stops the loop; flush before the process exits
+            flush_all()
+    
+    def on_close(self):
+        """Flush buffered saves and close the main window."""
+        try:
+            flush_all()
+        except Exception as e:
+            if not messagebox.askyesno(_("error"), f"{_('error_save')}\n{e}\n\n{_('quit_anyway')}"):
+                return
+        self.root.destroy()
     
     # Edit functions
     def undo(self):
@@ -160,15 +214,25 @@ class MainWindow:
         try:
             entry = self.entry_input.get()
             exit = self.exit_input.get()
-            is_weekday = self.weekday_var.get() == _("weekday")
-            rounded_entry = round_time(datetime.strptime(entry, "%H:%M"))
-            rounded_exit = round_time(datetime.strptime(exit, "%H:%M"))
+            shift_date = date.fromisoformat(self.date_input.get().strip()).isoformat()
+            
+            if self.weekday_var.get() == _("day_type_auto"):
+                day_type = get_calendar().day_type(shift_date)
+                is_weekday = day_type == WEEKDAY
+                day_label = _("weekday") if is_weekday else _("holiday") if day_type == HOLIDAY else _("weekend")
+            else:
+                is_weekday = self.weekday_var.get() == _("weekday")
+                day_label = self.weekday_var.get()
             
             sonuc = calculate_work_hours(entry, exit, is_weekday, self.data_cache)
+            self.data_cache["date"] = shift_date
+            rounded_entry = self.data_cache["entry"]
+            rounded_exit = self.data_cache["exit"]
             self.result_label.config(
                 text=f"{_('net_work_time')} {sonuc}\n"
                      f"{_('rounded_entry')} {rounded_entry.strftime('%H:%M')}\n"
-                     f"{_('rounded_exit')} {rounded_exit.strftime('%H:%M')}"
+                     f"{_('rounded_exit')} {format_exit_time(rounded_entry, rounded_exit)}\n"
+                     f"{_('day_type')} {day_label}"
             )
         except Exception as e:
             messagebox.showerror(_("error"), f"{_('invalid_time')} {e}")
@@ -185,10 +249,13 @@ class MainWindow:
                 return
             
             # Use current_file_path if it exists, otherwise use default
-            if self.current_file_path:
+            try:
                 file_path = save_record(sicil_no, self.data_cache, self.current_file_path)
-            else:
-                file_path = save_record(sicil_no, self.data_cache)
+            except RecordConflictError as e:
+                if not messagebox.askyesno(_("warning"), f"{_('record_conflict')}\n{e}\n\n{_('save_anyway')}"):
+                    messagebox.showinfo(_("info"), _("record_cancelled"))
+                    return
+                file_path = save_record(sicil_no, self.data_cache, self.current_file_path, allow_conflicts=True)
             
             messagebox.showinfo(_("success"), f"{_('record_success')}\n{_('file_path')} {file_path}")
         except Exception as e:
@@ -266,12 +333,73 @@ class MainWindow:
         except Exception as e:
             messagebox.showerror(_("error"), f"{_('error_file_open')}\n{e}")
 
+    def show_merge(self):
+        """Display the dialog merging several record files into one."""
+        from gui.merge import MergeDialog
+        dialog = MergeDialog(self.root, self.current_file_path)
+        dialog.show()
+
+    def run_retention(self):
+        """Apply the retention policy to the active record file in a background thread."""
+        from core.retention import is_enabled, retention_settings
+        settings = retention_settings()
+        interval_ms = max(1, int(settings.get("interval_hours") or 24)) * 3600 * 1000
+        if is_enabled() and (self._retention_task is None or not self._retention_task.running):
+            self._retention_task = run_in_background(
+                self.root, lambda: self._apply_retention(settings), self._retention_finished,
+                self.RETENTION_POLL_MS)
+        self.root.after(interval_ms, self.run_retention)
+
+    def _apply_retention(self, settings):
+        from core.retention import apply_retention
+        return apply_retention(self.current_file_path, keep_years=settings["keep_years"],
+                               archive=settings["archive"], archive_dir=settings.get("archive_dir"))
+
+    def _retention_finished(self, summary, error):
+        # A successful pass is silent; a failing one is retried on the next run
+        if error is not None:
+            messagebox.showerror(_("error"), f"{_('retention_error')}\n{error}")
+
     def show_preferences(self):
         """Display the preferences dialog."""
         from gui.preferences import PreferencesDialog, preferences
         dialog = PreferencesDialog(self.root, preferences)
         dialog.show()
 
+    def show_kiosk(self):
+        """Open the badge scan kiosk for the active record file."""
+        from gui.kiosk import KioskWindow
+        if self.kiosk is None:
+            def on_kiosk_close():
+                self.kiosk = None
+            self.kiosk = KioskWindow(self.root, file_path=self.current_file_path, on_close=on_kiosk_close)
+        self.kiosk.show()
+
+    def show_status_board(self):
+        """Display who is currently on site."""
+        from gui.status_board import StatusBoardDialog
+        dialog = StatusBoardDialog(self.root)
+        dialog.show()
+
+    def show_occupancy(self):
+        """Display the occupancy heatmap of the active record file."""
+        from gui.occupancy import OccupancyDialog
+        dialog = OccupancyDialog(self.root, self.current_file_path)
+        dialog.show()
+
+    def show_export(self):
+        """Display the report export dialog for the active record file."""
+        from gui.export import ExportDialog
+        dialog = ExportDialog(self.root, self.current_file_path)
+        dialog.show()
+
+    def show_diagnostics(self):
+        """Display the diagnostics window with the collected metrics."""
+        from gui.diagnostics import DiagnosticsDialog
+        from gui.preferences import preferences
+        dialog = DiagnosticsDialog(self.root, preferences)
+        dialog.show()
+
     def show_help(self):
         """Display the help content dialog."""
         from gui.help import HelpDialog
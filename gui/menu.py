@@ -20,6 +20,9 @@ class MenuBuilder:
         self.menu_bar.add_cascade(label=_("file"), menu=file_menu)
         file_menu.add_command(label=_("new_file"), command=self.callbacks["new_file"])
         file_menu.add_command(label=_("open_file"), command=self.callbacks["open_file"])
+        file_menu.add_command(label=_("merge_files"), command=self.callbacks["merge_files"])
+        file_menu.add_separator()
+        file_menu.add_command(label=_("export_menu"), command=self.callbacks["export"])
         file_menu.add_separator()
         file_menu.add_command(label=_("quit"), command=self.root.quit)
         
@@ -41,6 +44,10 @@ class MenuBuilder:
         tools_menu.add_command(label=_("tools_calculate"), command=self.callbacks["calculate"])
         tools_menu.add_command(label=_("save"), command=self.callbacks["save"])
         tools_menu.add_command(label=_("tools_badge_control"), command=self.callbacks["badge_control"])
+        tools_menu.add_command(label=_("tools_kiosk"), command=self.callbacks["kiosk"])
+        tools_menu.add_command(label=_("tools_status_board"), command=self.callbacks["status_board"])
+        tools_menu.add_command(label=_("tools_occupancy"), command=self.callbacks["occupancy"])
+        tools_menu.add_command(label=_("tools_diagnostics"), command=self.callbacks["diagnostics"])
         tools_menu.add_separator()
         tools_menu.add_command(label=_("preferences"), command=self.callbacks["preferences"])
         
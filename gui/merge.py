@@ -0,0 +1,98 @@
+# gui/merge.py
+import os
+import tkinter as tk
+from tkinter import messagebox, filedialog
+from core.merge import merge_files
+from gui.background import run_in_background
+from utils.languages import _
+
+class MergeDialog:
+    """Dialog merging the record files of several sites into one store."""
+
+    def __init__(self, parent, file_path=None):
+        self.parent = parent
+        self.file_path = file_path
+        self.window = None
+
+    def show(self):
+        # If window already exists, bring it to front
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(_("merge_title"))
+        self.window.geometry("500x360")
+
+        # Record files to merge, the active one first
+        sources_frame = tk.LabelFrame(self.window, text=_("merge_sources"), padx=10, pady=5)
+        sources_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.sources_list = tk.Listbox(sources_frame, selectmode=tk.EXTENDED)
+        self.sources_list.pack(side=tk.LEFT, fill="both", expand=True)
+        if self.file_path:
+            self.sources_list.insert(tk.END, self.file_path)
+        source_buttons = tk.Frame(sources_frame)
+        source_buttons.pack(side=tk.LEFT, fill="y", padx=(10, 0))
+        tk.Button(source_buttons, text=_("merge_add"), command=self.add_sources).pack(fill="x", pady=2)
+        tk.Button(source_buttons, text=_("merge_remove"), command=self.remove_sources).pack(fill="x", pady=2)
+
+        self.dedupe_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.window, text=_("merge_dedupe"), variable=self.dedupe_var).pack(anchor="w", padx=10)
+
+        self.status_label = tk.Label(self.window, text="", fg="gray")
+        self.status_label.pack(pady=5)
+
+        # Buttons
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.merge_button = tk.Button(button_frame, text=_("merge_button"), command=self.merge)
+        self.merge_button.pack(side=tk.RIGHT, padx=5)
+        tk.Button(button_frame, text=_("cancel"), command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def add_sources(self):
+        file_paths = filedialog.askopenfilenames(
+            parent=self.window,
+            filetypes=[(_("json_files"), "*.json"), (_("all_files"), "*.*")],
+            title=_("merge_sources")
+        )
+        present = set(self.sources_list.get(0, tk.END))
+        for file_path in file_paths:
+            if file_path not in present:
+                self.sources_list.insert(tk.END, file_path)
+
+    def remove_sources(self):
+        for index in reversed(self.sources_list.curselection()):
+            self.sources_list.delete(index)
+
+    def merge(self):
+        """Ask for the target store and merge the sources into it in the background."""
+        sources = list(self.sources_list.get(0, tk.END))
+        if len(sources) < 2:
+            messagebox.showerror(_("error"), _("merge_too_few"), parent=self.window)
+            return
+        target_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[(_("json_files"), "*.json"), (_("all_files"), "*.*")],
+            title=_("merge_title")
+        )
+        if not target_path:
+            return
+
+        # The merge runs in a thread so the window stays responsive
+        dedupe = self.dedupe_var.get()
+        self.merge_button.config(state="disabled")
+        self.status_label.config(text=_("merge_running"))
+        run_in_background(self.window, lambda: merge_files(sources, target_path, dedupe=dedupe),
+                          lambda summary, error: self._finished(target_path, summary, error))
+
+    def _finished(self, target_path, summary, error):
+        self.merge_button.config(state="normal")
+        self.status_label.config(text="")
+        if error is None:
+            messagebox.showinfo(_("success"),
+                                f"{_('merge_done')} {summary['written']} ({_('merge_duplicates')} "
+                                f"{summary['duplicates']})\n{_('file_path')} {os.path.abspath(target_path)}",
+                                parent=self.window)
+        else:
+            messagebox.showerror(_("error"), f"{_('merge_error')}\n{error}", parent=self.window)
@@ -0,0 +1,152 @@
+# gui/occupancy.py
+import tkinter as tk
+from datetime import date, timedelta
+from tkinter import messagebox
+from core.occupancy import occupancy_for_range
+from gui.background import run_in_background
+from utils.languages import _
+
+def heat_color(value, peak):
+    """Return a white-to-dark-red color for a count relative to the peak."""
+    if peak <= 0 or value <= 0:
+        return "#ffffff"
+    level = value / peak
+    green_blue = int(255 * (1 - level) ** 1.5)
+    red = int(255 - 100 * max(0.0, level - 0.5) * 2)
+    return f"#{red:02x}{green_blue:02x}{green_blue:02x}"
+
+class OccupancyDialog:
+    """Heatmap of the people at work in every 15-minute slot, one row per day."""
+
+    # Size of the heatmap area; cells are scaled to fit it
+    MAP_WIDTH = 672
+    MAP_HEIGHT = 372
+    LABEL_WIDTH = 80
+    HEADER_HEIGHT = 20
+
+    def __init__(self, parent, file_path=None):
+        self.parent = parent
+        self.file_path = file_path
+        self.window = None
+        self.occupancy = None
+        self.image = None
+
+    def show(self):
+        # If window already exists, bring it to front
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(_("occupancy_title"))
+        self.window.geometry("800x520")
+
+        # Date range, the current month by default
+        today = date.today()
+        first = today.replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        range_frame = tk.Frame(self.window)
+        range_frame.pack(fill="x", padx=10, pady=10)
+        tk.Label(range_frame, text=_("export_from")).pack(side=tk.LEFT)
+        self.start_var = tk.StringVar(value=first.isoformat())
+        tk.Entry(range_frame, textvariable=self.start_var, width=12).pack(side=tk.LEFT, padx=5)
+        tk.Label(range_frame, text=_("export_to")).pack(side=tk.LEFT)
+        self.end_var = tk.StringVar(value=last.isoformat())
+        tk.Entry(range_frame, textvariable=self.end_var, width=12).pack(side=tk.LEFT, padx=5)
+        tk.Button(range_frame, text=_("occupancy_today"), command=self.show_today).pack(side=tk.LEFT, padx=5)
+        self.show_button = tk.Button(range_frame, text=_("occupancy_show"), command=self.refresh)
+        self.show_button.pack(side=tk.LEFT, padx=5)
+
+        self.canvas = tk.Canvas(self.window, width=self.LABEL_WIDTH + self.MAP_WIDTH,
+                                height=self.HEADER_HEIGHT + self.MAP_HEIGHT, bg="white", highlightthickness=0)
+        self.canvas.pack(padx=10)
+        self.canvas.bind("<Motion>", self.on_motion)
+
+        self.status_label = tk.Label(self.window, text="", fg="gray")
+        self.status_label.pack(pady=5)
+
+        self.refresh()
+
+    def show_today(self):
+        today = date.today().isoformat()
+        self.start_var.set(today)
+        self.end_var.set(today)
+        self.refresh()
+
+    def refresh(self):
+        """Compute the occupancy of the selected range in the background."""
+        try:
+            start = date.fromisoformat(self.start_var.get().strip())
+            end = date.fromisoformat(self.end_var.get().strip())
+        except ValueError:
+            messagebox.showerror(_("error"), _("occupancy_invalid_range"), parent=self.window)
+            return
+        if end < start:
+            messagebox.showerror(_("error"), _("occupancy_invalid_range"), parent=self.window)
+            return
+
+        self.show_button.config(state="disabled")
+        self.status_label.config(text=_("occupancy_running"))
+        run_in_background(self.window, lambda: occupancy_for_range(start, end, self.file_path), self._finished)
+
+    def _finished(self, occupancy, error):
+        self.show_button.config(state="normal")
+        if error is not None:
+            self.status_label.config(text="")
+            messagebox.showerror(_("error"), f"{_('error_file_open')}\n{error}", parent=self.window)
+            return
+        self.occupancy = occupancy
+        self.draw()
+
+    def draw(self):
+        """Draw the heatmap as one image, a pixel per slot scaled up to the cell size."""
+        occupancy = self.occupancy
+        self.canvas.delete("all")
+        slots = occupancy.slots_per_day
+        self.cell_width = max(1, self.MAP_WIDTH // slots)
+        self.cell_height = max(1, min(24, self.MAP_HEIGHT // occupancy.days))
+        peak = occupancy.peak()
+        peak_count = peak[0] if peak else 0
+
+        image = tk.PhotoImage(width=slots, height=occupancy.days)
+        rows = []
+        for day in range(occupancy.days):
+            rows.append("{" + " ".join(heat_color(count, peak_count) for count in occupancy.row(day)) + "}")
+        image.put(" ".join(rows))
+        self.image = image.zoom(self.cell_width, self.cell_height)
+        self.canvas.create_image(self.LABEL_WIDTH, self.HEADER_HEIGHT, image=self.image, anchor="nw")
+
+        # Hours across the top, every two hours
+        slots_per_hour = 60 // occupancy.slot_minutes
+        for slot in range(0, slots, 2 * slots_per_hour):
+            x = self.LABEL_WIDTH + slot * self.cell_width
+            self.canvas.create_text(x, self.HEADER_HEIGHT - 2, text=occupancy.slot_label(slot),
+                                    anchor="sw", font=("Helvetica", 8))
+        # Dates down the side, as often as they fit
+        step = max(1, -(-12 // self.cell_height))
+        for day in range(0, occupancy.days, step):
+            y = self.HEADER_HEIGHT + day * self.cell_height + self.cell_height / 2
+            self.canvas.create_text(self.LABEL_WIDTH - 5, y, text=occupancy.date(day).isoformat(),
+                                    anchor="e", font=("Helvetica", 8))
+
+        if peak_count:
+            count, peak_date, slot = peak
+            self.status_label.config(
+                text=f"{_('occupancy_peak')}: {count} ({peak_date.isoformat()} {occupancy.slot_label(slot)})")
+        else:
+            self.status_label.config(text=_("occupancy_empty"))
+
+    def on_motion(self, event):
+        """Show the count of the slot under the pointer."""
+        occupancy = self.occupancy
+        if occupancy is None:
+            return
+        slot = (event.x - self.LABEL_WIDTH) // self.cell_width
+        day = (event.y - self.HEADER_HEIGHT) // self.cell_height
+        if not (0 <= slot < occupancy.slots_per_day and 0 <= day < occupancy.days):
+            return
+        count = occupancy.counts[day * occupancy.slots_per_day + slot]
+        end_label = occupancy.slot_label(slot + 1) if slot + 1 < occupancy.slots_per_day else "24:00"
+        self.status_label.config(
+            text=f"{occupancy.date(day).isoformat()} {occupancy.slot_label(slot)}-{end_label}: "
+                 f"{count} {_('occupancy_people')}")
@@ -4,9 +4,11 @@ from tkinter import ttk, messagebox
 import json
 import os
 import platform
+from contextlib import contextmanager
 from pathlib import Path
 from utils.languages import language_manager, _
 from utils.file_utils import get_file_path
+from utils import instrumentation
 
 class PreferencesManager:
     """Manage application preferences."""
@@ -15,6 +17,30 @@ class PreferencesManager:
         "language": "tr",  # Default language (Turkish)
         "rounding_algorithm": "standard",  # Standard 15-minute rounding
         "file_path": None,  # Default file path will be handled by get_file_path
+        "write_buffer_latency_ms": 200,  # Saves are batched for at most this long; 0 writes each save at once
+        "write_buffer_max_records": 100,  # Write a batch early once this many saves are queued
+        "reject_conflicts": True,  # Refuse saves that repeat or overlap a stored shift of the badge
+        "departments": {},  # Department name -> list of badge numbers, for the status board
+        "service_url": None,  # Record service (python cli.py serve) used instead of the file, e.g. http://127.0.0.1:8765
+        "instrumentation": False,  # Collect performance metrics (see Tools > Diagnostics)
+        "retention": {
+            "enabled": False,  # Move old records out of the record file in the background
+            "keep_years": 2,  # The current year and this many years before stay in the record file
+            "archive": True,  # Archive expired records, one .jsonl.gz file per year; delete them if False
+            "archive_dir": None,  # Defaults to "<record file name>_archive" next to the record file
+            "interval_hours": 24  # How often retention runs while the application is open
+        },
+        "calendar": {
+            "weekend_days": [5, 6],  # Monday is 0
+            "holiday_file": None  # Text file with one YYYY-MM-DD date per line
+        },
+        # Overtime and premium rules, see core/pay_rules.py
+        "pay_rules": [
+            {"name": "overtime", "type": "daily_over", "hours": 8, "multiplier": 1.5},
+            {"name": "weekly_overtime", "type": "weekly_over", "hours": 45, "multiplier": 1.5},
+            {"name": "weekend", "type": "day_type", "day_types": ["weekend"], "multiplier": 1.5},
+            {"name": "holiday", "type": "day_type", "day_types": ["holiday"], "multiplier": 2.0}
+        ],
         "breaks": {
             "weekday": {
                 "lunch": {"start_time": "13:00", "end_time": "13:45", "enabled": True},
@@ -29,9 +55,15 @@ class PreferencesManager:
     
     def __init__(self):
         self.preferences = self.load_preferences()
+        # Pending changes and nesting depth of batch() blocks
+        self._dirty = False
+        self._batch_depth = 0
         # Set the language based on preferences
         if "language" in self.preferences:
             language_manager.set_language(self.preferences["language"])
+        # Enable instrumentation if requested (WHC_INSTRUMENT enables it too)
+        if self.preferences.get("instrumentation"):
+            instrumentation.set_enabled(True)
     
     def get_preferences_path(self):
         """Get the path to the preferences file."""
@@ -60,27 +92,73 @@ class PreferencesManager:
             # If there's any error, return defaults
             return self.DEFAULT_PREFERENCES.copy()
     
+    @instrumentation.instrument("preferences.save")
     def save_preferences(self):
-        """Save current preferences to file."""
+        """Save current preferences to file.
+        
+        The file is written to a temporary file first and then moved over
+        the old one, so a crash never leaves a half-written preferences file.
+        """
         try:
             preferences_path = self.get_preferences_path()
-            with open(preferences_path, "w", encoding="utf-8") as f:
+            tmp_path = preferences_path.with_name(preferences_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
                 json.dump(self.preferences, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, preferences_path)
+            self._dirty = False
             return True
         except Exception:
             return False
     
+    def flush(self):
+        """Write pending changes to file, if there are any."""
+        if not self._dirty:
+            return True
+        return self.save_preferences()
+    
+    @contextmanager
+    def batch(self):
+        """Group several changes into a single write.
+        
+        Changes made inside the block are kept in memory and written once
+        when the outermost block exits:
+        
+            with preferences.batch():
+                preferences.set("language", "en")
+                preferences.set("rounding_algorithm", "floor")
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+    
+    def _commit(self, autosave=True):
+        """Mark preferences as changed and save unless writes are deferred."""
+        self._dirty = True
+        if not autosave or self._batch_depth:
+            return True
+        return self.save_preferences()
+    
     def get(self, key, default=None):
         """Get a preference value."""
         return self.preferences.get(key, default)
     
-    def set(self, key, value):
-        """Set a preference value."""
+    def set(self, key, value, autosave=True):
+        """Set a preference value.
+        
+        Args:
+            key: Preference key
+            value: New value
+            autosave: Write the file now; pass False to defer until flush()
+        """
         self.preferences[key] = value
         # If language is changed, update the language manager
         if key == "language":
             language_manager.set_language(value)
-        return self.save_preferences()
+        return self._commit(autosave)
         
     def get_break_info(self, break_type, is_weekday=True):
         """Get break information based on day type.
@@ -94,7 +172,7 @@ class PreferencesManager:
         day_breaks = breaks.get(day_type, {})
         return day_breaks.get(break_type, {})
     
-    def set_break_info(self, break_type, start_time, end_time, enabled, is_weekday=True):
+    def set_break_info(self, break_type, start_time, end_time, enabled, is_weekday=True, autosave=True):
         """Set break information for specific day type.
         
         Args:
@@ -103,6 +181,7 @@ class PreferencesManager:
             end_time: End time of break (HH:MM)
             enabled: Whether break is enabled
             is_weekday: True for weekday, False for weekend
+            autosave: Write the file now; pass False to defer until flush()
         """
         day_type = "weekday" if is_weekday else "weekend"
         
@@ -120,7 +199,41 @@ class PreferencesManager:
             "end_time": end_time,
             "enabled": enabled
         }
-        return self.save_preferences()
+        return self._commit(autosave)
+    
+    def get_breaks(self, is_weekday=True):
+        """Get all named breaks of a day type.
+        
+        Returns:
+            dict: Break name -> {"start_time", "end_time", "enabled"}
+        """
+        day_type = "weekday" if is_weekday else "weekend"
+        return dict(self.preferences.get("breaks", {}).get(day_type, {}))
+    
+    def set_breaks(self, breaks, is_weekday=True, autosave=True):
+        """Replace all breaks of a day type.
+        
+        Args:
+            breaks: Dictionary of break name -> {"start_time", "end_time", "enabled"}
+            is_weekday: True for weekday, False for weekend
+            autosave: Write the file now; pass False to defer until flush()
+        """
+        day_type = "weekday" if is_weekday else "weekend"
+        self.preferences.setdefault("breaks", {})[day_type] = {
+            name: {
+                "start_time": info["start_time"],
+                "end_time": info["end_time"],
+                "enabled": info.get("enabled", True)
+            }
+            for name, info in breaks.items()
+        }
+        return self._commit(autosave)
+    
+    def remove_break(self, break_type, is_weekday=True, autosave=True):
+        """Remove a named break from a day type."""
+        day_type = "weekday" if is_weekday else "weekend"
+        self.preferences.get("breaks", {}).get(day_type, {}).pop(break_type, None)
+        return self._commit(autosave)
     
     def get_record_file_path(self):
         """Get the path to the records file."""
@@ -146,7 +259,7 @@ class PreferencesDialog:
         # Create a new window for preferences
         self.window = tk.Toplevel(self.parent)
         self.window.title(_("preferences_title"))
-        self.window.geometry("500x550")
+        self.window.geometry("500x600")
         self.window.resizable(False, False)
         
         # Create a notebook (tabbed interface)
@@ -157,10 +270,14 @@ class PreferencesDialog:
         general_tab = ttk.Frame(notebook)
         weekday_breaks_tab = ttk.Frame(notebook)
         weekend_breaks_tab = ttk.Frame(notebook)
+        calendar_tab = ttk.Frame(notebook)
+        retention_tab = ttk.Frame(notebook)
         
         notebook.add(general_tab, text=_("preferences_general"))
         notebook.add(weekday_breaks_tab, text=_("preferences_weekday_breaks"))
         notebook.add(weekend_breaks_tab, text=_("preferences_weekend_breaks"))
+        notebook.add(calendar_tab, text=_("preferences_calendar"))
+        notebook.add(retention_tab, text=_("preferences_retention"))
         
         # Populate general tab
         self.setup_general_tab(general_tab)
@@ -169,6 +286,12 @@ class PreferencesDialog:
         self.setup_breaks_tab(weekday_breaks_tab, is_weekday=True)
         self.setup_breaks_tab(weekend_breaks_tab, is_weekday=False)
         
+        # Populate calendar tab
+        self.setup_calendar_tab(calendar_tab)
+        
+        # Populate retention tab
+        self.setup_retention_tab(retention_tab)
+        
         # Create buttons at the bottom
         button_frame = tk.Frame(self.window)
         button_frame.pack(fill="x", padx=10, pady=(0, 10))
@@ -220,6 +343,16 @@ class PreferencesDialog:
         reset_button = tk.Button(file_path_frame, text=_("reset_to_default"), command=self.reset_file_path)
         reset_button.pack(anchor="e", pady=5)
         
+        # Record service used instead of the file when set
+        service_frame = tk.Frame(file_path_frame)
+        service_frame.pack(fill="x", pady=5)
+        tk.Label(service_frame, text=_("service_url")).pack(side=tk.LEFT)
+        self.service_url_var = tk.StringVar(value=self.prefs.get("service_url") or "")
+        tk.Entry(service_frame, textvariable=self.service_url_var, width=30).pack(side=tk.LEFT, fill="x", expand=True, padx=5)
+        
+        self.reject_conflicts_var = tk.BooleanVar(value=self.prefs.get("reject_conflicts", True))
+        tk.Checkbutton(file_path_frame, text=_("reject_conflicts"), variable=self.reject_conflicts_var).pack(anchor="w")
+        
         # Rounding algorithm selection
         round_frame = tk.LabelFrame(tab, text=_("preferences_rounding"), padx=10, pady=10)
         round_frame.pack(fill="x", padx=10, pady=10)
@@ -256,6 +389,104 @@ class PreferencesDialog:
         """Reset file path to default."""
         self.file_path_var.set("")
     
+    def setup_calendar_tab(self, tab):
+        """Set up the work calendar tab."""
+        calendar_settings = self.prefs.get("calendar") or {}
+        
+        # Weekend days
+        weekend_frame = tk.LabelFrame(tab, text=_("weekend_days"), padx=10, pady=10)
+        weekend_frame.pack(fill="x", padx=10, pady=10)
+        
+        weekend_days = calendar_settings.get("weekend_days", [5, 6])
+        day_names = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+        self.weekend_day_vars = []
+        for index, name in enumerate(day_names):
+            var = tk.BooleanVar(value=index in weekend_days)
+            tk.Checkbutton(weekend_frame, text=_(name), variable=var).grid(row=index // 4, column=index % 4, sticky="w")
+            self.weekend_day_vars.append(var)
+        
+        # Holiday file
+        holiday_frame = tk.LabelFrame(tab, text=_("holiday_file"), padx=10, pady=10)
+        holiday_frame.pack(fill="x", padx=10, pady=10)
+        
+        self.holiday_file_var = tk.StringVar(value=calendar_settings.get("holiday_file") or "")
+        
+        holiday_display_frame = tk.Frame(holiday_frame)
+        holiday_display_frame.pack(fill="x", pady=5)
+        
+        holiday_entry = tk.Entry(holiday_display_frame, textvariable=self.holiday_file_var, width=30)
+        holiday_entry.pack(side=tk.LEFT, fill="x", expand=True, padx=(0, 5))
+        
+        browse_button = tk.Button(holiday_display_frame, text=_("browse"), command=self.browse_holiday_file)
+        browse_button.pack(side=tk.LEFT)
+        
+        tk.Label(holiday_frame, text=_("holiday_file_hint"), fg="gray", justify="left").pack(anchor="w")
+    
+    def browse_holiday_file(self):
+        """Browse for a holiday file."""
+        from tkinter import filedialog
+        
+        file_path = filedialog.askopenfilename(
+            filetypes=[(_("text_files"), "*.txt"), (_("all_files"), "*.*")],
+            title=_("holiday_file")
+        )
+        
+        if file_path:
+            self.holiday_file_var.set(file_path)
+    
+    def setup_retention_tab(self, tab):
+        """Set up the record retention tab."""
+        settings = dict(self.prefs.DEFAULT_PREFERENCES["retention"])
+        settings.update(self.prefs.get("retention") or {})
+        
+        retention_frame = tk.LabelFrame(tab, text=_("retention"), padx=10, pady=10)
+        retention_frame.pack(fill="x", padx=10, pady=10)
+        
+        self.retention_enabled_var = tk.BooleanVar(value=settings["enabled"])
+        tk.Checkbutton(retention_frame, text=_("retention_enabled"), variable=self.retention_enabled_var).grid(
+            row=0, column=0, columnspan=2, sticky="w")
+        
+        tk.Label(retention_frame, text=_("retention_keep_years")).grid(row=1, column=0, sticky="w", pady=5)
+        self.retention_keep_years_var = tk.StringVar(value=str(settings["keep_years"]))
+        tk.Spinbox(retention_frame, from_=0, to=100, textvariable=self.retention_keep_years_var, width=5).grid(
+            row=1, column=1, sticky="w", padx=10)
+        
+        tk.Label(retention_frame, text=_("retention_interval_hours")).grid(row=2, column=0, sticky="w", pady=5)
+        self.retention_interval_var = tk.StringVar(value=str(settings["interval_hours"]))
+        tk.Entry(retention_frame, textvariable=self.retention_interval_var, width=5).grid(
+            row=2, column=1, sticky="w", padx=10)
+        
+        # What happens to expired records
+        expired_frame = tk.LabelFrame(tab, text=_("retention_expired"), padx=10, pady=10)
+        expired_frame.pack(fill="x", padx=10, pady=10)
+        
+        self.retention_archive_var = tk.BooleanVar(value=settings["archive"])
+        tk.Radiobutton(expired_frame, text=_("retention_archive"), value=True,
+                       variable=self.retention_archive_var).pack(anchor="w")
+        tk.Radiobutton(expired_frame, text=_("retention_delete"), value=False,
+                       variable=self.retention_archive_var).pack(anchor="w")
+        
+        tk.Label(expired_frame, text=_("retention_archive_dir")).pack(anchor="w", pady=(5, 0))
+        archive_dir_frame = tk.Frame(expired_frame)
+        archive_dir_frame.pack(fill="x", pady=5)
+        self.retention_archive_dir_var = tk.StringVar(value=settings.get("archive_dir") or "")
+        archive_dir_entry = tk.Entry(archive_dir_frame, textvariable=self.retention_archive_dir_var, width=30)
+        archive_dir_entry.pack(side=tk.LEFT, fill="x", expand=True, padx=(0, 5))
+        browse_button = tk.Button(archive_dir_frame, text=_("browse"), command=self.browse_archive_dir)
+        browse_button.pack(side=tk.LEFT)
+        
+        tk.Label(expired_frame, text=_("retention_archive_hint"), fg="gray", justify="left",
+                 wraplength=400).pack(anchor="w")
+    
+    def browse_archive_dir(self):
+        """Browse for the retention archive directory."""
+        from tkinter import filedialog
+        
+        directory = filedialog.askdirectory(title=_("retention_archive_dir"))
+        
+        if directory:
+            self.retention_archive_dir_var.set(directory)
+    
     def setup_breaks_tab(self, tab, is_weekday):
         """Set up the breaks configuration tab."""
         day_type = _("weekday") if is_weekday else _("weekend")
@@ -363,49 +594,88 @@ class PreferencesDialog:
                                     f"{field_name}: {time_str} {_('invalid_time_format')}")
                 return
         
+        # Validate the holiday file so a typo does not silently disable holidays
+        holiday_file = self.holiday_file_var.get().strip()
+        if holiday_file:
+            try:
+                from core.work_calendar import load_holidays
+                load_holidays(holiday_file)
+            except (OSError, ValueError) as e:
+                messagebox.showerror(_("error"), f"{_('holiday_file')}: {e}")
+                return
+        
+        # Validate the retention period and interval
+        try:
+            keep_years = int(self.retention_keep_years_var.get())
+            interval_hours = int(self.retention_interval_var.get())
+            if keep_years < 0 or interval_hours < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror(_("error"), _("retention_invalid"))
+            return
+        
         # Save preferences
         old_language = self.prefs.get("language")
         new_language = self.lang_var.get()
         
-        self.prefs.set("language", new_language)
-        self.prefs.set("rounding_algorithm", self.round_var.get())
-        
-        # Save file path preference
-        self.prefs.set("file_path", self.file_path_var.get())
-        
-        # Save weekday break settings
-        self.prefs.set_break_info(
-            "lunch",
-            self.weekday_lunch_start_var.get(),
-            self.weekday_lunch_end_var.get(),
-            self.weekday_lunch_enabled_var.get(),
-            is_weekday=True
-        )
-        
-        self.prefs.set_break_info(
-            "dinner",
-            self.weekday_dinner_start_var.get(),
-            self.weekday_dinner_end_var.get(),
-            self.weekday_dinner_enabled_var.get(),
-            is_weekday=True
-        )
-        
-        # Save weekend break settings
-        self.prefs.set_break_info(
-            "lunch",
-            self.weekend_lunch_start_var.get(),
-            self.weekend_lunch_end_var.get(),
-            self.weekend_lunch_enabled_var.get(),
-            is_weekday=False
-        )
-        
-        self.prefs.set_break_info(
-            "dinner",
-            self.weekend_dinner_start_var.get(),
-            self.weekend_dinner_end_var.get(),
-            self.weekend_dinner_enabled_var.get(),
-            is_weekday=False
-        )
+        # Apply all changes in one batch so the file is written only once
+        with self.prefs.batch():
+            self.prefs.set("language", new_language)
+            self.prefs.set("rounding_algorithm", self.round_var.get())
+        
+            # Save file path preference
+            self.prefs.set("file_path", self.file_path_var.get())
+            self.prefs.set("service_url", self.service_url_var.get().strip() or None)
+            self.prefs.set("reject_conflicts", self.reject_conflicts_var.get())
+        
+            # Save work calendar settings
+            self.prefs.set("calendar", {
+                "weekend_days": [day for day, var in enumerate(self.weekend_day_vars) if var.get()],
+                "holiday_file": holiday_file or None
+            })
+        
+            # Save retention settings
+            self.prefs.set("retention", {
+                "enabled": self.retention_enabled_var.get(),
+                "keep_years": keep_years,
+                "archive": self.retention_archive_var.get(),
+                "archive_dir": self.retention_archive_dir_var.get().strip() or None,
+                "interval_hours": interval_hours
+            })
+        
+            # Save weekday break settings
+            self.prefs.set_break_info(
+                "lunch",
+                self.weekday_lunch_start_var.get(),
+                self.weekday_lunch_end_var.get(),
+                self.weekday_lunch_enabled_var.get(),
+                is_weekday=True
+            )
+        
+            self.prefs.set_break_info(
+                "dinner",
+                self.weekday_dinner_start_var.get(),
+                self.weekday_dinner_end_var.get(),
+                self.weekday_dinner_enabled_var.get(),
+                is_weekday=True
+            )
+        
+            # Save weekend break settings
+            self.prefs.set_break_info(
+                "lunch",
+                self.weekend_lunch_start_var.get(),
+                self.weekend_lunch_end_var.get(),
+                self.weekend_lunch_enabled_var.get(),
+                is_weekday=False
+            )
+        
+            self.prefs.set_break_info(
+                "dinner",
+                self.weekend_dinner_start_var.get(),
+                self.weekend_dinner_end_var.get(),
+                self.weekend_dinner_enabled_var.get(),
+                is_weekday=False
+            )
         
         # Inform user and close window
         messagebox.showinfo(_("info"), _("preferences_saved"))
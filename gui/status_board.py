@@ -0,0 +1,128 @@
+# gui/status_board.py
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk
+from core.presence import PresenceIndex
+from utils.instrumentation import timer
+from utils.languages import _
+
+def format_duration(delta):
+    minutes = max(0, int(delta.total_seconds()) // 60)
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+class StatusBoardDialog:
+    """Live list of the people on site, with per-department headcounts."""
+
+    # How often the open shift journal is checked for new punches
+    POLL_INTERVAL_MS = 1000
+    # How often the time-on-site column is brought up to date
+    DURATION_INTERVAL_MS = 60000
+
+    def __init__(self, parent, index=None):
+        self.parent = parent
+        self.index = index or PresenceIndex()
+        self.window = None
+        self.row_items = {}  # badge -> Treeview item id
+        self.department_items = {}  # department -> Treeview item id
+
+    def show(self):
+        # If window already exists, bring it to front
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(_("status_board_title"))
+        self.window.geometry("700x550")
+
+        self.total_label = tk.Label(self.window, text="", font=("Helvetica", 16, "bold"))
+        self.total_label.pack(pady=10)
+
+        # Headcount per department
+        self.department_tree = ttk.Treeview(self.window, columns=("department", "count"), show="headings", height=5)
+        self.department_tree.heading("department", text=_("department"))
+        self.department_tree.heading("count", text=_("status_board_on_site"))
+        self.department_tree.column("count", width=100, anchor="e")
+        self.department_tree.pack(fill="x", padx=10, pady=5)
+
+        # People on site
+        tree_frame = tk.Frame(self.window)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        columns = ("badge", "department", "since", "on_site")
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+        headings = {
+            "badge": (_("badge"), 120),
+            "department": (_("department"), 180),
+            "since": (_("status_board_since"), 150),
+            "on_site": (_("status_board_time_on_site"), 120)
+        }
+        for column, (text, width) in headings.items():
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+        tree_frame.grid_columnconfigure(0, weight=1)
+        tree_frame.grid_rowconfigure(0, weight=1)
+
+        self._update_counts()
+        self.check_for_changes()
+        self.window.after(self.DURATION_INTERVAL_MS, self.update_durations)
+
+    def _row_values(self, badge, now):
+        entry_at = self.index.on_site[badge]
+        department = self.index.department(badge) or _("status_board_unassigned")
+        since = entry_at.strftime("%H:%M") if entry_at.date() == now.date() else entry_at.strftime("%Y-%m-%d %H:%M")
+        return (badge, department, since, format_duration(now - entry_at))
+
+    def check_for_changes(self):
+        """Apply the punches since the last check; only changed rows are touched."""
+        if self.window is None or not self.window.winfo_exists():
+            return
+        with timer("status_board.refresh"):
+            changed = self.index.poll()
+            now = datetime.now()
+            rebuilt = changed is None
+            if rebuilt:
+                # The journal was compacted or replaced; redraw everything
+                self.tree.delete(*self.tree.get_children())
+                self.row_items.clear()
+                changed = set(self.index.on_site)
+            for badge in changed:
+                item = self.row_items.get(badge)
+                if badge in self.index.on_site:
+                    values = self._row_values(badge, now)
+                    if item is None:
+                        self.row_items[badge] = self.tree.insert("", "end", values=values)
+                    else:
+                        self.tree.item(item, values=values)
+                elif item is not None:
+                    self.tree.delete(item)
+                    del self.row_items[badge]
+            if changed or rebuilt:
+                self._update_counts()
+        self.window.after(self.POLL_INTERVAL_MS, self.check_for_changes)
+
+    def _update_counts(self):
+        counts = self.index.department_counts()
+        self.total_label.config(text=f"{_('status_board_on_site')}: {sum(counts.values())}")
+        for department in list(self.department_items):
+            if department not in counts:
+                self.department_tree.delete(self.department_items.pop(department))
+        for department, count in sorted(counts.items()):
+            values = (department or _("status_board_unassigned"), count)
+            item = self.department_items.get(department)
+            if item is None:
+                self.department_items[department] = self.department_tree.insert("", "end", values=values)
+            else:
+                self.department_tree.item(item, values=values)
+
+    def update_durations(self):
+        """Advance the time-on-site column."""
+        if self.window is None or not self.window.winfo_exists():
+            return
+        now = datetime.now()
+        for badge, item in self.row_items.items():
+            self.tree.set(item, "on_site", format_duration(now - self.index.on_site[badge]))
+        self.window.after(self.DURATION_INTERVAL_MS, self.update_durations)
@@ -0,0 +1,189 @@
+"""
+Instrumentation module for the application.
+This module collects counters and latency histograms around the hot paths
+and can capture a cProfile session. Everything is disabled by default and
+costs a single flag check per call until it is switched on, either with the
+"instrumentation" preference or the WHC_INSTRUMENT environment variable.
+
+Environment variables:
+    WHC_INSTRUMENT=1               Enable metric collection at startup
+    WHC_INSTRUMENT_DUMP=file.json  Write the collected metrics on exit
+    WHC_PROFILE=file.prof          Profile the whole session with cProfile
+"""
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from functools import wraps
+
+ENV_ENABLE = "WHC_INSTRUMENT"
+ENV_DUMP = "WHC_INSTRUMENT_DUMP"
+ENV_PROFILE = "WHC_PROFILE"
+
+# Upper bounds of the latency histogram buckets in milliseconds
+BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_enabled = os.environ.get(ENV_ENABLE, "") not in ("", "0")
+_metrics = {}
+_lock = threading.Lock()
+_profiler = None
+
+class Metric:
+    """Call count, total/maximum latency and a latency histogram."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        ms = seconds * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n}
+        }
+
+def is_enabled():
+    """Return True if metrics are being collected."""
+    return _enabled
+
+def set_enabled(enabled):
+    """Turn metric collection on or off."""
+    global _enabled
+    _enabled = bool(enabled)
+
+def _metric(name):
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics.setdefault(name, Metric())
+    return metric
+
+def record(name, seconds):
+    """Add one latency sample to a metric."""
+    if not _enabled:
+        return
+    with _lock:
+        _metric(name).add(seconds)
+
+def increment(name, amount=1):
+    """Increase a counter without recording a latency."""
+    if not _enabled:
+        return
+    with _lock:
+        _metric(name).count += amount
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if _enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+        return False
+
+def timer(name):
+    """Context manager recording the latency of a block under `name`."""
+    return _Timer(name)
+
+def instrument(name=None):
+    """Decorator recording the latency of every call to a function."""
+    def decorator(func):
+        metric_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """Return the collected metrics as a dictionary sorted by name."""
+    with _lock:
+        return {name: _metrics[name].to_dict() for name in sorted(_metrics)}
+
+def reset():
+    """Forget all collected metrics."""
+    with _lock:
+        _metrics.clear()
+
+def dump(file_path):
+    """Write the collected metrics to a JSON file."""
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=4, ensure_ascii=False)
+    return file_path
+
+def is_profiling():
+    """Return True while a cProfile capture is running."""
+    return _profiler is not None
+
+def start_profiling():
+    """Start capturing a cProfile session of the main thread."""
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def stop_profiling(file_path=None, limit=30):
+    """Stop the cProfile capture.
+
+    Args:
+        file_path: Optional path for the raw stats (readable with pstats or snakeviz)
+        limit: Number of functions to include in the returned summary
+
+    Returns:
+        str: The most expensive functions by cumulative time
+    """
+    global _profiler
+    if _profiler is None:
+        return ""
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    if file_path:
+        profiler.dump_stats(file_path)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+# Environment driven dumps and session profiling
+if os.environ.get(ENV_DUMP):
+    atexit.register(dump, os.environ[ENV_DUMP])
+
+if os.environ.get(ENV_PROFILE):
+    start_profiling()
+    atexit.register(stop_profiling, os.environ[ENV_PROFILE])